@@ -84,3 +84,12 @@ def test_sleeper() -> None:
     np.testing.assert_equal(sleeper._get_advised_sleep_duration(), min_sleep)
     sleeper.stop_timer()
     np.testing.assert_equal(sleeper._get_advised_sleep_duration(), min_sleep)
+
+
+def test_readonly() -> None:
+    data = np.array([1, 2, 3])
+    output = tools.readonly(data)
+    assert not output.flags.writeable
+    assert not np.shares_memory(data, output)
+    assert tools.readonly(output) is output
+    np.testing.assert_array_equal(tools.readonly([1, 2, 3]), data)
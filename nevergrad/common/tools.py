@@ -11,7 +11,7 @@ from collections import deque
 from typing import Iterable, Optional, Any, List, Tuple, Union, Callable, Set, Iterator, Sequence, Deque
 import numpy as np
 import pandas as pd
-from .typetools import PathLike
+from .typetools import PathLike, ArrayLike
 from . import testing
 
 
@@ -29,6 +29,17 @@ def pairwise(iterable: Iterable[Any]) -> Iterator[Tuple[Any, Any]]:
     return zip(a, b)
 
 
+def readonly(x: ArrayLike) -> np.ndarray:
+    """Returns a read-only array with the content of x, without copy if x is already a read-only array
+    (read-only arrays are assumed to be immutable, and can therefore be shared).
+    """
+    array = np.asarray(x)
+    if array.flags.writeable:
+        array = np.array(array, copy=True)
+        array.flags.writeable = False
+    return array
+
+
 def grouper(iterable: Iterable[Any], n: int, fillvalue: Optional[Any] = None) -> Iterator[List[Any]]:
     """Collect data into fixed-length chunks or blocks
     Copied from itertools recipe documentation
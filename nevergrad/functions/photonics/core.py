@@ -22,6 +22,7 @@
 import os
 import shutil
 from pathlib import Path
+from typing import Callable
 import numpy as np
 from ...common.typetools import ArrayLike
 from ... import instrumentation as inst
@@ -79,6 +80,10 @@ class Photonics(inst.InstrumentedFunction):
         problem name, among bragg, chirped and morpho
     dimension: int
         size of the problem among 16, 40 and 60 (morpho) or 80 (bragg and chirped)
+    num_workers: int
+        if 0 (default), a new Octave process is started for each evaluation. Otherwise, a pool of num_workers
+        persistent Octave processes (see instrumentation.utils.PersistentCommandFunction) is used, which avoids
+        paying the startup of Octave at each evaluation.
 
     Returns
     -------
@@ -112,7 +117,7 @@ class Photonics(inst.InstrumentedFunction):
       Moosh: A Numerical Swiss Army Knife for the Optics of Multilayers in Octave/Matlab. Journal of Open Research Software, 4(1), p.e13.
     """
 
-    def __init__(self, name: str, dimension: int) -> None:
+    def __init__(self, name: str, dimension: int, num_workers: int = 0) -> None:
         if shutil.which("octave") is None:
             raise RuntimeError("Photonics function requires Octave to be installed in order to run")
         assert dimension in [16, 40, 60 if name == "morpho" else 80]
@@ -120,9 +125,14 @@ class Photonics(inst.InstrumentedFunction):
         self.name = name
         path = Path(__file__).absolute().parent / 'src' / (name + '.m')
         assert path.exists(), f"Path {path} does not exist (anymore?)"
-        self._func = inst.CommandFunction(["octave", "--no-history", "--norc", "--no-gui", "--quiet", path.name],
-                                          cwd=path.parent, verbose=False,
-                                          env=dict(os.environ, OMP_NUM_THREADS="1", OPENBLAS_NUM_THREADS="1"))
+        command = ["octave", "--no-history", "--norc", "--no-gui", "--quiet"]
+        env = dict(os.environ, OMP_NUM_THREADS="1", OPENBLAS_NUM_THREADS="1")
+        self._func: Callable[..., str]
+        if num_workers:
+            self._func = inst.PersistentCommandFunction(command + ["serve.m", name], num_workers=num_workers,
+                                                        cwd=path.parent, verbose=False, env=env)
+        else:
+            self._func = inst.CommandFunction(command + [path.name], cwd=path.parent, verbose=False, env=env)
         super().__init__(self._compute, PhotonicsVariable(name=name, dimension=dimension))
         self._descriptors.update(name=name)
 
@@ -46,10 +46,12 @@ function [cost,r]=bragg(X,varargin)
 
 endfunction
 
-X=[];
-for i = 1:nargin
-  X = [X,str2num(argv(){i})];
-endfor
-disp(X);
-cost = bragg(X)
-disp(cost)
+if !exist("nevergrad_persistent", "var")  % not loaded by serve.m
+  X=[];
+  for i = 1:nargin
+    X = [X,str2num(argv(){i})];
+  endfor
+  disp(X);
+  cost = bragg(X)
+  disp(cost)
+endif
@@ -51,10 +51,12 @@ function [cost,R]=chirped(X,varargin)
 endfunction
 
 
-X=[];
-for i = 1:nargin
-  X = [X,str2num(argv(){i})];
-endfor
-disp(X);
-cost = chirped(X);
-disp(cost);
+if !exist("nevergrad_persistent", "var")  % not loaded by serve.m
+  X=[];
+  for i = 1:nargin
+    X = [X,str2num(argv(){i})];
+  endfor
+  disp(X);
+  cost = chirped(X);
+  disp(cost);
+endif
@@ -113,10 +113,12 @@ end
 
 
 
-X=[];
-for i = 1:nargin
-  X = [X,str2num(argv(){i})];
-endfor
-disp(X);
-cost = morpho(X);
-disp(cost);
+if !exist("nevergrad_persistent", "var")  % not loaded by serve.m
+  X=[];
+  for i = 1:nargin
+    X = [X,str2num(argv(){i})];
+  endfor
+  disp(X);
+  cost = morpho(X);
+  disp(cost);
+endif
@@ -0,0 +1,32 @@
+% Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+%
+% This source code is licensed under the MIT license found in the
+% LICENSE file in the root directory of this source tree.
+
+% Octave adapter for nevergrad.instrumentation.utils.PersistentCommandFunction:
+% "octave serve.m bragg" loads the functions of bragg.m and prints a ready marker then, for each line of numbers
+% read on stdin, prints the cost of the corresponding vector followed by an end marker
+% (or the error message followed by an error marker). It stops when stdin is closed.
+
+1;
+
+nevergrad_persistent = true;  % prevents the sourced script from running its own computation
+nevergrad_function = argv(){1};
+source([nevergrad_function, ".m"]);
+disp("<<nevergrad:ready>>");
+fflush(stdout);
+while true
+  line = fgetl(stdin);
+  if !ischar(line)
+    break;
+  endif
+  try
+    cost = feval(nevergrad_function, str2num(line));
+    disp(cost);
+    disp("<<nevergrad:end>>");
+  catch err
+    disp(err.message);
+    disp("<<nevergrad:error>>");
+  end_try_catch
+  fflush(stdout);
+endwhile
@@ -52,3 +52,13 @@ def test_photonics() -> None:
     with patch("nevergrad.instrumentation.utils.CommandFunction.__call__", return_value="line1\n"):
         np.testing.assert_raises(RuntimeError, photo, np.zeros(16).tolist())
     np.testing.assert_raises(AssertionError, photo, np.zeros(12).tolist())
+
+
+def test_persistent_photonics() -> None:
+    with patch("shutil.which", return_value="here"):
+        photo = core.Photonics("bragg", 16, num_workers=2)
+    assert photo._func.command[-2:] == ["serve.m", "bragg"]  # type: ignore
+    with patch("nevergrad.instrumentation.utils.PersistentCommandFunction.__call__", return_value="12") as mocked:
+        output = photo(np.zeros(16))
+    np.testing.assert_equal(output, 12)
+    np.testing.assert_equal(len(mocked.call_args[0]), 16)
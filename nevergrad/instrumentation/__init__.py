@@ -7,4 +7,4 @@ from .instantiate import register_file_type, FolderFunction
 from . import variables
 from . import variables as var
 from .core import Instrumentation, InstrumentedFunction
-from .utils import TemporaryDirectoryCopy, CommandFunction
+from .utils import TemporaryDirectoryCopy, CommandFunction, PersistentCommandFunction
@@ -5,13 +5,24 @@
 
 import warnings
 import itertools
-from typing import List, Any, Tuple, Dict, Optional, Callable
+from typing import List, Any, Tuple, Dict, Optional, Callable, NamedTuple
 import numpy as np
 from ..common.typetools import ArrayLike
+from ..common import tools
 from . import utils
 from . import variables
 
 
+class _Slot(NamedTuple):
+    """Compiled information for converting data to an argument
+    """
+    name: Optional[str]  # None for positional arguments
+    process: Callable[..., Any]  # process method of the variable
+    process_batch: Callable[..., List[Any]]  # process_batch method of the variable
+    start: int  # slice of the data corresponding to the variable
+    end: int
+
+
 class Instrumentation:
     """Class handling arguments instrumentation, and providing conversion to and from data.
 
@@ -36,9 +47,17 @@ class Instrumentation:
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         self.names: Tuple[Optional[str], ...] = ()
-        self.instruments: List[utils.Variable[Any]] = []
+        self.instruments: Tuple[utils.Variable[Any], ...] = ()
         self._set_args_kwargs(args, kwargs)
         self._name: Optional[str] = None
+        self._formats: Dict[str, str] = {}
+        self._hash: Optional[int] = None
+        self._frozen = True
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if getattr(self, "_frozen", False) and not name.startswith("_"):
+            raise RuntimeError(f"Cannot set attribute {name} of Instrumentation since it is immutable")
+        super().__setattr__(name, value)
 
     @property
     def name(self) -> str:
@@ -54,13 +73,46 @@ class Instrumentation:
 
     def _set_args_kwargs(self, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> None:
         self.names, arguments = self._make_argument_names_and_list(args, kwargs)
-        self.instruments: List[utils.Variable[Any]] = [variables._Constant.convert_non_instrument(a) for a in arguments]
+        self.instruments = tuple(variables._Constant.convert_non_instrument(a) for a in arguments)
         num_instru = len(set(id(i) for i in self.instruments))
         assert len(self.instruments) == num_instru, "All instruments must be different (sharing is not supported)"
+        for instrument in self.instruments:
+            instrument.freeze()
+        self._compile()
+
+    def _compile(self) -> None:
+        """Precomputes the slices of the data and the processing of each argument,
+        so that conversions from data to arguments do not need to recompute them
+        """
+        slots: List[_Slot] = []
+        start = 0
+        self._instrument_dimensions = tuple(instrument.dimension for instrument in self.instruments)
+        for name, instrument in zip(self.names, self.instruments):
+            end = start + instrument.dimension
+            slots.append(_Slot(name, instrument.process, instrument.process_batch, start, end))
+            start = end
+        self._dimension = start
+        self._stochastic = any(instrument.stochastic for instrument in self.instruments)
+        self._arg_slots = tuple(slot for slot in slots if slot.name is None)
+        self._kwarg_slots = tuple(slot for slot in slots if slot.name is not None)
+
+    def _update_plan(self) -> None:
+        """Recompiles the plan if the dimension of an instrument changed since the compilation
+        (this can only happen through private attributes, since instruments are frozen)
+        """
+        if tuple(instrument.dimension for instrument in self.instruments) != self._instrument_dimensions:
+            self._compile()
 
     @property
     def dimension(self) -> int:
-        return sum(i.dimension for i in self.instruments)
+        self._update_plan()
+        return self._dimension
+
+    @property
+    def stochastic(self) -> bool:
+        """Whether the conversion from data to arguments involves random draws (when not deterministic)
+        """
+        return self._stochastic
 
     @property
     def args(self) -> Tuple[utils.Variable[Any], ...]:
@@ -90,10 +142,31 @@ class Instrumentation:
     def data_to_arguments(self, data: ArrayLike, deterministic: bool = True) -> Tuple[Tuple[Any, ...], Dict[str, Any]]:
         """Converts data to arguments
         """
-        arguments = utils.process_instruments(self.instruments, data, deterministic=deterministic)
-        args = tuple(arg for name, arg in zip(self.names, arguments) if name is None)
-        kwargs = {name: arg for name, arg in zip(self.names, arguments) if name is not None}
-        return args, kwargs
+        data = tools.readonly(data).ravel()  # views on read-only data, or on a read-only copy of writeable data
+        self._update_plan()
+        assert data.size == self._dimension, f"Expected {self._dimension} values but got {data.size}"
+        args = tuple(slot.process(data[slot.start: slot.end], deterministic=deterministic) for slot in self._arg_slots)
+        kwargs = {slot.name: slot.process(data[slot.start: slot.end], deterministic=deterministic) for slot in self._kwarg_slots}
+        return args, kwargs  # type: ignore
+
+    def data_to_arguments_batch(self, data: ArrayLike, deterministic: bool = True) -> List[Tuple[Tuple[Any, ...], Dict[str, Any]]]:
+        """Converts a batch of data (array of shape (num_points, dimension)) to a list of arguments
+        (one tuple of args and dict of kwargs per point), using the vectorized process_batch
+        method of the variables.
+
+        Note
+        ----
+        For stochastic variables, the random draws are performed variable by variable
+        (for all points at once), and therefore differ from sequential calls to data_to_arguments.
+        """
+        data = np.array(data, dtype=float)
+        self._update_plan()
+        assert data.ndim == 2 and data.shape[1] == self._dimension, f"Expected shape (n, {self._dimension}) but got {data.shape}"
+        processed = [slot.process_batch(data[:, slot.start: slot.end], deterministic=deterministic)
+                     for slot in self._arg_slots + self._kwarg_slots]
+        num_args = len(self._arg_slots)
+        return [(tuple(values[:num_args]), {slot.name: v for slot, v in zip(self._kwarg_slots, values[num_args:])})  # type: ignore
+                for values in zip(*processed)] if processed else [((), {}) for _ in range(data.shape[0])]
 
     def arguments_to_data(self, *args: Any, **kwargs: Any) -> ArrayLike:
         """Converts arguments to data
@@ -115,6 +188,11 @@ class Instrumentation:
         return InstrumentedFunction(function, *self.args, **self.kwargs)
 
     def __format__(self, format_spec: str) -> str:
+        if format_spec not in self._formats:  # cached since instrumentations are immutable
+            self._formats[format_spec] = self._format(format_spec)
+        return self._formats[format_spec]
+
+    def _format(self, format_spec: str) -> str:
         arguments = [format(x, format_spec) for x in self.args]
         sorted_kwargs = [(name, format(self.kwargs[name], format_spec)) for name in sorted(self.kwargs)]
         all_params = arguments + [f"{x}={y}" for x, y in sorted_kwargs]
@@ -125,6 +203,18 @@ class Instrumentation:
     def __repr__(self) -> str:
         return f"{self:display}"
 
+    def __eq__(self, other: Any) -> bool:
+        if self is other:
+            return True
+        if self.__class__ != other.__class__ or hash(self) != hash(other):
+            return False
+        return bool(self.names == other.names and self.instruments == other.instruments and self._name == other._name)
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            self._hash = hash((self.names, self.instruments))
+        return self._hash
+
     def get_summary(self, data: ArrayLike) -> Any:
         """Provides the summary string corresponding to the provided data
 
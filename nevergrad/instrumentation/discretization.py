@@ -4,9 +4,10 @@
 # LICENSE file in the root directory of this source tree.
 
 from typing import List
+import math
 import warnings
 import numpy as np
-import scipy.stats
+from scipy.special import ndtr, ndtri  # faster than scipy.stats.norm.cdf and ppf
 from ..common.typetools import ArrayLike
 
 
@@ -17,7 +18,7 @@ def threshold_discretization(x: ArrayLike, arity: int = 2) -> List[int]:
     Parameters
     ----------
     x: list/array
-       values to discretize
+       values to discretize (of any shape)
     arity: int
        the number of possible integer values (arity n will lead to values from 0 to n - 1)
 
@@ -25,21 +26,28 @@ def threshold_discretization(x: ArrayLike, arity: int = 2) -> List[int]:
     ----
     - nans are processed as negative infs (yields 0)
     """
-    x = np.array(x, copy=True)
-    if np.any(np.isnan(x)):
+    x = np.asarray(x, dtype=float)
+    if _has_nan(x):  # only copy in this (rare) case
         warnings.warn("Encountered NaN values for discretization")
-        x[np.isnan(x)] = -np.inf
+        x = np.where(np.isnan(x), -np.inf, x)
     if arity == 2:  # special case, to have 0 yield 0
-        return (np.array(x) > 0).astype(int).tolist()  # type: ignore
+        return (x > 0).astype(int).tolist()  # type: ignore
     else:
-        return np.clip(arity * scipy.stats.norm.cdf(x), 0, arity - 1).astype(int).tolist()  # type: ignore
+        return np.minimum((arity * ndtr(x)).astype(int), arity - 1).tolist()  # type: ignore
+
+
+def _has_nan(x: np.ndarray) -> bool:
+    """Checks for NaN values without allocating a boolean array:
+    the sum of squares is NaN if and only if a value is NaN
+    """
+    flat = x.ravel()
+    return math.isnan(flat.dot(flat))
 
 
 def inverse_threshold_discretization(indexes: List[int], arity: int = 2) -> ArrayLike:
-    indexes_arr = np.array(indexes, copy=True)
-    pdf_bin_size = 1 / arity
+    indexes_arr = np.asarray(indexes, dtype=float)
     # We take the center of each bin (in the pdf space)
-    return scipy.stats.norm.ppf(indexes_arr * pdf_bin_size + (pdf_bin_size / 2))  # type: ignore
+    return ndtri((indexes_arr + .5) / arity)  # type: ignore
 
 
 def softmax_discretization(x: ArrayLike, arity: int = 2, deterministic: bool = False) -> List[int]:
@@ -51,7 +59,8 @@ def softmax_discretization(x: ArrayLike, arity: int = 2, deterministic: bool = F
     Parameters
     ----------
     x: list/array
-        the float values from a continuous space which need to be discretized
+        the float values from a continuous space which need to be discretized (a 2D array
+        of shape (n, arity) is processed as a batch of n samples)
     arity: int
         the number of possible integer values (arity 2 will lead to values in {0, 1})
     deterministic: bool
@@ -62,29 +71,37 @@ def softmax_discretization(x: ArrayLike, arity: int = 2, deterministic: bool = F
     - if one or several inf values are present, only those are considered
     - in case of tie, the deterministic value is the first one (lowest) of the tie
     - nans and -infs are ignored, except if all are (then uniform random choice)
+    - sampling is performed for all values at once through the Gumbel-max trick
+      (argmax of the values perturbed by Gumbel noise)
     """
     data = np.array(x, copy=True, dtype=float).reshape((-1, arity))
-    if np.any(np.isnan(data)):
+    nans = np.isnan(data)
+    if nans.any():
         warnings.warn("Encountered NaN values for discretization")
-        data[np.isnan(data)] = -np.inf
+        data[nans] = -np.inf
     if deterministic:
         output = np.argmax(data, axis=1).tolist()
         return output  # type: ignore
-    return [np.random.choice(arity, p=softmax_probas(d)) for d in data]
+    infinite = data == np.inf
+    rows = np.any(infinite, axis=1)  # only the infinite values are considered in these rows
+    data[rows] = np.where(infinite[rows], 0, -np.inf)
+    data[np.all(data == -np.inf, axis=1)] = 0  # uniform choice
+    output = np.argmax(data + np.random.gumbel(size=data.shape), axis=1).tolist()
+    return output  # type: ignore
 
 
 def softmax_probas(data: np.ndarray) -> np.ndarray:
-    # TODO: test directly? (currently through softmax discretization)
     # TODO: move nan case here?
-    maxv = np.max(data)
-    if np.abs(maxv) == np.inf or np.isnan(maxv):
-        maxv = 0
-    data = np.exp(data - maxv)
-    if any(x == np.inf for x in data):  # deal with infinite positives special case
-        data = np.array([int(x == np.inf) for x in data])
-    if not sum(data):
-        data = np.ones(len(data))
-    return data / np.sum(data)  # type: ignore
+    data = np.asarray(data, dtype=float)
+    maxv = data.max()
+    if maxv == np.inf:  # deal with infinite positives special case
+        probas = (data == np.inf).astype(float)
+    elif maxv == -np.inf:
+        return np.full(data.size, 1. / data.size)  # type: ignore
+    else:
+        probas = np.exp(data - maxv)  # NaN are propagated
+    probas /= probas.sum()
+    return probas
 
 
 def inverse_softmax_discretization(index: int, arity: int) -> ArrayLike:
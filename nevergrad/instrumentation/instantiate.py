@@ -5,12 +5,13 @@
 
 import os
 import re
+import queue
 import warnings
 import tempfile
 import operator
 import contextlib
 from pathlib import Path
-from typing import Union, List, Any, Optional, Generator, Set, Match, Dict
+from typing import Union, List, Any, Optional, Generator, Set, Match, Dict, Tuple
 import numpy as np
 from ..common import testing
 from . import utils
@@ -47,6 +48,21 @@ class Placeholder:
         prog = re.compile(cls.pattern)
         return [cls(x.group("name"), x.group("comment")) for x in prog.finditer(text)]
 
+    @classmethod
+    def split(cls, text: str) -> Tuple[List[str], List[str]]:
+        """Splits the text into its literal segments and the names of the placeholders in between
+        (there is always one more segment than names)
+        """
+        segments: List[str] = []
+        names: List[str] = []
+        start = 0
+        for match in re.finditer(cls.pattern, text):
+            segments.append(text[start: match.start()])
+            names.append(match.group("name"))
+            start = match.end()
+        segments.append(text[start:])
+        return segments, names
+
     def __repr__(self) -> str:
         return f'{self.__class__.__name__}({self.name!a}, {self.comment!a})'
 
@@ -96,6 +112,25 @@ def symlink_folder_tree(folder: Union[Path, str], shadow_folder: Union[Path, str
             shadow_fp.symlink_to(fp)
 
 
+def _scan_folder(folder: Path) -> Tuple[List[Path], List[Path]]:
+    """Lists all the subfolders and files of a folder (recursively, following symlinks as symlink_folder_tree does)
+    """
+    subfolders: List[Path] = []
+    filepaths: List[Path] = []
+    for dirpath, dirnames, filenames in os.walk(str(folder), followlinks=True):
+        path = Path(dirpath)
+        subfolders.extend(path / name for name in dirnames)
+        filepaths.extend(path / name for name in filenames)
+    return subfolders, filepaths
+
+
+def _may_be_instrumented(filepath: Path) -> bool:
+    """Fast check of whether a file may hold placeholders (current or deprecated ones), to avoid parsing the others
+    """
+    with filepath.open("rb") as f:
+        return b"NG_" in f.read()
+
+
 def uncomment_line(line: str, extension: str) -> str:
     if extension not in COMMENT_CHARS:
         raise RuntimeError(f'Unknown file type: {extension}\nDid you register it using {register_file_type.__name__}?')
@@ -134,6 +169,7 @@ class FileTextFunction:
             text = "\n".join(lines)
         self.placeholders = Placeholder.finditer(text)
         self._text = text
+        self._segments, self._names = Placeholder.split(text)  # parsed once, for fast instantiation
         self.parameters: Set[str] = set()
         for x in self.placeholders:
             if x.name not in self.parameters:
@@ -142,8 +178,13 @@ class FileTextFunction:
                 raise RuntimeError(f'Found duplicate placeholder (names must be unique) with name "{x.name}" in file:\n{self.filepath}')
 
     def __call__(self, **kwargs: Any) -> str:
-        testing.assert_set_equal(kwargs, self.parameters, err_msg="Wrong input parameters.")
-        return Placeholder.sub(self._text, self.filepath.suffix, replacers=kwargs)
+        if kwargs.keys() != self.parameters:
+            testing.assert_set_equal(kwargs, self.parameters, err_msg="Wrong input parameters.")
+        extension = self.filepath.suffix
+        pieces = [self._segments[0]]
+        for name, segment in zip(self._names, self._segments[1:]):
+            pieces.extend((_convert_to_string(kwargs[name], extension), segment))
+        return "".join(pieces)
 
     def __repr__(self) -> str:
         names = sorted(self.parameters)
@@ -160,6 +201,10 @@ class FolderInstantiator:
     clean_copy: bool
         whether to create an initial clean temporary copy of the folder in order to avoid
         versioning problems (instantiations are lightweight symlinks in any case).
+    reuse_folders: bool
+        whether to reuse the instantiation folders from one call of instantiate to another. The symlink tree
+        is then created once per concurrent instantiation (i.e. once per worker) instead of once per call, and
+        only the files with placeholders are rewritten at each call.
 
     Caution
     -------
@@ -167,11 +212,17 @@ class FolderInstantiator:
         computation in a cluster. You may want to create a clean copy yourself
         in the folder of your choice, or set the the TemporaryDirectoryCopy class
         (located in instrumentation.instantiate) CLEAN_COPY_DIRECTORY environment
-        variable to a shared directory
+        variable to a shared directory.
+        The folder is scanned only once, at initialization: files added to the source folder
+        afterwards (when not using clean_copy) are not mirrored in the instantiations.
+        With reuse_folders=True, files created by a run in the instantiation folder are still
+        present in the following runs using the same folder.
     """
 
-    def __init__(self, folder: Union[Path, str], clean_copy: bool = False) -> None:
+    def __init__(self, folder: Union[Path, str], clean_copy: bool = False, reuse_folders: bool = False) -> None:
         self._clean_copy = None
+        self.reuse_folders = reuse_folders
+        self._available: "queue.Queue[tempfile.TemporaryDirectory[str]]" = queue.Queue()
         self.folder = Path(folder).expanduser().absolute()
         assert self.folder.exists(), f"{folder} does not seem to exist"
         if clean_copy:
@@ -179,8 +230,10 @@ class FolderInstantiator:
             self.folder = self._clean_copy.copyname
         self.file_functions: List[FileTextFunction] = []
         names: Set[str] = set()
-        for fp in self.folder.glob("**/*"):  # TODO filter out all hidden files (+ build files?)
-            if fp.is_file() and fp.suffix.lower() in COMMENT_CHARS:
+        # the tree is scanned once and for all, and reused for each instantiation
+        self._subfolders, filepaths = _scan_folder(self.folder)  # TODO filter out all hidden files (+ build files?)
+        for fp in filepaths:
+            if fp.suffix.lower() in COMMENT_CHARS and fp.is_file() and _may_be_instrumented(fp):
                 file_func = FileTextFunction(fp)
                 fnames = {ph.name for ph in file_func.placeholders}
                 if fnames:
@@ -189,6 +242,8 @@ class FolderInstantiator:
                     self.file_functions.append(file_func)
         assert self.file_functions, "Found no file with placeholders"
         self.file_functions = sorted(self.file_functions, key=operator.attrgetter("filepath"))
+        instrumented = {f.filepath for f in self.file_functions}
+        self._symlinked = [fp for fp in filepaths if fp not in instrumented]
 
     def __repr__(self) -> str:
         return f'{self.__class__.__name__}("{self.folder}") with files:\n{self.file_functions}'
@@ -201,19 +256,56 @@ class FolderInstantiator:
         testing.assert_set_equal(kwargs, {x.name for x in self.placeholders}, err_msg="Wrong input parameters.")
         outfolder = Path(outfolder).expanduser().absolute()
         assert outfolder != self.folder, "Do not instantiate on same folder!"
-        symlink_folder_tree(self.folder, outfolder)
+        self._symlink_tree(outfolder)
+        self._write_files(outfolder, kwargs)
+
+    def _symlink_tree(self, outfolder: Path) -> None:
+        """Same as symlink_folder_tree, using the cached scan of the folder and skipping instrumented files
+        """
+        outfolder.mkdir(parents=True, exist_ok=True)
+        for subfolder in self._subfolders:
+            (outfolder / subfolder.relative_to(self.folder)).mkdir(exist_ok=True)
+        for fp in self._symlinked:
+            shadow_fp = outfolder / fp.relative_to(self.folder)
+            if not shadow_fp.exists():
+                shadow_fp.symlink_to(fp)
+
+    def _write_files(self, outfolder: Path, kwargs: Dict[str, Any]) -> None:
         for file_func in self.file_functions:
             inst_fp = outfolder / file_func.filepath.relative_to(self.folder)
-            os.remove(str(inst_fp))  # remove symlink to avoid writing in original dir
+            if inst_fp.is_symlink():
+                os.remove(str(inst_fp))  # remove symlink to avoid writing in original dir
             with inst_fp.open("w") as f:
                 f.write(file_func(**{x: y for x, y in kwargs.items() if x in file_func.parameters}))
 
     @contextlib.contextmanager
     def instantiate(self, **kwargs: Any) -> Generator[Path, None, None]:
-        with tempfile.TemporaryDirectory() as tempfolder:
-            subtempfolder = Path(tempfolder) / self.folder.name
-            self.instantiate_to_folder(subtempfolder, kwargs)
+        if not self.reuse_folders:
+            with tempfile.TemporaryDirectory() as tempfolder:
+                subtempfolder = Path(tempfolder) / self.folder.name
+                self.instantiate_to_folder(subtempfolder, kwargs)
+                yield subtempfolder
+            return
+        testing.assert_set_equal(kwargs, {x.name for x in self.placeholders}, err_msg="Wrong input parameters.")
+        try:
+            tempdir = self._available.get_nowait()
+            subtempfolder = Path(tempdir.name) / self.folder.name
+        except queue.Empty:  # all folders are in use: create a new one
+            tempdir = tempfile.TemporaryDirectory()
+            subtempfolder = Path(tempdir.name) / self.folder.name
+            self._symlink_tree(subtempfolder)
+        try:
+            self._write_files(subtempfolder, kwargs)
             yield subtempfolder
+        except Exception:
+            tempdir.cleanup()  # the folder may be in an unknown state, do not reuse it
+            raise
+        self._available.put(tempdir)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        state["_available"] = queue.Queue()  # instantiation folders are local
+        return state
 
 
 class FolderFunction:
@@ -234,6 +326,9 @@ class FolderFunction:
     clean_copy: bool
         whether to create an initial clean temporary copy of the folder in order to avoid
         versioning problems (instantiations are lightweight symlinks in any case)
+    reuse_folders: bool
+        whether to reuse the instantiation folders from one call to another (one folder per concurrent call),
+        so that only the files with placeholders are rewritten at each call (see FolderInstantiator)
 
     Returns
     -------
@@ -255,11 +350,12 @@ class FolderFunction:
     """
 
     # pylint: disable=too-many-arguments
-    def __init__(self, folder: Union[Path, str], command: List[str], verbose: bool = False, clean_copy: bool = False) -> None:
+    def __init__(self, folder: Union[Path, str], command: List[str], verbose: bool = False, clean_copy: bool = False,
+                 reuse_folders: bool = False) -> None:
         self.command = command
         self.verbose = verbose
         self.postprocessings = [get_last_line_as_float]
-        self.instantiator = FolderInstantiator(folder, clean_copy=clean_copy)
+        self.instantiator = FolderInstantiator(folder, clean_copy=clean_copy, reuse_folders=reuse_folders)
         self.last_full_output: Optional[str] = None
 
     @staticmethod
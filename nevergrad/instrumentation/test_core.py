@@ -39,6 +39,25 @@ def test_instrumentation() -> None:
     # check naming
     testing.printed_assert_equal("G(0,1),3,a=OD(0,1,2,3),b=SC(0,1,2,3|0)", instru.name)
     testing.printed_assert_equal("blublu", instru.with_name("blublu").name)
+    assert instru.stochastic
+    assert not core.Instrumentation(variables.Gaussian(0, 1), a=variables.OrderedDiscrete([0, 1])).stochastic
+
+
+def test_data_to_arguments_batch() -> None:
+    instru = core.Instrumentation(variables.Gaussian(0, 1), 3, variables.Array(2),
+                                  b=variables.SoftmaxCategorical([0, 1, 2, 3]),
+                                  a=variables.OrderedDiscrete([0, 1, 2, 3]))
+    np.testing.assert_equal(instru.dimension, 8)
+    data = np.random.normal(0, 1, size=(5, 8))
+    output = instru.data_to_arguments_batch(data, deterministic=True)
+    expected = [instru.data_to_arguments(d, deterministic=True) for d in data]
+    testing.printed_assert_equal(output, expected)
+    # arguments are read-only, and do not share memory with writeable data
+    args, _ = instru.data_to_arguments(data[0])
+    assert not args[2].flags.writeable
+    assert not np.shares_memory(args[2], data)
+    np.testing.assert_raises(AssertionError, instru.data_to_arguments, data[0, :6])
+    np.testing.assert_raises(AssertionError, instru.data_to_arguments_batch, data[0])
 
 
 def test_instrumentation_init_error() -> None:
@@ -102,3 +121,16 @@ def test_deterministic_data_to_arguments() -> None:
         kwarg_sum += kwargs["y"]
     assert arg_sum != 0
     assert kwarg_sum != 0
+
+
+def test_instrumentation_immutability() -> None:
+    instru1 = core.Instrumentation(variables.Gaussian(0, 1), 3, b=variables.SoftmaxCategorical([0, 1]))
+    instru2 = core.Instrumentation(variables.Gaussian(0, 1), 3, b=variables.SoftmaxCategorical([0, 1]))
+    assert instru1 == instru2
+    assert hash(instru1) == hash(instru2)
+    assert instru1 != core.Instrumentation(variables.Gaussian(0, 2), 3, b=variables.SoftmaxCategorical([0, 1]))
+    assert len({instru1, instru2}) == 1
+    np.testing.assert_equal(instru1.name, "G(0,1),3,b=SC(0,1|0)")
+    assert instru1.name is instru1.name  # cached
+    np.testing.assert_raises(RuntimeError, setattr, instru1, "names", ("a", "b"))
+    np.testing.assert_raises(RuntimeError, setattr, instru1.instruments[0], "mean", 12)
@@ -34,6 +34,15 @@ def test_softmax_discretization(arity: int, data: List[float], expected: List[fl
     np.testing.assert_array_equal(deterministic_output, deterministic_expected, err_msg="Wrong deterministic value")
 
 
+def test_softmax_discretization_batch() -> None:
+    data = np.array([[0, np.inf, np.inf], [np.nan, -np.inf, 0], [-np.inf, -np.inf, -np.inf], [0, 0, np.log(2)]])
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        outputs = np.array([discretization.softmax_discretization(data, arity=3) for _ in range(2000)])
+    frequencies = [np.mean(outputs == k, axis=0) for k in range(3)]
+    np.testing.assert_almost_equal(frequencies, [[0, 0, .33, .25], [.5, 0, .33, .25], [.5, 1, .33, .5]], decimal=1)
+
+
 @testing.parametrized(
     arity2=(2, [.1, -2, 0], [1, 0, 0]),
     arity100=(100, [-15, -2, -.3, .3, 2, 15], [0, 2, 38, 61, 97, 99]),
@@ -57,3 +66,14 @@ def test_inverse_threshold_discretization() -> None:
 def test_inverse_softmax_discretization() -> None:
     output = discretization.inverse_softmax_discretization(arity=5, index=2)
     np.testing.assert_array_almost_equal(output, [0, 0, 0.539, 0, 0], decimal=5)
+
+
+@testing.parametrized(
+    standard=([0, np.log(3)], [.25, .75]),
+    large=([1000, 1000 + np.log(3)], [.25, .75]),
+    pinf=([np.inf, 0, np.inf], [.5, 0, .5]),
+    all_ninf=([-np.inf, -np.inf], [.5, .5]),
+)
+def test_softmax_probas(data: List[float], expected: List[float]) -> None:
+    output = discretization.softmax_probas(np.array(data))
+    np.testing.assert_array_almost_equal(output, expected)
@@ -71,6 +71,33 @@ def test_folder_instantiator(clean_copy: bool) -> None:
     np.testing.assert_equal(lines[10], "value2 = 110.0\n")
 
 
+def test_folder_instantiator_reuse_folders() -> None:
+    with tempfile.TemporaryDirectory() as folder:
+        path = Path(folder) / "examples"
+        (path / "sub").mkdir(parents=True)
+        (path / "sub" / "data.txt").write_text("blublu")
+        (path / "script.py").write_text((Path(__file__).parent / "examples" / "script.py").read_text())
+        ifolder = instantiate.FolderInstantiator(path, reuse_folders=True)
+        with ifolder.instantiate(value1=12, value2=110., string="") as tmp:
+            with ifolder.instantiate(value1=12, value2=111., string="") as tmp2:
+                assert tmp != tmp2  # concurrent instantiations use different folders
+            assert (tmp / "script.py").is_file() and not (tmp / "script.py").is_symlink()
+            assert (tmp / "sub" / "data.txt").is_symlink()
+        with ifolder.instantiate(value1=12, value2=112., string="") as tmp3:
+            with (tmp3 / "script.py").open("r") as f:
+                lines = f.readlines()
+        assert tmp3 in (tmp, tmp2)  # folder was reused
+        np.testing.assert_equal(lines[10], "value2 = 112.0\n")
+        np.testing.assert_raises(ValueError, _raise_in_instantiation, ifolder)
+        assert ifolder._available.qsize() == 1  # the folder in use during the failure was removed
+        assert "NG_ARG" in (path / "script.py").read_text()  # the original file is left untouched
+
+
+def _raise_in_instantiation(ifolder: instantiate.FolderInstantiator) -> None:
+    with ifolder.instantiate(value1=12, value2=112., string=""):
+        raise ValueError("Failing run")
+
+
 @testing.parametrized(
     void=("bvcebsl\nsoefn", []),
     unique_no_comment=("bfseibf\nbsfei NG_ARG{machin}", [("machin", None)]),
@@ -106,6 +133,15 @@ def test_file_text_function() -> None:
     path = Path(__file__).parent / "examples" / "script.py"
     filefunc = instantiate.FileTextFunction(path)
     testing.printed_assert_equal(filefunc.placeholders, _EXPECTED)
+    kwargs = {"value1": np.array([1, 2]), "value2": 12., "string": "blublu"}
+    np.testing.assert_equal(filefunc(**kwargs), Placeholder.sub(filefunc._text, ".py", kwargs))
+    np.testing.assert_raises(AssertionError, filefunc, value1=12)
+
+
+def test_placeholder_split() -> None:
+    segments, names = Placeholder.split("bfkes\nsgrdNG_ARG{truc|blublu}sehnNG_ARG{bidule}")
+    np.testing.assert_equal(segments, ["bfkes\nsgrd", "sehn", ""])
+    np.testing.assert_equal(names, ["truc", "bidule"])
 
 
 def test_folder_function() -> None:
@@ -115,3 +151,6 @@ def test_folder_function() -> None:
     np.testing.assert_equal(output, 24)
     output = func(value1=98, value2=12, string="blublu")
     np.testing.assert_equal(output, 12)
+    func = instantiate.FolderFunction(str(folder), ["python", "examples/script.py"], reuse_folders=True)
+    for string, expected in [("plop", 24), ("blublu", 12)]:
+        np.testing.assert_equal(func(value1=98, value2=12, string=string), expected)
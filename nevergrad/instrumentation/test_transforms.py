@@ -37,3 +37,21 @@ def test_back_and_forth(transform: transforms.Transform, string: str) -> None:
 def test_vals(transform: transforms.Transform, x: List[float], expected: List[float]) -> None:
     y = transform.forward(np.array(x))
     np.testing.assert_almost_equal(y, expected, decimal=5)
+
+
+def test_chain() -> None:
+    transfs = [transforms.Affine(3, 4), transforms.Affine(2, 4).reverted(), transforms.Affine(.2, 0),
+               transforms.TanhBound(-1, 1), transforms.Affine(1, 1), transforms.Exponentiate(10, -1),
+               transforms.CumulativeDensity().reverted(), transforms.ArctanBound(3, 5)]
+    chain = transforms.Chain(transfs)
+    np.testing.assert_equal(len(chain._steps), 6)  # the 3 first affine transforms are folded
+    x = np.random.normal(0, .1, size=(3, 4))
+    x_copy = np.array(x, copy=True)
+    expected = x
+    for transf in transfs:
+        expected = transf.forward(expected)
+    y = chain.forward(x)
+    np.testing.assert_array_almost_equal(y, expected)
+    np.testing.assert_array_equal(x, x_copy, err_msg="Input data was modified")
+    np.testing.assert_array_almost_equal(chain.backward(y), x)
+    np.testing.assert_equal(f"{chain:short}", "Ch(Af(3,4),Rv(Af(2,4)),Af(0.2,0),Th(-1,1),Af(1,1),Ex(10,-1),Rv(Cd()),At(3,5))")
@@ -3,9 +3,12 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import io
 import sys
 import time
+import pickle
 import contextlib
+from concurrent import futures
 from pathlib import Path
 from typing import List, Any
 import numpy as np
@@ -54,6 +57,61 @@ def test_command_function() -> None:
         raise AssertionError("An error should have been raised")
 
 
+def test_persistent_command_function() -> None:
+    command = "python -m nevergrad.instrumentation.test_utils --serve".split()
+    with utils.PersistentCommandFunction(command, num_workers=2, max_calls=3) as func:
+        output = func("testblublu12", "with space", sleep=0)
+        assert "testblublu12" in output and "with space" in output, f"Wrong output:\n{output}"
+        np.testing.assert_equal(output.splitlines()[-1], "12")
+        with futures.ThreadPoolExecutor(max_workers=2) as executor:
+            outputs = list(executor.map(func, range(4)))
+        assert all(f"my args ('{k}',)" in out for k, out in enumerate(outputs))
+        np.testing.assert_equal(len(func._processes), 2)
+        with contextlib.redirect_stdout(sys.stderr):  # avoid polluting the test output
+            np.testing.assert_raises(utils.FailedJobError, func, error=True)
+        assert all(p.is_alive() for p in func._processes)  # errors do not kill the process
+        processes = list(func._processes)
+        for process in processes:
+            process.process.kill()
+            process.process.wait()
+        assert "Finishing" in func(12)  # restarted
+        assert any(p not in processes for p in func._processes)
+    assert not func._processes
+
+
+def test_persistent_command_function_timeout_and_close() -> None:
+    command = "python -m nevergrad.instrumentation.test_utils --serve".split()
+    with utils.PersistentCommandFunction(command, timeout=5) as func:  # the startup of the child is not included
+        with futures.ThreadPoolExecutor(max_workers=1) as executor:
+            job = executor.submit(func, sleep=60)
+            while not func._processes:
+                time.sleep(.01)
+            np.testing.assert_raises(RuntimeError, func.close)  # a call is running
+            np.testing.assert_raises(utils.FailedJobError, job.result)  # killed by the timeout
+        assert not func._processes  # the hung process was discarded
+        func.timeout = None  # avoid depending on the load of the machine
+        assert "Finishing" in func(12)  # restarted
+        copied = pickle.loads(pickle.dumps(func))
+        assert not copied._processes
+        assert "Finishing" in copied(12)
+        copied.close()
+    # children which do not signal that they are ready are killed after the startup timeout
+    func = utils.PersistentCommandFunction(["python", "-c", "import time; time.sleep(60)"], startup_timeout=1)
+    np.testing.assert_raises(utils.FailedJobError, func, 12)
+    assert not func._processes
+
+
+def test_serve() -> None:
+    stdout = io.StringIO()
+    with contextlib.redirect_stdout(stdout):
+        utils.serve(do_nothing, stdin=io.StringIO("blublu --sleep=0\n--error=1\n"))
+    lines = stdout.getvalue().splitlines()
+    np.testing.assert_equal(lines[:7], [utils.READY_MARKER, "my args ('blublu',)", "my kwargs {'sleep': '0'}", "Waiting",
+                                        "Finishing", "12", utils.END_MARKER])
+    assert "ValueError: Too bad" in lines[-2]
+    np.testing.assert_equal(lines[-1], utils.ERROR_MARKER)
+
+
 def do_nothing(*args: Any, **kwargs: Any) -> int:
     print("my args", args, flush=True)
     print("my kwargs", kwargs, flush=True)
@@ -67,7 +125,9 @@ def do_nothing(*args: Any, **kwargs: Any) -> int:
     return 12
 
 
-if __name__ == "__main__":
+if __name__ == "__main__" and "--serve" in sys.argv:
+    utils.serve(do_nothing)
+elif __name__ == "__main__":
     c_args, c_kwargs = [], {}  # oversimplisitic parser
     for argv in sys.argv[1:]:
         if "=" in argv:
@@ -3,8 +3,10 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+from typing import Any, List
 import numpy as np
 from . import variables
+from .utils import Variable
 
 
 def test_softmax_categorical_deterministic() -> None:
@@ -15,7 +17,7 @@ def test_softmax_categorical_deterministic() -> None:
 def test_softmax_categorical() -> None:
     np.random.seed(12)
     token = variables.SoftmaxCategorical(["blu", "blublu", "blublublu"])
-    np.testing.assert_equal(token.process([.5, 1, 2.]), "blublu")
+    np.testing.assert_equal(token.process([.5, 1, 2.]), "blublublu")
     np.testing.assert_equal(token.process(token.process_arg("blu"), deterministic=True), "blu")
 
 
@@ -46,3 +48,81 @@ def test_array() -> None:
     output = var.process(data)
     np.testing.assert_almost_equal(output, [[3., 5], [4, 4]])
     np.testing.assert_almost_equal(var.process_arg(output), data)
+
+
+def test_process_batch() -> None:
+    np.random.seed(12)
+    data = np.random.normal(0, 1, size=(5, 4))
+    tokens: List[Variable[Any]] = [variables.SoftmaxCategorical(["blu", "blublu", "blublublu", "blublublublu"]),
+                                   variables.OrderedDiscrete(["blu", "blublu", "blublublu"]),
+                                   variables.Gaussian(1, 3),
+                                   variables.Gaussian(1, 3, shape=[2, 2]),
+                                   variables.Array(1).affined(2, 1).asfloat(),
+                                   variables.Array(2, 2).bounded(-1, 1),
+                                   variables._Constant("blublu"),
+                                   variables.BoundedScalar(-1, 3),
+                                   variables.Integer(-2, 2),
+                                   variables.Choice(["blu", "blublu", "blublublu"]),
+                                   variables.Choice(["blu", "blublu", "blublublu"], encoding="ordinal")]
+    for token in tokens:
+        batch = data[:, :token.dimension]
+        output = token.process_batch(batch, deterministic=True)
+        expected = [token.process(d, deterministic=True) for d in batch]
+        np.testing.assert_equal(output, expected, err_msg=f"Wrong batch output for {token}")
+    # stochastic softmax
+    token = variables.SoftmaxCategorical(["blu", "blublu"])
+    output = token.process_batch(np.array([[0, np.log(3)]] * 1000))
+    np.testing.assert_almost_equal(np.mean([x == "blublu" for x in output]), .75, decimal=1)
+
+
+def test_integer() -> None:
+    var = variables.Integer(-2, 2)
+    data = np.random.normal(0, 1, size=(1000, 1))
+    values = var.process_batch(data)
+    np.testing.assert_equal(sorted(set(values)), [-2, -1, 0, 1, 2])
+    for value in range(-2, 3):
+        np.testing.assert_equal(var.process(var.process_arg(value)), value)
+        np.testing.assert_equal(var.process(var.mutate(var.process_arg(value))) != value, True)
+    np.testing.assert_equal(var.process([-1000]), -2)
+    np.testing.assert_equal(var.process([1000]), 2)
+    np.testing.assert_equal(f"{var:short}", "I(-2,2)")
+
+
+def test_choice() -> None:
+    for encoding in ["onehot-argmax", "ordinal"]:
+        var = variables.Choice(["blu", "blublu", "blublublu"], encoding=encoding)
+        assert not var.stochastic
+        for value in var.possibilities:
+            np.testing.assert_equal(var.process(var.process_arg(value)), value)
+            np.testing.assert_equal(var.process(var.mutate(var.process_arg(value))) != value, True)
+    np.testing.assert_equal(var.process([0]), "blublu")
+    np.testing.assert_equal(variables.Choice([1, 2, 3]).process([.5, 1, -1]), 2)
+    np.testing.assert_equal(f"{var:short}", "C(blu,blublu,blublublu|ordinal)")
+
+
+def test_bounded_scalar() -> None:
+    var = variables.BoundedScalar(-1, 3, transform="tanh")
+    np.testing.assert_almost_equal(var.process([0]), 1)
+    np.testing.assert_almost_equal(var.process(var.process_arg(2.5)), 2.5)
+    np.testing.assert_equal(f"{var:short}", "BS(-1,3|tanh)")
+    np.testing.assert_raises(ValueError, variables.BoundedScalar, -1, 3, "blublu")
+
+
+def test_frozen_variable() -> None:
+    var1 = variables.SoftmaxCategorical(["blu", "blublu"])
+    var2 = variables.SoftmaxCategorical(["blu", "blublu"])
+    np.testing.assert_raises(TypeError, hash, var1)  # not frozen yet
+    var1.freeze()
+    var2.freeze()
+    assert var1 == var2
+    assert hash(var1) == hash(var2)
+    assert var1 != variables.SoftmaxCategorical(["blu", "blublu"], deterministic=True)
+    np.testing.assert_equal(f"{var1:short}", "SC(blu,blublu|0)")
+    np.testing.assert_raises(RuntimeError, setattr, var1, "possibilities", [1, 2])
+    assert isinstance(var1.possibilities, tuple)  # cannot be modified in place either
+    assert var1 == variables.SoftmaxCategorical(["blu", "blublu"])  # equal to unfrozen variables
+    array = variables.Array(1).bounded(0, 1)
+    array.freeze()
+    np.testing.assert_raises(RuntimeError, array.asfloat)
+    np.testing.assert_raises(RuntimeError, array.with_transform, variables.transforms.TanhBound(0, 1))
+    assert isinstance(array.transforms, tuple)
@@ -3,8 +3,10 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+from typing import List, Sequence
 import numpy as np
-from scipy import stats
+from scipy.special import ndtr, ndtri
+from ..common.typetools import ArrayLike
 
 
 class Transform:
@@ -12,6 +14,8 @@ class Transform:
     method.
     This provide a default representation, and a short representation should be implemented
     for each transform.
+    Transforms are applied elementwise, so that they can process a batch of data (2D array)
+    in one call.
     """
 
     def forward(self, x: np.ndarray) -> np.ndarray:
@@ -20,6 +24,18 @@ class Transform:
     def backward(self, y: np.ndarray) -> np.ndarray:
         raise NotImplementedError
 
+    def _forward_inplace(self, x: np.ndarray) -> np.ndarray:
+        """Applies the forward transform in place on a float array when possible
+        (the output must be used, since it may be a new array).
+        """
+        return self.forward(x)
+
+    def _backward_inplace(self, y: np.ndarray) -> np.ndarray:
+        """Applies the backward transform in place on a float array when possible
+        (the output must be used, since it may be a new array).
+        """
+        return self.backward(y)
+
     def reverted(self) -> 'Transform':
         return Reverted(self)
 
@@ -53,6 +69,12 @@ class Reverted(Transform):
     def backward(self, y: np.ndarray) -> np.ndarray:
         return self.transform.forward(y)
 
+    def _forward_inplace(self, x: np.ndarray) -> np.ndarray:
+        return self.transform._backward_inplace(x)
+
+    def _backward_inplace(self, y: np.ndarray) -> np.ndarray:
+        return self.transform._forward_inplace(y)
+
     def _short_repr(self) -> str:
         return f'Rv({self.transform:short})'
 
@@ -76,6 +98,20 @@ class Affine(Transform):
     def backward(self, y: np.ndarray) -> np.ndarray:
         return (y - self.b) / self.a  # type: ignore
 
+    def _forward_inplace(self, x: np.ndarray) -> np.ndarray:
+        if self.a != 1:
+            np.multiply(x, self.a, out=x)
+        if self.b:
+            np.add(x, self.b, out=x)
+        return x
+
+    def _backward_inplace(self, y: np.ndarray) -> np.ndarray:
+        if self.b:
+            np.subtract(y, self.b, out=y)
+        if self.a != 1:
+            np.divide(y, self.a, out=y)
+        return y
+
     def _short_repr(self) -> str:
         return f"Af({self.a},{self.b})"
 
@@ -100,6 +136,14 @@ class Exponentiate(Transform):
     def backward(self, y: np.ndarray) -> np.ndarray:
         return np.log(y) / (float(self.coeff) * np.log(self.base))  # type: ignore
 
+    def _forward_inplace(self, x: np.ndarray) -> np.ndarray:
+        np.multiply(x, float(self.coeff), out=x)
+        return np.power(float(self.base), x, out=x)  # type: ignore
+
+    def _backward_inplace(self, y: np.ndarray) -> np.ndarray:
+        np.log(y, out=y)
+        return np.divide(y, float(self.coeff) * np.log(self.base), out=y)  # type: ignore
+
     def _short_repr(self) -> str:
         return f"Ex({self.base},{self.coeff})"
 
@@ -127,6 +171,16 @@ class TanhBound(Transform):
     def backward(self, y: np.ndarray) -> np.ndarray:
         return np.arctanh((y - self._b) / self._a)  # type: ignore
 
+    def _forward_inplace(self, x: np.ndarray) -> np.ndarray:
+        np.tanh(x, out=x)
+        np.multiply(x, self._a, out=x)
+        return np.add(x, self._b, out=x)  # type: ignore
+
+    def _backward_inplace(self, y: np.ndarray) -> np.ndarray:
+        np.subtract(y, self._b, out=y)
+        np.divide(y, self._a, out=y)
+        return np.arctanh(y, out=y)  # type: ignore
+
     def _short_repr(self) -> str:
         return f"Th({self.min_val},{self.max_val})"
 
@@ -154,6 +208,16 @@ class ArctanBound(Transform):
     def backward(self, y: np.ndarray) -> np.ndarray:
         return np.tan((y - self._b) / self._a)  # type: ignore
 
+    def _forward_inplace(self, x: np.ndarray) -> np.ndarray:
+        np.arctan(x, out=x)
+        np.multiply(x, self._a, out=x)
+        return np.add(x, self._b, out=x)  # type: ignore
+
+    def _backward_inplace(self, y: np.ndarray) -> np.ndarray:
+        np.subtract(y, self._b, out=y)
+        np.divide(y, self._a, out=y)
+        return np.tan(y, out=y)  # type: ignore
+
     def _short_repr(self) -> str:
         return f"At({self.min_val},{self.max_val})"
 
@@ -164,10 +228,54 @@ class CumulativeDensity(Transform):
     """
 
     def forward(self, x: np.ndarray) -> np.ndarray:
-        return stats.norm.cdf(x)  # type: ignore
+        return ndtr(x)  # type: ignore
 
     def backward(self, y: np.ndarray) -> np.ndarray:
-        return stats.norm.ppf(y)  # type: ignore
+        return ndtri(y)  # type: ignore
+
+    def _forward_inplace(self, x: np.ndarray) -> np.ndarray:
+        return ndtr(x, out=x)  # type: ignore
+
+    def _backward_inplace(self, y: np.ndarray) -> np.ndarray:
+        return ndtri(y, out=y)  # type: ignore
 
     def _short_repr(self) -> str:
         return f"Cd()"
+
+
+class Chain(Transform):
+    """Sequence of transforms, fused so that the forward and backward methods only allocate
+    one output array, all transforms being then applied in place.
+    Adjacent affine transforms (including reverted ones) are folded into a single affine transform.
+
+    Parameters
+    ----------
+    transforms: list
+        the transforms, in the order of application of the forward method
+    """
+
+    def __init__(self, transforms: Sequence[Transform]) -> None:
+        self.transforms = list(transforms)
+        self._steps: List[Transform] = []
+        for transform in self.transforms:
+            if isinstance(transform, Reverted) and isinstance(transform.transform, Affine):
+                transform = Affine(1. / transform.transform.a, -transform.transform.b / transform.transform.a)
+            if self._steps and isinstance(transform, Affine) and isinstance(self._steps[-1], Affine):
+                previous = self._steps.pop()  # a2 * (a1 * x + b1) + b2
+                transform = Affine(transform.a * previous.a, transform.a * previous.b + transform.b)  # type: ignore
+            self._steps.append(transform)
+
+    def forward(self, x: ArrayLike) -> np.ndarray:
+        output = np.array(x, dtype=float)
+        for step in self._steps:
+            output = step._forward_inplace(output)
+        return output
+
+    def backward(self, y: ArrayLike) -> np.ndarray:
+        output = np.array(y, dtype=float)
+        for step in reversed(self._steps):
+            output = step._backward_inplace(output)
+        return output
+
+    def _short_repr(self) -> str:
+        return "Ch({})".format(",".join(f"{t:short}" for t in self.transforms))
@@ -5,10 +5,14 @@
 
 import os
 import sys
+import shlex
+import queue
 import shutil
 import tempfile
+import threading
+import traceback
 import subprocess
-from typing import List, Any, Iterable, Tuple, Union, Optional, Dict, Generic, TypeVar
+from typing import List, Any, Iterable, Tuple, Union, Optional, Dict, Generic, TypeVar, Callable, IO
 from pathlib import Path
 import numpy as np
 from ..common.typetools import ArrayLike
@@ -17,39 +21,117 @@ from ..common.typetools import ArrayLike
 X = TypeVar("X")
 
 
+_CACHE_ATTRIBUTES = ("_frozen", "_hash", "_formats", "_chain")  # ignored for equality
+
+
 class Variable(Generic[X]):
+    """Base class for variables.
+    Variables are frozen (made immutable) when added to an Instrumentation, so that their hash
+    and their format strings can be cached.
+    """
+
+    _frozen = False
+    _hash: Optional[int] = None
+
+    def freeze(self) -> None:
+        """Prevents any further modification of the public attributes of the variable,
+        and activates the caching of its hash and format strings.
+        Public list attributes (such as transforms or possibilities) are converted to tuples,
+        so that they cannot be modified in place either.
+        """
+        for name, value in list(self.__dict__.items()):
+            if not name.startswith("_") and isinstance(value, list):
+                object.__setattr__(self, name, tuple(value))
+        object.__setattr__(self, "_frozen", True)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if self._frozen and not name.startswith("_"):
+            raise RuntimeError(f"Cannot set attribute {name} of {self.__class__.__name__} since it is frozen")
+        super().__setattr__(name, value)
 
     @property
     def dimension(self) -> int:
         raise NotImplementedError
 
+    @property
+    def stochastic(self) -> bool:
+        """Whether the (non-deterministic) processing of the data involves random draws
+        """
+        return False
+
     def process_arg(self, arg: X) -> ArrayLike:
         raise NotImplementedError
 
     def process(self, data: ArrayLike, deterministic: bool = False) -> X:
         raise NotImplementedError
 
+    def mutate(self, data: ArrayLike) -> np.ndarray:
+        """Returns the data of a random neighbor, for structure-aware discrete mutations.
+        By default, each coordinate is resampled from a standard normal distribution with
+        probability 1 / dimension (and at least one coordinate is resampled).
+        """
+        output = np.array(data, dtype=float)
+        mutated = np.random.rand(output.size) < 1. / output.size
+        while not mutated.any():
+            mutated = np.random.rand(output.size) < 1. / output.size
+        output[mutated] = np.random.normal(0, 1, size=int(np.sum(mutated)))
+        return output
+
+    def process_batch(self, data: np.ndarray, deterministic: bool = False) -> List[X]:
+        """Processes a batch of data (2D array with one row per point), and returns the list of outputs.
+        This default implementation processes the rows one at a time, and should be overriden
+        with a vectorized implementation whenever possible.
+        """
+        return [self.process(d, deterministic=deterministic) for d in data]
+
     def get_summary(self, data: ArrayLike) -> str:
         output = self.process(data, deterministic=True)
         d = data if len(data) > 1 else data[0]
         return f"Value {output}, from data: {d}"
 
     def __eq__(self, other: Any) -> bool:
-        return bool(self.__class__ == other.__class__ and self.__dict__ == other.__dict__)
+        if self is other:
+            return True
+        if self.__class__ != other.__class__:
+            return False
+        if self._frozen and other._frozen and hash(self) != hash(other):
+            return False
+        return bool(self._state() == other._state())
+
+    def __hash__(self) -> int:
+        if not self._frozen:
+            raise TypeError(f"Unhashable {self.__class__.__name__} since it is not frozen")
+        if self._hash is None:
+            self._hash = hash((self.__class__.__name__, repr(self)))
+        return self._hash
+
+    def _state(self) -> Dict[str, Any]:  # lists are compared as tuples since they are converted when freezing
+        return {x: tuple(y) if isinstance(y, list) else y for x, y in self.__dict__.items() if x not in _CACHE_ATTRIBUTES}
 
     def __repr__(self) -> str:
+        return self._cached_format("repr", self._repr)
+
+    def _repr(self) -> str:
         args = ", ".join(f"{x}={y}" for x, y in sorted(self.__dict__.items()) if not x.startswith("_"))
         return f"{self.__class__.__name__}({args})"
 
     def _short_repr(self) -> str:
         raise NotImplementedError
 
+    def _cached_format(self, key: str, formatter: Callable[[], str]) -> str:
+        if not self._frozen:
+            return formatter()
+        formats: Dict[str, str] = self.__dict__.setdefault("_formats", {})
+        if key not in formats:
+            formats[key] = formatter()
+        return formats[key]
+
     def __format__(self, format_spec: str) -> str:
         if format_spec == "short":
-            return self._short_repr()
+            return self._cached_format("short", self._short_repr)
         elif format_spec == "display":
             # ugly hack below, but simplifies code a lot
-            return self._short_repr() if self.__class__.__name__ == "_Constant" else repr(self)
+            return self._cached_format("short", self._short_repr) if self.__class__.__name__ == "_Constant" else repr(self)
         return repr(self)
 
 
@@ -119,6 +201,11 @@ class FailedJobError(RuntimeError):
     """
 
 
+def _command_arguments(*args: Any, **kwargs: Any) -> List[str]:
+    # TODO make the following command more robust (probably fails in multiple cases)
+    return [str(x) for x in args] + ["--{}={}".format(x, y) for x, y in kwargs.items()]
+
+
 class CommandFunction:
     """Wraps a command as a function in order to make sure it goes through the
     pipeline and notify when it is finished.
@@ -154,13 +241,13 @@ class CommandFunction:
         The logs are bufferized. They will be printed if the job fails, or sent as output of the function
         Errors are provided with the internal stderr
         """
-        # TODO make the following command more robust (probably fails in multiple cases)
-        full_command = self.command + [str(x) for x in args] + ["--{}={}".format(x, y) for x, y in kwargs.items()]
+        full_command = self.command + _command_arguments(*args, **kwargs)
         if self.verbose:
             print(f"The following command is sent: {full_command}")
         outlines: List[str] = []
         with subprocess.Popen(full_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
                               shell=False, cwd=self.cwd, env=self.env) as process:
+            assert process.stdout is not None  # stdout is piped
             try:
                 for line in iter(process.stdout.readline, ''):
                     if not line:
@@ -181,3 +268,260 @@ class CommandFunction:
                 subprocess_error = subprocess.CalledProcessError(retcode, process.args, output=stdout, stderr=stderr)
                 raise FailedJobError(stderr.decode()) from subprocess_error
         return stdout
+
+
+READY_MARKER = "<<nevergrad:ready>>"
+END_MARKER = "<<nevergrad:end>>"
+ERROR_MARKER = "<<nevergrad:error>>"
+
+
+class _PersistentProcess:
+    """Long-lived child process of a PersistentCommandFunction
+    """
+
+    def __init__(self, command: List[str], cwd: Optional[str], env: Optional[Dict[str, str]],
+                 verbose: bool = False, startup_timeout: Optional[float] = None) -> None:
+        self._stderr: IO[bytes] = tempfile.TemporaryFile()  # a file avoids deadlocks if the child writes a lot to stderr
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=self._stderr,
+                                        shell=False, cwd=cwd, env=env)
+        self.num_calls = 0
+        self._timed_out = False
+        try:  # wait for the child to be ready, so that its startup does not count in the timeout of the first call
+            marker, outlines = self._read(verbose=verbose, timeout=startup_timeout)
+            if marker != READY_MARKER:
+                raise FailedJobError(f"Process {self.process.args!r} sent {marker} instead of {READY_MARKER} at startup:\n"
+                                     + "\n".join(outlines))
+        except FailedJobError:
+            self.close()
+            raise
+
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+
+    def stderr(self) -> str:
+        self._stderr.seek(0)
+        return self._stderr.read().decode(errors="replace")
+
+    def _kill_on_timeout(self) -> None:
+        self._timed_out = True
+        self.process.kill()
+
+    def call(self, line: str, verbose: bool = False, timeout: Optional[float] = None) -> str:
+        self.num_calls += 1
+        self.process.stdin.write(line.encode() + b"\n")  # type: ignore
+        self.process.stdin.flush()  # type: ignore
+        marker, outlines = self._read(verbose=verbose, timeout=timeout)
+        if marker == ERROR_MARKER:
+            raise FailedJobError("\n".join(outlines))
+        return "\n".join(outlines)
+
+    def _read(self, verbose: bool, timeout: Optional[float]) -> Tuple[str, List[str]]:
+        """Reads stdout until a marker line, and returns the marker and the previous lines.
+        The child is killed if no marker was received after timeout seconds.
+        """
+        outlines: List[str] = []
+        timer = None if timeout is None else threading.Timer(timeout, self._kill_on_timeout)  # unblocks readline
+        if timer is not None:
+            timer.start()
+        try:
+            for bline in iter(self.process.stdout.readline, b""):  # type: ignore
+                outline = bline.decode().rstrip("\r\n")
+                if outline in (READY_MARKER, END_MARKER, ERROR_MARKER):
+                    return outline, outlines
+                outlines.append(outline.strip())
+                if verbose:
+                    print(outlines[-1], flush=True)
+        finally:
+            if timer is not None:
+                timer.cancel()
+        if self._timed_out:
+            self.process.wait()
+            raise FailedJobError(f"Process {self.process.args!r} was killed after a {timeout}s timeout:\n" + "\n".join(outlines))
+        raise FailedJobError(f"Process {self.process.args!r} died (exit code {self.process.wait()}):\n{self.stderr()}")
+
+    def close(self) -> None:
+        if self.is_alive():
+            self.process.stdin.close()  # type: ignore  # lets the child exit gracefully
+            try:
+                self.process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process.stdout.close()  # type: ignore
+        self._stderr.close()
+
+
+class PersistentCommandFunction:
+    """Wraps a command as a function, with a pool of long-lived child processes instead of
+    one process per call. Each call sends a line of arguments (formatted as for CommandFunction,
+    separated by spaces) on the stdin of an available child, which must answer by printing its
+    output on stdout, followed by a line containing END_MARKER (or ERROR_MARKER in case of failure).
+    Once started, the child must print a line containing READY_MARKER before reading its first line of arguments.
+    The "serve" function of this module implements this protocol for Python scripts, and
+    nevergrad/functions/photonics/src/serve.m for Octave scripts.
+
+    Parameters
+    ----------
+    command: list
+        command starting a child process, as a list
+    num_workers: int
+        number of child processes, i.e. number of calls which can run in parallel
+        (from different threads). Processes are started on their first use.
+    verbose: bool
+        prints the arguments and stdout at runtime
+    cwd: Path/str
+        path to the location where the command must run from
+    env: dict
+        environment variables of the child processes
+    max_calls: int or None
+        number of calls after which a child process is restarted (in case it leaks memory for instance)
+    timeout: float or None
+        maximum duration of a call, in seconds, after which the child process is killed (it is
+        then restarted on the next call) and a FailedJobError is raised. The startup of the child
+        process is not included.
+    startup_timeout: float or None
+        maximum duration of the startup of a child process (until it prints READY_MARKER), in seconds,
+        after which it is killed and a FailedJobError is raised
+
+    Returns
+    -------
+    str
+       Everything that has been sent to stdout for this call
+
+    Note
+    ----
+    Child processes are checked before each call, and restarted if they died. A child which fails
+    while processing a call raises a FailedJobError, with its stderr, and is restarted on the next call.
+    Use close (or a context manager) to stop the child processes, once no call is running.
+    """
+
+    def __init__(self, command: List[str], num_workers: int = 1, verbose: bool = False, cwd: Optional[Union[str, Path]] = None,
+                 env: Optional[Dict[str, str]] = None, max_calls: Optional[int] = None, timeout: Optional[float] = None,
+                 startup_timeout: Optional[float] = None) -> None:
+        if not isinstance(command, list):
+            raise TypeError("The command must be provided as a list")
+        if num_workers < 1:
+            raise ValueError(f"num_workers must be strictly positive (got {num_workers})")
+        self.command = command
+        self.num_workers = num_workers
+        self.verbose = verbose
+        self.cwd = None if cwd is None else str(cwd)
+        self.env = env
+        self.max_calls = max_calls
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self._lock = threading.Lock()
+        self._num_running = 0  # number of calls in flight, protected by the lock
+        self._init_slots()
+
+    def _init_slots(self) -> None:
+        self._processes: List[_PersistentProcess] = []
+        self._slots: "queue.Queue[Optional[_PersistentProcess]]" = queue.Queue()
+        for _ in range(self.num_workers):
+            self._slots.put(None)  # processes are started lazily
+
+    def _acquire(self) -> Optional[_PersistentProcess]:
+        with self._lock:
+            self._num_running += 1
+        return self._slots.get()
+
+    def _release(self, process: Optional[_PersistentProcess]) -> None:
+        self._slots.put(process)
+        with self._lock:
+            self._num_running -= 1
+
+    def __call__(self, *args: Any, **kwargs: Any) -> str:
+        line = " ".join(shlex.quote(arg) for arg in _command_arguments(*args, **kwargs))
+        if "\n" in line:
+            raise ValueError("Arguments must not contain line breaks")
+        if self.verbose:
+            print(f"The following line is sent: {line}")
+        process = self._acquire()
+        try:
+            if process is not None and (not process.is_alive() or (self.max_calls is not None and process.num_calls >= self.max_calls)):
+                self._discard(process)
+                process = None
+            if process is None:
+                process = _PersistentProcess(self.command, cwd=self.cwd, env=self.env, verbose=self.verbose,
+                                             startup_timeout=self.startup_timeout)
+                self._processes.append(process)
+            try:
+                return process.call(line, verbose=self.verbose, timeout=self.timeout)
+            except (BrokenPipeError, FailedJobError):
+                if not process.is_alive():  # dead process: will be restarted on next call
+                    process.process.wait()
+                    self._discard(process)
+                    process = None
+                raise
+        finally:
+            self._release(process)
+
+    def _discard(self, process: _PersistentProcess) -> None:
+        process.close()
+        if process in self._processes:
+            self._processes.remove(process)
+
+    def close(self) -> None:
+        """Stops all child processes (they will be restarted if the function is called again)
+        """
+        with self._lock:
+            if self._num_running:
+                raise RuntimeError(f"Cannot close while {self._num_running} call(s) are running")
+            for process in list(self._processes):
+                self._discard(process)
+            self._init_slots()
+
+    def __enter__(self) -> "PersistentCommandFunction":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        if hasattr(self, "_processes"):
+            self.close()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        for name in ["_lock", "_num_running", "_processes", "_slots"]:
+            del state[name]  # processes cannot be shared
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._num_running = 0
+        self._init_slots()
+
+
+def serve(function: Callable[..., Any], stdin: Optional[IO[str]] = None) -> None:
+    """Python adapter for PersistentCommandFunction: runs a loop reading lines of arguments
+    on stdin (positional arguments, and keyword arguments as --key=value, all provided as strings),
+    calling the function with them and printing its output followed by END_MARKER, or the
+    traceback followed by ERROR_MARKER if it raised an exception. The loop ends when stdin is closed.
+    READY_MARKER is printed before the loop starts.
+
+    Usage, at the end of a script:
+    if __name__ == "__main__":
+        serve(my_function)
+    """
+    stdin = sys.stdin if stdin is None else stdin
+    print(READY_MARKER, flush=True)
+    for line in stdin:
+        args: List[str] = []
+        kwargs: Dict[str, str] = {}
+        try:
+            for token in shlex.split(line):
+                if token.startswith("--") and "=" in token:
+                    key, val = token[2:].split("=", 1)
+                    kwargs[key] = val
+                else:
+                    args.append(token)
+            output = function(*args, **kwargs)
+        except Exception:  # pylint: disable=broad-except
+            print(traceback.format_exc().rstrip())
+            print(ERROR_MARKER, flush=True)
+        else:
+            if output is not None:
+                print(output)
+            print(END_MARKER, flush=True)
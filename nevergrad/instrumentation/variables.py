@@ -38,12 +38,21 @@ class SoftmaxCategorical(utils.Variable[X]):
     def dimension(self) -> int:
         return len(self.possibilities)
 
+    @property
+    def stochastic(self) -> bool:
+        return not self.deterministic
+
     def process(self, data: ArrayLike, deterministic: bool = False) -> X:
         assert len(data) == len(self.possibilities)
         deterministic = deterministic | self.deterministic
         index = int(discretization.softmax_discretization(data, len(self.possibilities), deterministic=deterministic)[0])
         return self.possibilities[index]
 
+    def process_batch(self, data: np.ndarray, deterministic: bool = False) -> List[X]:
+        deterministic = deterministic | self.deterministic
+        indices = discretization.softmax_discretization(data, len(self.possibilities), deterministic=deterministic)
+        return [self.possibilities[index] for index in indices]
+
     def process_arg(self, arg: X) -> ArrayLike:
         assert arg in self.possibilities, f'{arg} not in allowed values: {self.possibilities}'
         return discretization.inverse_softmax_discretization(self.possibilities.index(arg), len(self.possibilities))
@@ -76,11 +85,19 @@ class OrderedDiscrete(SoftmaxCategorical[X]):
     def dimension(self) -> int:
         return 1
 
+    @property
+    def stochastic(self) -> bool:
+        return False
+
     def process(self, data: ArrayLike, deterministic: bool = False) -> X:  # pylint: disable=arguments-differ, unused-argument
         assert len(data) == 1
         index = discretization.threshold_discretization(data, arity=len(self.possibilities))[0]
         return self.possibilities[index]
 
+    def process_batch(self, data: np.ndarray, deterministic: bool = False) -> List[X]:
+        indices = discretization.threshold_discretization(np.asarray(data)[:, 0], arity=len(self.possibilities))
+        return [self.possibilities[index] for index in indices]
+
     def process_arg(self, arg: X) -> ArrayLike:
         assert arg in self.possibilities, f'{arg} not in allowed values: {self.possibilities}'
         index = self.possibilities.index(arg)
@@ -113,6 +130,10 @@ class Gaussian(utils.Variable[Y]):
         x = data[0] if self.shape is None else np.reshape(data, self.shape)
         return self.std * x + self.mean
 
+    def process_batch(self, data: np.ndarray, deterministic: bool = True) -> List[Y]:
+        output = self.std * np.asarray(data) + self.mean
+        return list(output[:, 0] if self.shape is None else output.reshape((-1,) + tuple(self.shape)))
+
     def process_arg(self, arg: Y) -> ArrayLike:
         return [(arg - self.mean) / self.std]
 
@@ -139,6 +160,9 @@ class _Constant(utils.Variable[X]):
     def process(self, data: ArrayLike, deterministic: bool = False) -> X:  # pylint: disable=unused-argument
         return self.value
 
+    def process_batch(self, data: np.ndarray, deterministic: bool = False) -> List[X]:  # pylint: disable=unused-argument
+        return [self.value for _ in range(len(data))]
+
     def process_arg(self, arg: X) -> ArrayLike:
         assert arg == self.value, f'{arg} != {self.value}'
         return []
@@ -173,6 +197,15 @@ class Array(utils.Variable[Y]):
         self.transforms: List[Any] = []
         self.shape = tuple(dims)
         self._asfloat = False
+        self._chain: Optional[transforms.Chain] = None  # fused transforms, compiled lazily
+
+    @property
+    def chain(self) -> transforms.Chain:
+        """Fused version of the transforms of the array
+        """
+        if self._chain is None or len(self._chain.transforms) != len(self.transforms):
+            self._chain = transforms.Chain(self.transforms)
+        return self._chain
 
     @property
     def dimension(self) -> int:
@@ -180,21 +213,23 @@ class Array(utils.Variable[Y]):
 
     def process(self, data: ArrayLike, deterministic: bool = False) -> Y:  # pylint: disable=unused-argument
         assert len(data) == self.dimension
-        array = np.array(data, copy=False)
-        for transf in self.transforms:
-            array = transf.forward(array)
+        array = self.chain.forward(data) if self.transforms else np.array(data, copy=False)
         if self._asfloat:
             return float(array[0])
         return array.reshape(self.shape)
 
+    def process_batch(self, data: np.ndarray, deterministic: bool = False) -> List[Y]:  # pylint: disable=unused-argument
+        array = self.chain.forward(data) if self.transforms else np.asarray(data)  # transforms are elementwise
+        if self._asfloat:
+            return array[:, 0].tolist()  # type: ignore
+        return list(array.reshape((-1,) + self.shape))
+
     def process_arg(self, arg: Y) -> np.ndarray:
         if self._asfloat:
             output = np.array([arg])
         else:
             output = np.array(arg, copy=False).ravel()
-        for transf in reversed(self.transforms):
-            output = transf.backward(output)
-        return output
+        return self.chain.backward(output) if self.transforms else output
 
     def _short_repr(self) -> str:
         dims = ",".join(str(d) for d in self.shape)
@@ -202,14 +237,21 @@ class Array(utils.Variable[Y]):
         fl = "" if not self._asfloat else "f"
         return f"A({dims}{transf}){fl}"
 
+    def _check_not_frozen(self) -> None:
+        if self._frozen:
+            raise RuntimeError("Cannot modify the Array since it is frozen (it has been added to an Instrumentation)")
+
     def asfloat(self) -> 'Array':
+        self._check_not_frozen()
         if self.dimension != 1:
             raise RuntimeError("Only Arrays with 1 element can be cast to float")
         self._asfloat = True
         return self
 
     def with_transform(self, transform: transforms.Transform) -> 'Array':
+        self._check_not_frozen()
         self.transforms.append(transform)
+        self._chain = None
         return self
 
     def exponentiated(self, base: float, coeff: float) -> 'Array':
@@ -249,3 +291,166 @@ class Array(utils.Variable[Y]):
             raise ValueError("Only 'tanh' and 'arctan' are allowed as transform")
         Transf = transforms.ArctanBound if transform == "arctan" else transforms.TanhBound
         return self.with_transform(Transf(min_val=min_val, max_val=max_val))
+
+
+class BoundedScalar(utils.Variable[float]):
+    """Scalar variable bounded in [low, high], encoded in a 1-dimensional space.
+
+    Parameters
+    ----------
+    low: float
+        lower bound
+    high: float
+        upper bound
+    transform: str
+        either "arctan" (default, soft approach to the bounds) or "tanh" (reaches
+        the bounds really quickly)
+    """
+
+    def __init__(self, low: float, high: float, transform: str = "arctan") -> None:
+        if transform not in ["tanh", "arctan"]:
+            raise ValueError("Only 'tanh' and 'arctan' are allowed as transform")
+        assert low < high
+        self.low = low
+        self.high = high
+        self.transform = transform
+
+    def _transform(self) -> transforms.Transform:
+        Transf = transforms.ArctanBound if self.transform == "arctan" else transforms.TanhBound
+        return Transf(min_val=self.low, max_val=self.high)
+
+    @property
+    def dimension(self) -> int:
+        return 1
+
+    def process(self, data: ArrayLike, deterministic: bool = False) -> float:  # pylint: disable=unused-argument
+        assert len(data) == 1
+        return float(self._transform().forward(np.asarray(data, dtype=float))[0])
+
+    def process_batch(self, data: np.ndarray, deterministic: bool = False) -> List[float]:  # pylint: disable=unused-argument
+        return self._transform().forward(np.asarray(data, dtype=float)[:, 0]).tolist()  # type: ignore
+
+    def process_arg(self, arg: float) -> ArrayLike:
+        assert self.low <= arg <= self.high, f"{arg} not in [{self.low}, {self.high}]"
+        return self._transform().backward(np.array([arg], dtype=float))
+
+    def _short_repr(self) -> str:
+        return f"BS({self.low},{self.high}|{self.transform})"
+
+
+class Integer(utils.Variable[int]):
+    """Integer variable in [low, high] (both included), deterministically encoded in a
+    1-dimensional space: values are obtained by flooring an arctan-bounded value in [low, high + 1).
+
+    Parameters
+    ----------
+    low: int
+        lowest value
+    high: int
+        highest value
+
+    Note
+    ----
+    Structure-aware discrete mutations (see DiscreteOnePlusOne) draw a new value uniformly among
+    the other integers of the range.
+    """
+
+    def __init__(self, low: int, high: int) -> None:
+        assert low <= high
+        self.low = int(low)
+        self.high = int(high)
+
+    def _transform(self) -> transforms.Transform:
+        return transforms.ArctanBound(self.low, self.high + 1)
+
+    @property
+    def dimension(self) -> int:
+        return 1
+
+    def _indices(self, data: np.ndarray) -> np.ndarray:
+        values = np.floor(self._transform().forward(data))
+        return np.clip(values, self.low, self.high).astype(int)  # type: ignore
+
+    def process(self, data: ArrayLike, deterministic: bool = False) -> int:  # pylint: disable=unused-argument
+        assert len(data) == 1
+        return int(self._indices(np.asarray(data, dtype=float))[0])
+
+    def process_batch(self, data: np.ndarray, deterministic: bool = False) -> List[int]:  # pylint: disable=unused-argument
+        return self._indices(np.asarray(data, dtype=float)[:, 0]).tolist()  # type: ignore
+
+    def process_arg(self, arg: int) -> ArrayLike:
+        assert self.low <= arg <= self.high and arg == int(arg), f"{arg} is not an integer in [{self.low}, {self.high}]"
+        return self._transform().backward(np.array([arg + .5]))  # center of the interval
+
+    def mutate(self, data: ArrayLike) -> np.ndarray:
+        if self.low == self.high:
+            return np.array(data, dtype=float)
+        value = self.low + np.random.randint(self.high - self.low)
+        value += int(value >= self.process(data))  # skip the current value
+        return np.array(self.process_arg(value), dtype=float)
+
+    def _short_repr(self) -> str:
+        return f"I({self.low},{self.high})"
+
+
+class Choice(utils.Variable[X]):
+    """Unordered choice among a list of possible values, with a deterministic encoding.
+
+    Parameters
+    ----------
+    possibilities: list
+        a list of possible values for the variable
+    encoding: str
+        - "onehot-argmax": one dimension per possibility, the chosen one being the argmax
+          (contrarily to SoftmaxCategorical, no sampling is performed)
+        - "ordinal": 1-dimensional encoding of the index of the value (see Integer)
+
+    Note
+    ----
+    Structure-aware discrete mutations (see DiscreteOnePlusOne) draw a new value uniformly among
+    the other possibilities.
+    """
+
+    def __init__(self, possibilities: List[X], encoding: str = "onehot-argmax") -> None:
+        if encoding not in ["onehot-argmax", "ordinal"]:
+            raise ValueError("Only 'onehot-argmax' and 'ordinal' are allowed as encoding")
+        self.possibilities = list(possibilities)
+        self.encoding = encoding
+
+    def _ordinal(self) -> Integer:
+        return Integer(0, len(self.possibilities) - 1)
+
+    @property
+    def dimension(self) -> int:
+        return 1 if self.encoding == "ordinal" else len(self.possibilities)
+
+    def _indices(self, data: np.ndarray) -> List[int]:
+        if self.encoding == "ordinal":
+            return self._ordinal().process_batch(data)
+        return np.argmax(data, axis=1).tolist()  # type: ignore
+
+    def process(self, data: ArrayLike, deterministic: bool = False) -> X:  # pylint: disable=unused-argument
+        assert len(data) == self.dimension
+        return self.possibilities[self._indices(np.asarray(data, dtype=float)[None, :])[0]]
+
+    def process_batch(self, data: np.ndarray, deterministic: bool = False) -> List[X]:  # pylint: disable=unused-argument
+        return [self.possibilities[index] for index in self._indices(np.asarray(data, dtype=float))]
+
+    def process_arg(self, arg: X) -> ArrayLike:
+        assert arg in self.possibilities, f'{arg} not in allowed values: {self.possibilities}'
+        index = self.possibilities.index(arg)
+        if self.encoding == "ordinal":
+            return self._ordinal().process_arg(index)
+        output = np.zeros(len(self.possibilities))
+        output[index] = 1
+        return output
+
+    def mutate(self, data: ArrayLike) -> np.ndarray:
+        if len(self.possibilities) == 1:
+            return np.array(data, dtype=float)
+        index = np.random.randint(len(self.possibilities) - 1)
+        index += int(index >= self._indices(np.asarray(data, dtype=float).reshape(1, -1))[0])  # skip the current value
+        return np.array(self.process_arg(self.possibilities[index]), dtype=float)
+
+    def _short_repr(self) -> str:
+        return "C({}|{})".format(",".join([str(x) for x in self.possibilities]), self.encoding)
@@ -5,6 +5,7 @@
 
 import uuid
 import time
+import functools
 import inspect
 import warnings
 from numbers import Real
@@ -13,6 +14,7 @@ from typing import Optional, Tuple, Callable, Any, Dict, List, Union, Deque, Typ
 import numpy as np
 from ..common.typetools import ArrayLike, JobLike, ExecutorLike
 from .. import instrumentation as instru
+from ..common import tools
 from ..common.tools import Sleeper
 from ..common.decorators import Registry
 from . import utils
@@ -31,18 +33,64 @@ class TellNotAskedNotSupportedError(NotImplementedError):
     """
 
 
+ArgsKwargs = Tuple[Tuple[Any, ...], Dict[str, Any]]
+
+
 class Candidate:
     """Handle for args and kwargs arguments, keeping
     the initial data in memory.
+
+    Parameters
+    ----------
+    args: tuple or None
+        positional arguments (None if they must be computed through the converter)
+    kwargs: dict or None
+        keyword arguments (None if they must be computed through the converter)
+    data: array-like
+        data from the optimization space
+    converter: callable or None
+        function without parameter returning args and kwargs. If provided, they are
+        only computed on first access to args or kwargs, and then cached.
+    dimension: int or None
+        expected size of the data when a converter is provided, checked at initialization
+        (so that errors are not deferred to the first access to args or kwargs)
+
+    Note
+    ----
+    The data of the candidate is a read-only array. It is copied at initialization only if the provided
+    data is writeable, so that optimizers can transfer read-only arrays without copy. Array arguments
+    are then read-only views on this data, and the archive and current bests share its storage.
     """
 
-    def __init__(self, args: Tuple[Any, ...], kwargs: Dict[str, Any], data: ArrayLike):
-        self.args = args
-        self.kwargs = kwargs
-        self.data = np.array(data, copy=False)
+    def __init__(self, args: Optional[Tuple[Any, ...]], kwargs: Optional[Dict[str, Any]], data: ArrayLike,
+                 converter: Optional[Callable[[], ArgsKwargs]] = None, dimension: Optional[int] = None) -> None:
+        assert converter is not None or (args is not None and kwargs is not None), "Missing arguments or converter"
+        self._args = args
+        self._kwargs = kwargs
+        self._converter = converter
+        self.data = tools.readonly(data)
+        if converter is not None and dimension is not None:
+            assert self.data.size == dimension, f"Expected {dimension} values but got {self.data.size}"
         self.uuid = uuid.uuid4().hex
         self._meta: Dict[str, Any] = {}
 
+    def _materialize(self) -> None:
+        if self._converter is not None:
+            self._args, self._kwargs = self._converter()
+            self._converter = None  # release the references held by the converter
+
+    @property
+    def args(self) -> Tuple[Any, ...]:
+        self._materialize()
+        assert self._args is not None
+        return self._args
+
+    @property
+    def kwargs(self) -> Dict[str, Any]:
+        self._materialize()
+        assert self._kwargs is not None
+        return self._kwargs
+
     def __getitem__(self, ind: int) -> None:
         raise RuntimeError('Return type of "ask" is now a Candidate, use candidate.data[ind] '
                            '(rather than candidate[ind]) for the legacy behavior. '
@@ -113,9 +161,29 @@ class CandidateMaker:
         Candidate:
             The corresponding candidate. Candidates have field "args" and "kwargs" which can be directly used
             on the function (objective_function(*candidate.args, **candidate.kwargs)).
+
+        Note
+        ----
+        Arguments are only computed on first access to the "args" or "kwargs" fields of the candidate.
+        For stochastic instrumentations, a seed is drawn at creation so that the sampled arguments do not
+        depend on when they are accessed.
         """
-        args, kwargs = self._instrumentation.data_to_arguments(data, deterministic=deterministic)
-        return Candidate(args, kwargs, data)
+        data = tools.readonly(data)
+        seed: Optional[int] = None
+        if not deterministic and self._instrumentation.stochastic:
+            seed = int(np.random.randint(2**32, dtype=np.uint32))
+        return Candidate(None, None, data, converter=functools.partial(self._convert, data, deterministic, seed),
+                         dimension=self._instrumentation.dimension)  # checked eagerly
+
+    def _convert(self, data: np.ndarray, deterministic: bool, seed: Optional[int]) -> ArgsKwargs:
+        if seed is None:
+            return self._instrumentation.data_to_arguments(data, deterministic=deterministic)
+        state = np.random.get_state()
+        np.random.seed(seed)
+        try:
+            return self._instrumentation.data_to_arguments(data, deterministic=deterministic)
+        finally:
+            np.random.set_state(state)
 
 
 class Optimizer:  # pylint: disable=too-many-instance-attributes
@@ -168,6 +236,8 @@ class Optimizer:  # pylint: disable=too-many-instance-attributes
         # this can be desactivated or modified by each implementation
         self.pruning: Optional[Callable[[utils.Archive[utils.Value]], utils.Archive[utils.Value]]] = None
         self.pruning = utils.Pruning.sensible_default(num_workers=num_workers, dimension=self.instrumentation.dimension)
+        # scheduler of the reevaluations for noisy optimizers (see _choose_reevaluation), updated at each "tell"
+        self._scheduler: Optional[utils.ReevaluationScheduler] = None
         # instance state
         self._asked: Set[str] = set()
         self._num_ask = 0
@@ -198,6 +268,36 @@ class Optimizer:  # pylint: disable=too-many-instance-attributes
         inststr = f'{self.instrumentation:short}'
         return f"Instance of {self.name}(instrumentation={inststr}, budget={self.budget}, num_workers={self.num_workers})"
 
+    def set_archive_storage(self, dtype: str = "float64", scale: Union[float, ArrayLike] = 1. / 32,
+                            max_bytes: Optional[int] = None) -> "Optimizer":
+        """Sets how the archive of evaluated points is stored, in order to limit its memory footprint.
+        This must be called before the first "tell".
+
+        Parameters
+        ----------
+        dtype: str
+            storage type of the points, among "float64" (exact, default), "float32", "float16" and "int8"
+            (see utils.Archive). Points which are equal after conversion share the same archive entry.
+        scale: float or array-like
+            quantization step of each dimension for the "int8" dtype
+        max_bytes: int, optional
+            memory limit of the archive: points are pruned to stay under this limit (see utils.Pruning).
+            This requires the default pruning (utils.Pruning instance) to be active.
+
+        Returns
+        -------
+        Optimizer
+            the optimizer itself
+        """
+        if self.archive.bytesdict:
+            raise RuntimeError("Archive storage must be set before the first tell")
+        if max_bytes is not None and not isinstance(self.pruning, utils.Pruning):
+            raise RuntimeError("max_bytes requires the pruning attribute to be a utils.Pruning instance")
+        self.archive = utils.Archive[utils.Value](dtype=dtype, scale=scale)
+        if isinstance(self.pruning, utils.Pruning):
+            self.pruning.max_bytes = max_bytes
+        return self
+
     def register_callback(self, name: str, callback: _OptimCallBack) -> None:
         """Add a callback method called either when "tell" or "ask" are called, with the same
         arguments (including the optimizer / self). This can be useful for custom logging.
@@ -257,19 +357,25 @@ class Optimizer:  # pylint: disable=too-many-instance-attributes
             self.archive[x] = utils.Value(value)  # better not to stock the position as a Point (memory)
         else:
             self.archive[x].add_evaluation(value)
+        if self._scheduler is not None:
+            self._scheduler.update(self.archive._tobytes(x), self.archive[x])
         # update current best records
         # this may have to be improved if we want to keep more kinds of best values
         for name in ["optimistic", "pessimistic", "average"]:
             if np.array_equal(x, self.current_bests[name].x):   # reboot
-                y: bytes = min(self.archive.bytesdict, key=lambda z, n=name: self.archive.bytesdict[z].get_estimation(n))  # type: ignore
+                keys = list(self.archive.bytesdict)
+                estimations = utils.get_estimations(self.archive.bytesdict.values(), name)
+                y = keys[int(np.argmin(np.where(np.isnan(estimations), np.inf, estimations)))]
                 # rebuild best point may change, and which value did not track the updated value anyway
-                self.current_bests[name] = utils.Point(np.frombuffer(y), self.archive.bytesdict[y])
+                self.current_bests[name] = utils.Point(self.archive.key_to_array(y), self.archive.bytesdict[y])
             else:
                 if self.archive[x].get_estimation(name) <= self.current_bests[name].get_estimation(name):
                     self.current_bests[name] = utils.Point(x, self.archive[x])
                 if not (np.isnan(value) or value == np.inf):
                     assert self.current_bests[name].x in self.archive, "Best value should exist in the archive"
-        if self.pruning is not None:
+        if isinstance(self.pruning, utils.Pruning):
+            self.archive = self.pruning.add(self.archive, x)  # incremental pruning
+        elif self.pruning is not None:
             self.archive = self.pruning(self.archive)
 
     def ask(self) -> Candidate:
@@ -340,10 +446,22 @@ class Optimizer:  # pylint: disable=too-many-instance-attributes
     def _internal_provide_recommendation(self) -> ArrayLike:
         return self.current_bests["pessimistic"].x
 
+    def _choose_reevaluation(self, rule: str) -> Optional[np.ndarray]:
+        """Returns the point of the archive to reevaluate according to the rule ("racing" or "ucb",
+        see utils.ReevaluationScheduler), or None if no point needs to be reevaluated.
+        The scheduler is created on the first call, and then updated at each "tell".
+        """
+        if self._scheduler is None:
+            self._scheduler = utils.ReevaluationScheduler(rule=rule)
+            for key, value in self.archive.bytesdict.items():
+                self._scheduler.update(key, value)
+        return self._scheduler.choose(self.archive, self.current_bests["pessimistic"])
+
     def optimize(self, objective_function: Callable[..., float],
                  executor: Optional[ExecutorLike] = None,
                  batch_mode: bool = False,
-                 verbosity: int = 0) -> Candidate:
+                 verbosity: int = 0,
+                 cache: Optional[utils.EvaluationCache] = None) -> Candidate:
         """Optimization (minimization) procedure
 
         Parameters
@@ -361,6 +479,10 @@ class Optimizer:  # pylint: disable=too-many-instance-attributes
             another one)
         verbosity: int
             print information about the optimization (0: None, 1: fitness values, 2: fitness values and recommendation)
+        cache: EvaluationCache, optional
+            cache of the values of the objective function (for deterministic functions only). Candidates with
+            already evaluated args and kwargs are answered from the cache without submitting them to the executor
+            (they still count in the budget).
         callback: callable
             callable called on the optimizer (self) at the end of each iteration (for user specific logging, etc)
 
@@ -399,6 +521,8 @@ class Optimizer:  # pylint: disable=too-many-instance-attributes
                     sleeper.stop_timer()
                 while self._finished_jobs:
                     x, job = self._finished_jobs[0]
+                    if cache is not None and not isinstance(job, utils.FinishedJob):
+                        cache[cache.get_key(x)] = job.result()
                     self.tell(x, job.result())
                     self._finished_jobs.popleft()  # remove it after the tell to make sure it was indeed "told" (in case of interruption)
                     if verbosity:
@@ -414,9 +538,16 @@ class Optimizer:  # pylint: disable=too-many-instance-attributes
                 new_sugg = min(remaining_budget, self.num_workers - len(self._running_jobs))
                 if verbosity and new_sugg:
                     print(f"Launching {new_sugg} jobs with new suggestions")
+                busy_workers = {x._meta.get("worker_id") for x, _ in self._running_jobs}
+                free_workers = (k for k in range(self.num_workers) if k not in busy_workers)
                 for _ in range(new_sugg):
                     args = self.ask()
-                    self._running_jobs.append((args, executor.submit(objective_function, *args.args, **args.kwargs)))
+                    args._meta["worker_id"] = next(free_workers)
+                    cached = None if cache is None else cache.get(cache.get_key(args))
+                    if cached is not None:
+                        self._running_jobs.append((args, utils.FinishedJob(cached)))
+                    else:
+                        self._running_jobs.append((args, executor.submit(objective_function, *args.args, **args.kwargs)))
                 if new_sugg:
                     sleeper.start_timer()
             remaining_budget = self.budget - self.num_ask
@@ -71,6 +71,13 @@ class _DE(base.Optimizer):
         return sum([g.position for g in good_guys]) / len(good_guys)  # type: ignore
 
     def _internal_ask_candidate(self) -> base.Candidate:
+        reevaluation = self._parameters.reevaluation
+        if reevaluation is not None and self._num_ask <= .05 * len(self.archive) ** 3:
+            x = self._choose_reevaluation(reevaluation)
+            if x is not None:
+                candidate = self.create_candidate.from_data(x)
+                candidate._meta["reevaluation"] = True  # does not modify the population
+                return candidate
         init = self._parameters.initialization
         if self.sampler is None and init is not None:
             assert init in ["LHS", "QR"]
@@ -153,6 +160,8 @@ class _DE(base.Optimizer):
         return candidate
 
     def _internal_tell_candidate(self, candidate: base.Candidate, value: float) -> None:
+        if candidate._meta.get("reevaluation", False):
+            return  # the statistics of the point are updated in the archive
         particle: DEParticle = candidate._meta["particle"]  # all asked candidate should have this field
         if not particle.active:
             self._internal_tell_not_asked(candidate, value)
@@ -181,7 +190,7 @@ class DifferentialEvolution(base.ParametrizedFamily):
     def __init__(self, *, initialization: Optional[str] = None, por_DE: bool = False, scale: Union[str, float] = 1.,
                  inoculation: bool = False, hyperinoc: bool = False, recommendation: str = "optimistic", NF: bool = True,
                  CR: Union[str, float] = .5, F1: float = .8, F2: float = .8, crossover: int = 0, popsize: str = "standard",
-                 hashed: bool = False) -> None:
+                 hashed: bool = False, reevaluation: Optional[str] = None) -> None:
         """Differential evolution algorithms.
 
         Default pop size is 30
@@ -218,6 +227,9 @@ class DifferentialEvolution(base.ParametrizedFamily):
             TODO
         hashed: bool
             TODO
+        reevaluation: "racing", "ucb" or None
+            if provided, points of the archive are regularly reevaluated (for noisy functions), as chosen by
+            a scheduler with this rule (see utils.ReevaluationScheduler). Reevaluations do not modify the population.
         """
         # initial checks
         assert recommendation in ["optimistic", "pessimistic", "noisy", "mean"]
@@ -226,6 +238,7 @@ class DifferentialEvolution(base.ParametrizedFamily):
         assert isinstance(scale, float) or scale == "mini"
         assert popsize in ["large", "dimension", "standard"]
         assert isinstance(CR, float) or CR == "dimension"
+        assert reevaluation in [None, "racing", "ucb"], f"Unknown reevaluation: '{reevaluation}'"
         self.initialization = initialization
         self.por_DE = por_DE
         self.scale = scale
@@ -240,6 +253,7 @@ class DifferentialEvolution(base.ParametrizedFamily):
         self.popsize = popsize
         self.NF = NF
         self.hashed = hashed
+        self.reevaluation = reevaluation
         super().__init__()
 
 
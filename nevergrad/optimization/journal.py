@@ -0,0 +1,177 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import os
+import time
+from pathlib import Path
+from typing import Any, Optional, Union, IO
+import numpy as np
+import pandas as pd
+from ..common.typetools import ArrayLike
+from . import utils
+
+
+_MAGIC = b"NGJRNL01"
+_HEADER_SIZE = 32  # magic (8 bytes), dimension (int64), reserved
+
+
+def record_dtype(dimension: int) -> np.dtype:
+    """Fixed-size record of the journal for a given dimension
+    """
+    return np.dtype([("data", "<f8", (dimension,)), ("value", "<f8"), ("timestamp", "<f8"),
+                     ("worker_id", "<i8"), ("uuid", "S32")])
+
+
+def _read_header(filepath: Path) -> int:
+    with filepath.open("rb") as f:
+        header = f.read(_HEADER_SIZE)
+    if len(header) < _HEADER_SIZE or header[:8] != _MAGIC:
+        raise ValueError(f"{filepath} is not a valid journal file")
+    return int(np.frombuffer(header[8:16], dtype="<i8")[0])
+
+
+class Journal:
+    """Append-only binary journal of the evaluations, with fixed-size records
+    holding the data, value, timestamp, worker id and uuid of the candidate.
+    It can be registered as a "tell" callback of an optimizer:
+    optimizer.register_callback("tell", journal)
+
+    Parameters
+    ----------
+    filepath: str or Path
+        path of the journal file. If it already exists, records are appended to it
+        (a truncated trailing record, for instance because of a crash, is discarded).
+    dimension: int
+        dimension of the data
+    buffer_size: int
+        number of records buffered in memory before being written to the file
+    fsync_interval: float
+        minimum number of seconds between two fsync of the file (0 for a fsync at each write).
+        Records are always synced when closing the journal.
+
+    Note
+    ----
+    Use Journal.read to access the records through a memory map, and
+    Journal.to_archive or Journal.to_dataframe to reconstruct the history.
+    """
+
+    def __init__(self, filepath: Union[str, Path], dimension: int, buffer_size: int = 128, fsync_interval: float = 1.) -> None:
+        self.filepath = Path(filepath)
+        self.dimension = dimension
+        self.fsync_interval = fsync_interval
+        self._dtype = record_dtype(dimension)
+        self._buffer = np.zeros(max(1, buffer_size), dtype=self._dtype)
+        self._num_buffered = 0
+        self._last_fsync = time.time()
+        self._file: IO[bytes]
+        if self.filepath.exists() and self.filepath.stat().st_size:
+            file_dimension = _read_header(self.filepath)
+            if file_dimension != dimension:
+                raise ValueError(f"Journal {self.filepath} has dimension {file_dimension} instead of {dimension}")
+            size = self.filepath.stat().st_size
+            valid_size = size - (size - _HEADER_SIZE) % self._dtype.itemsize
+            self._file = self.filepath.open("r+b")
+            self._file.truncate(valid_size)
+            self._file.seek(valid_size)
+        else:
+            self._file = self.filepath.open("wb")
+            header = _MAGIC + np.array([dimension], dtype="<i8").tobytes()
+            self._file.write(header.ljust(_HEADER_SIZE, b"\x00"))
+            self._sync()
+
+    def append(self, data: ArrayLike, value: float, uuid: str = "", worker_id: int = -1, timestamp: Optional[float] = None) -> None:
+        """Appends a record to the journal
+        """
+        record = self._buffer[self._num_buffered]
+        record["data"] = data
+        record["value"] = value
+        record["timestamp"] = time.time() if timestamp is None else timestamp
+        record["worker_id"] = worker_id
+        record["uuid"] = uuid.encode()
+        self._num_buffered += 1
+        if self._num_buffered == self._buffer.size:
+            self.flush()
+
+    def __call__(self, optimizer: Any, candidate: Any, value: float) -> None:
+        self.append(candidate.data, value, uuid=candidate.uuid, worker_id=candidate._meta.get("worker_id", -1))
+
+    def flush(self, fsync: bool = False) -> None:
+        """Writes the buffered records to the file, and syncs it if fsync is True
+        or if the last sync is older than fsync_interval
+        """
+        if self._num_buffered:
+            self._file.write(self._buffer[:self._num_buffered].tobytes())
+            self._num_buffered = 0
+            if fsync or time.time() - self._last_fsync >= self.fsync_interval:
+                self._sync()
+            else:
+                self._file.flush()
+        elif fsync:
+            self._sync()
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_fsync = time.time()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.flush(fsync=True)
+            self._file.close()
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        if hasattr(self, "_file"):
+            self.close()
+
+    @staticmethod
+    def read(filepath: Union[str, Path]) -> np.ndarray:
+        """Memory-maps the records of a journal file (read-only).
+        A truncated trailing record is ignored.
+        """
+        filepath = Path(filepath)
+        dtype = record_dtype(_read_header(filepath))
+        num = (filepath.stat().st_size - _HEADER_SIZE) // dtype.itemsize
+        if not num:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(str(filepath), dtype=dtype, mode="r", offset=_HEADER_SIZE, shape=(num,))
+
+    @classmethod
+    def to_archive(cls, filepath: Union[str, Path]) -> utils.Archive[utils.Value]:
+        """Reconstructs the archive of all the evaluations recorded in a journal file
+        """
+        records = cls.read(filepath)
+        archive = utils.Archive[utils.Value]()
+        if not records.size:
+            return archive
+        blob = np.ascontiguousarray(records["data"], dtype=float).tobytes()
+        size = 8 * records["data"].shape[1]
+        bytesdict = archive.bytesdict
+        for k, value in enumerate(records["value"].tolist()):
+            key = blob[k * size: (k + 1) * size]
+            current = bytesdict.get(key)
+            if current is None:
+                bytesdict[key] = utils.Value(value)
+            else:
+                current.add_evaluation(value)
+        return archive
+
+    @classmethod
+    def to_dataframe(cls, filepath: Union[str, Path]) -> pd.DataFrame:
+        """Dataframe of the records of a journal file, with one column per coordinate of the data
+        ("x0", "x1", etc...) and columns "value", "timestamp", "worker_id" and "uuid"
+        """
+        records = cls.read(filepath)
+        data = np.array(records["data"], dtype=float)
+        df = pd.DataFrame(data, columns=[f"x{k}" for k in range(data.shape[1])])
+        for name in ["value", "timestamp", "worker_id"]:
+            df[name] = np.array(records[name])
+        df["uuid"] = np.char.decode(np.array(records["uuid"]), "ascii")
+        return df
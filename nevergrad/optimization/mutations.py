@@ -3,9 +3,10 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
-from typing import Optional, Any
+from typing import Optional, Any, Sequence
 import numpy as np
 from ..common.typetools import ArrayLike
+from ..instrumentation.utils import Variable
 from . import utils
 
 
@@ -61,6 +62,36 @@ def discrete_mutation(parent: ArrayLike) -> ArrayLike:
     return [s if b else np.random.normal(0., 1.) for (b, s) in zip(boolean_vector, parent)]
 
 
+def structured_discrete_mutation(parent: ArrayLike, variables: Sequence[Variable[Any]]) -> ArrayLike:
+    """Discrete mutation in the native domain of the variables (for instance, a new value
+    for Integer and Choice variables instead of resampling their Gaussian encoding).
+    Each variable is mutated with probability 1 / number of variables (at least one variable is mutated)
+    through its "mutate" method.
+
+    Parameters
+    ----------
+    parent: array-like
+        the point to mutate
+    variables: list
+        the variables of the instrumentation, in the order of their data
+    """
+    output = np.array(parent, dtype=float)
+    slices = []
+    start = 0
+    for variable in variables:
+        if variable.dimension:
+            slices.append((variable, start, start + variable.dimension))
+        start += variable.dimension
+    assert start == output.size, f"Expected {start} values but got {output.size}"
+    mutated = np.random.rand(len(slices)) < 1. / len(slices)
+    while not mutated.any():
+        mutated = np.random.rand(len(slices)) < 1. / len(slices)
+    for (variable, start, end), mutate in zip(slices, mutated):
+        if mutate:
+            output[start: end] = variable.mutate(output[start: end])
+    return output
+
+
 def crossover(parent: ArrayLike, donor: ArrayLike) -> ArrayLike:
     mix = [np.random.choice([d, p]) for (p, d) in zip(parent, donor)]
     return discrete_mutation(mix)
@@ -76,4 +107,4 @@ def get_roulette(archive: utils.Archive[utils.Value], num: Optional[int] = None)
     my_keys_indices = np.random.choice(len(my_keys), size=min(num, len(my_keys)), replace=False)
     my_keys = [my_keys[i] for i in my_keys_indices]
     # best pessimistic value in a random set of keys
-    return np.frombuffer(min(my_keys, key=lambda x: archive.bytesdict[x].pessimistic_confidence_bound))
+    return archive.key_to_array(min(my_keys, key=lambda x: archive.bytesdict[x].pessimistic_confidence_bound))
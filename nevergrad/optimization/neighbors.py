@@ -0,0 +1,243 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import sys
+from typing import Dict, List, Tuple
+import numpy as np
+from scipy import spatial
+from ..common.typetools import ArrayLike
+
+
+class NeighborIndex:
+    """Base class for incremental spatial indices of points identified by a bytes key
+    (such as the keys of an Archive bytesdict). Removal of points is lazy, and the
+    index is compacted when there are more removed than alive points.
+
+    Parameters
+    ----------
+    dimension: int
+        dimension of the points
+    """
+
+    def __init__(self, dimension: int) -> None:
+        self.dimension = dimension
+        self._points = np.zeros((16, dimension))
+        self._mask = np.zeros(16, dtype=bool)  # whether each id is alive
+        self._keys: List[bytes] = []  # key of each id
+        self._alive: Dict[bytes, int] = {}  # current id of each key
+
+    def __len__(self) -> int:
+        return len(self._alive)
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._alive
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the points, the mask and the key bookkeeping of the index
+        (keys are shared with the archive, and the structures specific to each subclass are not counted)
+        """
+        nbytes = self._points.nbytes + self._mask.nbytes + sys.getsizeof(self._keys) + sys.getsizeof(self._alive)
+        return nbytes + len(self._alive) * sys.getsizeof(len(self._keys))  # type: ignore
+
+    def add(self, key: bytes, x: ArrayLike) -> None:
+        """Adds (or moves) the point identified by the key
+        """
+        index = len(self._keys)
+        if index == self._points.shape[0]:
+            self._points = np.concatenate([self._points, np.zeros_like(self._points)], axis=0)
+            self._mask = np.concatenate([self._mask, np.zeros_like(self._mask)])
+        if key in self._alive:
+            self._mask[self._alive[key]] = False
+        self._points[index] = x
+        self._mask[index] = True
+        self._keys.append(key)
+        self._alive[key] = index
+        self._insert(index)
+
+    def remove(self, key: bytes) -> None:
+        """Removes the point identified by the key
+        """
+        self._mask[self._alive.pop(key)] = False
+        if len(self._keys) > 64 and len(self._keys) > 2 * len(self._alive):
+            self._compact()
+
+    def _compact(self) -> None:
+        keys = list(self._alive)
+        points = self._points[[self._alive[k] for k in keys]]
+        self._points = np.zeros((max(16, 2 * len(keys)), self.dimension))
+        self._mask = np.zeros(self._points.shape[0], dtype=bool)
+        self._keys = []
+        self._alive = {}
+        self._reset()
+        for key, x in zip(keys, points):
+            self.add(key, x)
+
+    def nearest(self, x: ArrayLike, k: int = 1) -> Tuple[np.ndarray, List[bytes]]:
+        """Returns the distances and keys of the k nearest neighbors of x, sorted by increasing distance
+        """
+        x = np.asarray(x, dtype=float)
+        indices = self._nearest_candidates(x, min(k, len(self)))
+        return self._sorted(x, indices, k=k)
+
+    def within(self, x: ArrayLike, radius: float) -> Tuple[np.ndarray, List[bytes]]:
+        """Returns the distances and keys of the neighbors of x at a distance below the radius,
+        sorted by increasing distance
+        """
+        x = np.asarray(x, dtype=float)
+        distances, keys = self._sorted(x, self._within_candidates(x, radius))
+        num = int(np.searchsorted(distances, radius, side="right"))
+        return distances[:num], keys[:num]
+
+    def _sorted(self, x: np.ndarray, indices: ArrayLike, k: int = -1) -> Tuple[np.ndarray, List[bytes]]:
+        ids: np.ndarray = np.unique(np.asarray(indices, dtype=np.int64))
+        ids = ids[self._mask[ids]]
+        distances = np.sqrt(np.sum((self._points[ids] - x)**2, axis=1))
+        order = np.argsort(distances, kind="mergesort")
+        if k >= 0:
+            order = order[:k]
+        return distances[order], [self._keys[ids[i]] for i in order]
+
+    def _reset(self) -> None:
+        raise NotImplementedError
+
+    def _insert(self, index: int) -> None:
+        raise NotImplementedError
+
+    def _nearest_candidates(self, x: np.ndarray, k: int) -> ArrayLike:
+        raise NotImplementedError
+
+    def _within_candidates(self, x: np.ndarray, radius: float) -> ArrayLike:
+        raise NotImplementedError
+
+
+class KDTreeIndex(NeighborIndex):
+    """Exact index for low dimensions, using a logarithmic number of static KD-trees of doubling sizes
+    and a small buffer of the latest points, so that insertions cost O(log(n)^2) amortized,
+    and queries O(log(n)^2) as well.
+
+    Parameters
+    ----------
+    dimension: int
+        dimension of the points
+    buffer_size: int
+        number of points in the buffer (searched exhaustively) before they are moved to a KD-tree.
+    """
+
+    def __init__(self, dimension: int, buffer_size: int = 32) -> None:
+        super().__init__(dimension)
+        self.buffer_size = buffer_size
+        self._buffer: List[int] = []
+        self._trees: List[Tuple[spatial.cKDTree, np.ndarray]] = []  # tree and ids, by decreasing size
+        self._reset()
+
+    def _reset(self) -> None:
+        self._buffer = []
+        self._trees = []
+
+    def _insert(self, index: int) -> None:
+        self._buffer.append(index)
+        if len(self._buffer) < self.buffer_size:
+            return
+        ids = np.array(self._buffer, dtype=int)
+        ids = ids[self._mask[ids]]
+        self._buffer = []
+        while self._trees and self._trees[-1][1].size <= ids.size:
+            _, tree_ids = self._trees.pop()
+            ids = np.concatenate([tree_ids[self._mask[tree_ids]], ids])
+        if ids.size:
+            self._trees.append((spatial.cKDTree(self._points[ids]), ids))
+
+    def _nearest_candidates(self, x: np.ndarray, k: int) -> ArrayLike:
+        candidates = [np.array(self._buffer, dtype=int)]
+        if k <= 0:
+            return candidates[0]
+        for tree, ids in self._trees:
+            num = min(k, ids.size)
+            while True:
+                _, found = tree.query(x, k=num)
+                found = ids[np.atleast_1d(found)]
+                if np.sum(self._mask[found]) >= k or num == ids.size:
+                    break
+                num = min(2 * num, ids.size)  # removed points were found, look further
+            candidates.append(found)
+        return np.concatenate(candidates)
+
+    def _within_candidates(self, x: np.ndarray, radius: float) -> ArrayLike:
+        candidates = [np.array(self._buffer, dtype=int)]
+        for tree, ids in self._trees:
+            candidates.append(ids[np.array(tree.query_ball_point(x, radius), dtype=int)])
+        return np.concatenate(candidates)
+
+
+class RandomProjectionIndex(NeighborIndex):
+    """Approximate index for high dimensions, using locality sensitive hashing with
+    quantized random projections (several hash tables of several projections each).
+    Points sharing a bucket with the query in any table are used as candidates, and
+    exhaustive search is used when there are not enough of them for a nearest neighbors query.
+
+    Parameters
+    ----------
+    dimension: int
+        dimension of the points
+    num_tables: int
+        number of hash tables
+    num_projections: int
+        number of projections concatenated in the hash of each table
+    bucket_width: float
+        quantization width of the projections
+    """
+
+    def __init__(self, dimension: int, num_tables: int = 8, num_projections: int = 4, bucket_width: float = 2.) -> None:
+        super().__init__(dimension)
+        self.bucket_width = bucket_width
+        self._projections = np.random.normal(size=(num_tables, num_projections, dimension))
+        self._offsets = np.random.uniform(0, bucket_width, size=(num_tables, num_projections))
+        self._tables: List[Dict[bytes, List[int]]] = []
+        self._reset()
+
+    def _reset(self) -> None:
+        self._tables = [{} for _ in range(self._projections.shape[0])]
+
+    def _hashes(self, x: np.ndarray) -> np.ndarray:
+        return np.floor((self._projections.dot(x) + self._offsets) / self.bucket_width).astype(np.int64)  # type: ignore
+
+    def _insert(self, index: int) -> None:
+        for table, code in zip(self._tables, self._hashes(self._points[index])):
+            table.setdefault(code.tobytes(), []).append(index)
+
+    def _bucket_candidates(self, x: np.ndarray) -> np.ndarray:
+        candidates: List[int] = []
+        for table, code in zip(self._tables, self._hashes(x)):
+            candidates.extend(table.get(code.tobytes(), []))
+        return np.unique(np.array(candidates, dtype=int))
+
+    def _nearest_candidates(self, x: np.ndarray, k: int) -> ArrayLike:
+        candidates = self._bucket_candidates(x)
+        if np.sum(self._mask[candidates]) < k:
+            return np.where(self._mask)[0]  # exhaustive search
+        return candidates
+
+    def _within_candidates(self, x: np.ndarray, radius: float) -> ArrayLike:
+        return self._bucket_candidates(x)
+
+
+def make_index(dimension: int, kind: str = "auto") -> NeighborIndex:
+    """Creates a neighbor index
+
+    Parameters
+    ----------
+    dimension: int
+        dimension of the points
+    kind: str
+        "kdtree" (exact), "lsh" (approximate) or "auto" (kdtree up to dimension 20, lsh above)
+    """
+    if kind == "auto":
+        kind = "kdtree" if dimension <= 20 else "lsh"
+    if kind == "kdtree":
+        return KDTreeIndex(dimension)
+    if kind == "lsh":
+        return RandomProjectionIndex(dimension)
+    raise ValueError(f"Unknown index kind {kind}")
@@ -3,19 +3,21 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
-from typing import Optional, List, Dict, Tuple, Deque, Union, Callable
-from collections import defaultdict, deque
+from typing import Optional, List, Dict, Tuple, Deque, Union, Callable, Sequence, Any
+from collections import deque
+from concurrent import futures
 import cma
 import numpy as np
-from bayes_opt import UtilityFunction
-from bayes_opt import BayesianOptimization
 from ..instrumentation import transforms
 from ..instrumentation import Instrumentation
+from ..instrumentation import variables as ivar
+from ..instrumentation.utils import Variable
 from . import utils
 from . import base
 from . import mutations
 from .base import registry
 from . import sequences
+from . import surrogates
 # families of optimizers
 # pylint: disable=unused-wildcard-import,wildcard-import, too-many-lines
 from .differentialevolution import *
@@ -44,6 +46,8 @@ class _OnePlusOne(base.Optimizer):
             "doublefastga": mutations.doubledoerr_discrete_mutation,
             "portfolio": mutations.portfolio_discrete_mutation}
         self._sigma: float = 1
+        # discrete mutations are performed in the native domain of the variables if some of them have a specific mutation
+        self._structured = any(type(var).mutate is not Variable.mutate for var in self.instrumentation.instruments)
 
     def _internal_ask(self) -> base.ArrayLike:
         # pylint: disable=too-many-return-statements, too-many-branches
@@ -55,9 +59,12 @@ class _OnePlusOne(base.Optimizer):
             limit = (.05 if isinstance(noise_handling, str) else noise_handling[1]) * len(self.archive) ** 3
             strategy = noise_handling if isinstance(noise_handling, str) else noise_handling[0]
             if self._num_ask <= limit:
-                if strategy in ["cubic", "random"]:
-                    idx = np.random.choice(len(self.archive))
-                    return np.frombuffer(list(self.archive.bytesdict.keys())[idx])  # type: ignore
+                if self._parameters.reevaluation is not None:
+                    x = self._choose_reevaluation(self._parameters.reevaluation)
+                    if x is not None:
+                        return x
+                elif strategy in ["cubic", "random"]:
+                    return self.archive.sample()
                 elif strategy == "optimistic":
                     return self.current_bests["optimistic"].x
         # crossover
@@ -76,12 +83,16 @@ class _OnePlusOne(base.Optimizer):
             else:
                 return mutations.crossover(self.current_bests["pessimistic"].x,
                                            mutations.get_roulette(self.archive, num=2))
+        elif mutation == "discrete" and self._structured:
+            return mutations.structured_discrete_mutation(self.current_bests["pessimistic"].x, self.instrumentation.instruments)
         else:
             return self._mutations[mutation](self.current_bests["pessimistic"].x)
 
     def _internal_tell(self, x: base.ArrayLike, value: float) -> None:
-        # only used for cauchy and gaussian
-        self._sigma *= 2. if value <= self.current_bests["pessimistic"].mean else .84
+        archived = None if self._scheduler is None else self.archive.bytesdict.get(self.archive._tobytes(x))
+        # only used for cauchy and gaussian (and not for reevaluations chosen by the scheduler)
+        if archived is None or archived.count == 1:
+            self._sigma *= 2. if value <= self.current_bests["pessimistic"].mean else .84
 
 
 class ParametrizedOnePlusOne(base.ParametrizedFamily):
@@ -96,12 +107,20 @@ class ParametrizedOnePlusOne(base.ParametrizedFamily):
         is reevaluated regularly) or "optimistic" (the best optimistic point is reevaluated
         regularly, optimism in front of uncertainty). A coefficient can also be provided
         to tune the regularity of these reevaluations (default .05)
+    reevaluation: str or None
+        if provided, the reevaluated points are chosen by a scheduler instead of the noise_handling strategy
+        (which then only sets the regularity of the reevaluations): "racing" (the least evaluated point among
+        those which may be better than the best one is reevaluated) or "ucb" (the point with the
+        lowest lower confidence bound is reevaluated), see utils.ReevaluationScheduler.
+        No point is reevaluated when the scheduler finds none worth it.
     mutation: str
         One of the available mutations from:
         - "gaussian": standard mutation by adding a Gaussian random variable (with progressive
         widening) to the best pessimistic point
         - "cauchy": same as Gaussian but with a Cauchy distribution.
-        - "discrete": TODO
+        - "discrete": mutation of a random subset of the coordinates (resampled from a standard normal distribution),
+        or of the variables in their native domain (e.g. a new value for Integer or Choice variables) for
+        instrumentations which are not a plain array
         - "fastga": FastGA mutations from the current best
         - "doublefastga": double-FastGA mutations from the current best (Doerr et al, Fast Genetic Algorithms, 2017)
         - "portfolio": Random number of mutated bits (called niform mixing in
@@ -119,7 +138,7 @@ class ParametrizedOnePlusOne(base.ParametrizedFamily):
     _optimizer_class = _OnePlusOne
 
     def __init__(self, *, noise_handling: Optional[Union[str, Tuple[str, float]]] = None,
-                 mutation: str = "gaussian", crossover: bool = False) -> None:
+                 mutation: str = "gaussian", crossover: bool = False, reevaluation: Optional[str] = None) -> None:
         if noise_handling is not None:
             if isinstance(noise_handling, str):
                 assert noise_handling in ["random", "optimistic"], f"Unkwnown noise handling: '{noise_handling}'"
@@ -128,7 +147,10 @@ class ParametrizedOnePlusOne(base.ParametrizedFamily):
                 assert noise_handling[1] > 0., "the factor must be a float greater than 0"
                 assert noise_handling[0] in ["random", "optimistic"], f"Unkwnown noise handling: '{noise_handling}'"
         assert mutation in ["gaussian", "cauchy", "discrete", "fastga", "doublefastga", "portfolio"], f"Unkwnown mutation: '{mutation}'"
+        assert reevaluation in [None, "racing", "ucb"], f"Unknown reevaluation: '{reevaluation}'"
+        assert reevaluation is None or noise_handling is not None, "reevaluation requires a noise_handling"
         self.noise_handling = noise_handling
+        self.reevaluation = reevaluation
         self.mutation = mutation
         self.crossover = crossover
         super().__init__()
@@ -137,6 +159,9 @@ class ParametrizedOnePlusOne(base.ParametrizedFamily):
 OnePlusOne = ParametrizedOnePlusOne().with_name("OnePlusOne", register=True)
 NoisyOnePlusOne = ParametrizedOnePlusOne(noise_handling="random").with_name("NoisyOnePlusOne", register=True)
 OptimisticNoisyOnePlusOne = ParametrizedOnePlusOne(noise_handling="optimistic").with_name("OptimisticNoisyOnePlusOne", register=True)
+RacingNoisyOnePlusOne = ParametrizedOnePlusOne(noise_handling="random",
+                                               reevaluation="racing").with_name("RacingNoisyOnePlusOne", register=True)
+UCBNoisyOnePlusOne = ParametrizedOnePlusOne(noise_handling="random", reevaluation="ucb").with_name("UCBNoisyOnePlusOne", register=True)
 DiscreteOnePlusOne = ParametrizedOnePlusOne(mutation="discrete").with_name("DiscreteOnePlusOne", register=True)
 OptimisticDiscreteOnePlusOne = ParametrizedOnePlusOne(
     noise_handling="optimistic", mutation="discrete").with_name("OptimisticDiscreteOnePlusOne", register=True)
@@ -530,15 +555,27 @@ class NoisyBandit(base.Optimizer):
 
     This is upper confidence bound (adapted to minimization),
       with very poor parametrization; in particular, the logarithmic term is set to zero.
-    Infinite arms: we add one arm when #trials >= #arms ** 3."""
+    Infinite arms: we add one arm when #trials >= #arms ** 3.
+
+    The reevaluation keyword argument ("racing" or "ucb", default None) can be used to choose
+    the reevaluated arms through a scheduler (see utils.ReevaluationScheduler) instead of
+    randomly or optimistically. A new arm is then added when the scheduler finds no arm worth reevaluating.
+    """
+
+    def __init__(self, instrumentation: Union[int, Instrumentation], budget: Optional[int] = None, num_workers: int = 1,
+                 *, reevaluation: Optional[str] = None) -> None:
+        super().__init__(instrumentation, budget=budget, num_workers=num_workers)
+        assert reevaluation in [None, "racing", "ucb"], f"Unknown reevaluation: '{reevaluation}'"
+        self.reevaluation = reevaluation
 
     def _internal_ask(self) -> base.ArrayLike:
         if 20 * self._num_ask >= len(self.archive) ** 3:
             return np.random.normal(0, 1, self.dimension)  # type: ignore
+        if self.reevaluation is not None:
+            x = self._choose_reevaluation(self.reevaluation)
+            return np.random.normal(0, 1, self.dimension) if x is None else x  # type: ignore
         if np.random.choice([True, False]):
-            # numpy does not accept choice on list of tuples, must choose index instead
-            idx = np.random.choice(len(self.archive))
-            return np.frombuffer(list(self.archive.bytesdict.keys())[idx])  # type: ignore
+            return self.archive.sample()
         return self.current_bests["optimistic"].x
 
 
@@ -734,25 +771,142 @@ class Portfolio(base.Optimizer):
                        ScrHammersleySearch(instrumentation, budget // 3, num_workers)]
         if budget < 12 * num_workers:
             self.optims = [ScrHammersleySearch(instrumentation, budget, num_workers)]
-        self.who_asked: Dict[Tuple[float, ...], List[int]] = defaultdict(list)
+        self._init_dispatch()
+
+    def _init_dispatch(self) -> None:
+        """Initializes the bookkeeping of the dispatching of the asks and tells to the sub-optimizers
+        """
+        self.who_asked: Dict[str, int] = {}  # uuid of the candidate -> index of the sub-optimizer which provided it
+        # member threads (see enable_member_threads)
+        self._member_threads = False
+        self._prefetch = False
+        self._executors: Dict[int, futures.ThreadPoolExecutor] = {}
+        self._tell_jobs: Dict[int, List[futures.Future]] = {}
+        self._prefetched: Dict[int, futures.Future] = {}
+
+    def enable_member_threads(self, prefetch: bool = True) -> "Portfolio":
+        """Runs the tells of each sub-optimizer in a dedicated thread, so that the expensive internal
+        updates of a sub-optimizer do not stall the dispatching of candidates from the other ones.
+
+        Parameters
+        ----------
+        prefetch: bool
+            whether to precompute the next ask of a sub-optimizer in its thread as soon as one of its asks was used
+
+        Returns
+        -------
+        Portfolio
+            the optimizer itself
+
+        Note
+        ----
+        - the calls to a given sub-optimizer are still processed in order, but a prefetched ask does not take into
+          account the tells which were provided after its precomputation.
+        - sub-optimizers then run concurrently, hence seeding numpy does not make the optimization reproducible anymore.
+        - threads are closed at the end of optimize. When using ask and tell directly, use close_member_threads
+          at the end of the run.
+        """
+        self._member_threads = True
+        self._prefetch = prefetch
+        return self
+
+    def close_member_threads(self) -> None:
+        """Waits for the pending tells of all sub-optimizers (raising their errors if any), cancels
+        the prefetched asks which have not started yet, and shuts down the threads.
+        Threads are restarted if the optimizer is used again.
+        """
+        try:
+            for index in list(self._tell_jobs):
+                self._sync_member(index)
+        finally:
+            self._shutdown_member_threads()
+
+    def _shutdown_member_threads(self) -> None:
+        for index, job in list(self._prefetched.items()):
+            if job.cancel():
+                del self._prefetched[index]  # finished prefetches are kept for a later ask
+        for executor in self._executors.values():
+            executor.shutdown(wait=True)
+        self._executors.clear()
+        self._tell_jobs.clear()
+
+    def optimize(self, *args: Any, **kwargs: Any) -> base.Candidate:
+        try:
+            recommendation = super().optimize(*args, **kwargs)
+        except BaseException:
+            self._shutdown_member_threads()  # do not mask the original error with the errors of pending tells
+            raise
+        self.close_member_threads()
+        return recommendation
+
+    def _submit_to_member(self, index: int, func: Callable[..., Any], *args: Any) -> futures.Future:
+        if index not in self._executors:
+            self._executors[index] = futures.ThreadPoolExecutor(max_workers=1)
+        return self._executors[index].submit(func, *args)
+
+    def _ask_member(self, index: int) -> base.Candidate:
+        """Asks a candidate to a sub-optimizer (in its thread if member threads are enabled)
+        """
+        if not self._member_threads:
+            return self.optims[index].ask()
+        index %= len(self.optims)  # normalize negative indices, so that each sub-optimizer has only one thread
+        job = self._prefetched.pop(index, None)
+        if job is None:
+            job = self._submit_to_member(index, self.optims[index].ask)
+        candidate: base.Candidate = job.result()
+        if self._prefetch:
+            self._prefetched[index] = self._submit_to_member(index, self.optims[index].ask)
+        return candidate
+
+    def _tell_member(self, index: int, candidate: base.Candidate, value: float, wait: bool = False) -> None:
+        """Tells a candidate to a sub-optimizer (in its thread if member threads are enabled).
+        Errors of previous tells of this sub-optimizer are raised at the following calls.
+        """
+        if not self._member_threads:
+            self.optims[index].tell(candidate, value)
+            return
+        index %= len(self.optims)
+        jobs = self._tell_jobs.setdefault(index, [])
+        for job in [j for j in jobs if j.done()]:
+            jobs.remove(job)
+            job.result()
+        jobs.append(self._submit_to_member(index, self.optims[index].tell, candidate, value))
+        if wait:
+            self._sync_member(index)
+
+    def _sync_member(self, index: int) -> None:
+        """Waits for the pending tells of a sub-optimizer (required before accessing its state)
+        """
+        jobs = self._tell_jobs.pop(index, [])
+        for job in jobs:
+            job.result()
 
     def _internal_ask_candidate(self) -> base.Candidate:
         optim_index = self._num_ask % len(self.optims)
-        individual = self.optims[optim_index].ask()
-        self.who_asked[tuple(individual.data)] += [optim_index]
+        individual = self._ask_member(optim_index)
+        self.who_asked[individual.uuid] = optim_index
         return individual
 
     def _internal_tell_candidate(self, candidate: base.Candidate, value: float) -> None:
-        tx = tuple(candidate.data)
-        optim_index = self.who_asked[tx][0]
-        del self.who_asked[tx][0]
-        self.optims[optim_index].tell(candidate, value)
+        optim_index = self.who_asked.pop(candidate.uuid)
+        self._tell_member(optim_index, candidate, value)
 
     def _internal_provide_recommendation(self) -> base.ArrayLike:
+        for index in list(self._tell_jobs):  # raises the errors of the pending tells, if any
+            self._sync_member(index)
         return self.current_bests["pessimistic"].x
 
     def _internal_tell_not_asked(self, candidate: base.Candidate, value: float) -> None:
-        raise base.TellNotAskedNotSupportedError
+        """Broadcasts the candidate to all sub-optimizers which support it
+        """
+        num_unsupported = 0
+        for index in range(len(self.optims)):
+            try:
+                self._tell_member(index, candidate, value, wait=True)
+            except base.TellNotAskedNotSupportedError:
+                num_unsupported += 1
+        if num_unsupported == len(self.optims):
+            raise base.TellNotAskedNotSupportedError
 
 
 @registry.register
@@ -780,12 +934,11 @@ class ParaPortfolio(Portfolio):
                        SQP(instrumentation, 1),
                        ScrHammersleySearch(instrumentation, budget=(budget // len(self.which_optim)) * nw4)
                        ]
-        self.who_asked: Dict[Tuple[float, ...], List[int]] = defaultdict(list)
 
     def _internal_ask_candidate(self) -> base.Candidate:
         optim_index = self.which_optim[self._num_ask % len(self.which_optim)]
-        individual = self.optims[optim_index].ask()
-        self.who_asked[tuple(individual.data)] += [optim_index]
+        individual = self._ask_member(optim_index)
+        self.who_asked[individual.uuid] = optim_index
         return individual
 
 
@@ -807,7 +960,6 @@ class ParaSQPCMA(ParaPortfolio):
             self.optims += [SQP(instrumentation, 1)]
             if i > 0:
                 self.optims[-1].initial_guess = np.random.normal(0, 1, self.dimension)  # type: ignore
-        self.who_asked: Dict[Tuple[float, ...], List[int]] = defaultdict(list)
 
 
 @registry.register
@@ -819,7 +971,6 @@ class ASCMADEthird(Portfolio):
         assert budget is not None
         self.optims = [CMA(instrumentation, budget=None, num_workers=num_workers),
                        LhsDE(instrumentation, budget=None, num_workers=num_workers)]
-        self.who_asked: Dict[Tuple[float, ...], List[int]] = defaultdict(list)
         self.budget_before_choosing = budget // 3
         self.best_optim = -1
 
@@ -832,14 +983,15 @@ class ASCMADEthird(Portfolio):
                 best_value = float("inf")
                 optim_index = -1
                 for i, optim in enumerate(self.optims):
+                    self._sync_member(i)
                     val = optim.current_bests["pessimistic"].get_estimation("pessimistic")
                     if not val > best_value:
                         optim_index = i
                         best_value = val
                 self.best_optim = optim_index
             optim_index = self.best_optim
-        individual = self.optims[optim_index].ask()
-        self.who_asked[tuple(individual.data)] += [optim_index]
+        individual = self._ask_member(optim_index)
+        self.who_asked[individual.uuid] = optim_index
         return individual
 
 
@@ -954,28 +1106,126 @@ class MultiScaleCMA(CM):
         self.budget_before_choosing = budget // 3
 
 
-class _FakeFunction:
-    """Simple function that returns the value which was registerd just before.
-    This is a hack for BO.
+def _wilson_bounds(means: np.ndarray, counts: np.ndarray, z: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Lower and upper bounds of the Wilson score intervals of Bernoulli variables
+    (much tighter than Hoeffding bounds for the low success rates of the bandit portfolio)
+    """
+    z2 = z**2 / counts
+    center = (means + z2 / 2) / (1 + z2)
+    radius = z / (1 + z2) * np.sqrt(means * (1 - means) / counts + z2 / (4 * counts))
+    return center - radius, center + radius
+
+
+class _BanditPortfolio(Portfolio):
+    """Portfolio allocating each ask online to one of its sub-optimizers, through a bandit
+    over their improvement rates (rate at which their evaluations improve the best value so far).
+    See ParametrizedBanditPortfolio for the parameters.
+    """
+
+    def __init__(self, instrumentation: Union[int, Instrumentation], budget: Optional[int] = None, num_workers: int = 1) -> None:
+        base.Optimizer.__init__(self, instrumentation, budget=budget, num_workers=num_workers)  # no default sub-optimizers
+        self._init_dispatch()
+        self._parameters = ParametrizedBanditPortfolio()
+        self.optims: List[base.Optimizer] = []  # delay initialization since parameters are provided after instantiation
+        self._best_value = float("inf")
+        self._asks = np.zeros(0)  # number of asks dispatched to each sub-optimizer
+        self._tells = np.zeros(0)  # number of tells received by each sub-optimizer
+        self._rewards = np.zeros(0)  # number of improvements of the best value by each sub-optimizer
+        self._active = np.zeros(0, dtype=bool)  # sub-optimizers which were not eliminated
+
+    def _initialize_optims(self) -> None:
+        if not self.optims:
+            self.optims = [registry[name](self.instrumentation, budget=None, num_workers=self.num_workers)
+                           for name in self._parameters.optimizers]
+            num = len(self.optims)
+            self._asks, self._tells, self._rewards = (np.zeros(num) for _ in range(3))
+            self._active = np.ones(num, dtype=bool)
+
+    def _select_optim(self) -> int:
+        self._initialize_optims()
+        untried = np.where(self._active & (self._asks == 0))[0]
+        if untried.size:
+            return int(untried[0])
+        if self._parameters.policy == "thompson":
+            scores = np.random.beta(1 + self._rewards, 1 + self._tells - self._rewards)
+        else:  # ucb (pending asks count as trials, so that parallel workers are spread between sub-optimizers)
+            means = self._rewards / np.maximum(1, self._tells)
+            scores = _wilson_bounds(means, self._asks, z=np.sqrt(2 * np.log(np.sum(self._asks))))[1]
+        scores[~self._active] = -np.inf
+        return int(np.argmax(scores))
+
+    def _internal_ask_candidate(self) -> base.Candidate:
+        optim_index = self._select_optim()
+        individual = self._ask_member(optim_index)
+        self._asks[optim_index] += 1
+        self.who_asked[individual.uuid] = optim_index
+        return individual
+
+    def _internal_tell_candidate(self, candidate: base.Candidate, value: float) -> None:
+        optim_index = self.who_asked.pop(candidate.uuid)
+        self._tells[optim_index] += 1
+        if value < self._best_value:
+            if self._best_value < float("inf"):  # the first evaluation is not an improvement
+                self._rewards[optim_index] += 1
+            self._best_value = value
+        self._tell_member(optim_index, candidate, value)
+        if self._parameters.elimination:
+            self._eliminate()
+
+    def _internal_tell_not_asked(self, candidate: base.Candidate, value: float) -> None:
+        self._initialize_optims()
+        super()._internal_tell_not_asked(candidate, value)
+        self._best_value = min(self._best_value, value)  # not an improvement of any sub-optimizer
+
+    def _eliminate(self) -> None:
+        """Deactivates the sub-optimizers for which the upper confidence bound on the improvement
+        rate is below the lower confidence bound of another sub-optimizer. Their workers are
+        then reallocated to the remaining sub-optimizers at the next asks.
+        """
+        told = self._tells >= 10  # avoid eliminations based on a handful of evaluations
+        if np.sum(self._active & told) < 2:
+            return
+        means = self._rewards / np.maximum(1, self._tells)
+        lower, upper = _wilson_bounds(means, np.maximum(1, self._tells), z=np.sqrt(2 * np.log(np.sum(self._tells))))
+        best_lower_bound = np.max(np.where(self._active & told, lower, -np.inf))
+        self._active &= ~(told & (upper < best_lower_bound))
+
+
+class ParametrizedBanditPortfolio(base.ParametrizedFamily):
+    """Portfolio of optimizers, allocating each ask online through a bandit algorithm.
+    The reward of a sub-optimizer is 1 when its evaluation improves the best value found by the portfolio so far,
+    and 0 otherwise, so that the most successful sub-optimizers get most of the budget.
+
+    Parameters
+    ----------
+    optimizers: Sequence[str]
+        names (in the registry) of the sub-optimizers
+    policy: str
+        bandit algorithm for the allocation of the asks, either "ucb" (upper confidence bound, with
+        pending asks counted as trials in parallel settings) or "thompson" (Thompson sampling with Beta priors)
+    elimination: bool
+        whether to definitely stop dispatching asks to sub-optimizers whose improvement rate is
+        significantly lower than that of another sub-optimizer. In parallel settings, this
+        reassigns all the workers to the remaining sub-optimizers.
     """
 
-    def __init__(self) -> None:
-        self._registered: List[Tuple[np.ndarray, float]] = []
+    _optimizer_class = _BanditPortfolio
+
+    def __init__(self, *, optimizers: Sequence[str] = ("CMA", "TwoPointsDE", "OnePlusOne"),
+                 policy: str = "ucb", elimination: bool = False) -> None:
+        assert policy in ["ucb", "thompson"], f"Unknown policy: '{policy}'"
+        assert optimizers, "At least one optimizer must be provided"
+        unknown = set(optimizers) - set(registry)
+        assert not unknown, f"Unknown optimizer(s): {unknown}"
+        self.optimizers = tuple(optimizers)
+        self.policy = policy
+        self.elimination = elimination
+        super().__init__()
 
-    def register(self, x: np.ndarray, value: float) -> None:
-        if self._registered:
-            raise RuntimeError("Only one call can be registered at a time")
-        self._registered.append((x, value))
 
-    def __call__(self, **kwargs: float) -> float:
-        if not self._registered:
-            raise RuntimeError("Call must be registered first")
-        x = [kwargs[f'x{i}'] for i in range(len(kwargs))]
-        xr, value = self._registered[0]
-        if not np.array_equal(x, xr):
-            raise ValueError("Call does not match registered")
-        self._registered.clear()
-        return value
+BanditPortfolio = ParametrizedBanditPortfolio().with_name("BanditPortfolio", register=True)
+ThompsonPortfolio = ParametrizedBanditPortfolio(policy="thompson").with_name("ThompsonPortfolio", register=True)
+EliminationBanditPortfolio = ParametrizedBanditPortfolio(elimination=True).with_name("EliminationBanditPortfolio", register=True)
 
 
 class _BO(base.Optimizer):
@@ -984,22 +1234,19 @@ class _BO(base.Optimizer):
         super().__init__(instrumentation, budget=budget, num_workers=num_workers)
         self._parameters = ParametrizedBO()
         self._transform = transforms.CumulativeDensity()
-        self._bo: Optional[BayesianOptimization] = None
-        self._fake_function = _FakeFunction()
+        self._surrogate: Optional[surrogates.SurrogateModel] = None
+        self._queue: Deque[np.ndarray] = deque()  # initialization points
+        self._pending: Dict[str, np.ndarray] = {}  # points (in [0,1]^d) of the candidates being evaluated
 
     @property
-    def bo(self) -> BayesianOptimization:
-        if self._bo is None:
-            bounds = {f'x{i}': (0., 1.) for i in range(self.dimension)}
-            seed = np.random.randint(2**32, dtype=np.uint32)
-            self._bo = BayesianOptimization(self._fake_function, bounds, random_state=np.random.RandomState(seed))
+    def surrogate(self) -> surrogates.SurrogateModel:
+        if self._surrogate is None:
+            self._surrogate = surrogates.models[self._parameters.surrogate](self.dimension, rank_warping=True)
             # init
             midpoint = self._parameters.middle_point
             init = self._parameters.initialization
             if midpoint:
-                self._bo.probe([.5] * self.dimension, lazy=True)
-            elif init is None:
-                self._bo._queue.add(self._bo._space.random_sample())
+                self._queue.append(np.array([.5] * self.dimension))
             if init is not None:
                 init_budget = int(np.sqrt(self.budget)) - midpoint
                 if init_budget > 0:
@@ -1007,45 +1254,64 @@ class _BO(base.Optimizer):
                                "LHS": sequences.LHSSampler,
                                "random": sequences.RandomSampler}[init](self.dimension, budget=init_budget,
                                                                         scrambling=(init == "Hammersley"))
-                    for point in sampler:
-                        self._bo.probe(point, lazy=True)
-        return self._bo
+                    self._queue.extend(np.array(point) for point in sampler)
+        return self._surrogate
 
-    def _internal_ask(self) -> base.ArrayLike:
-        util = UtilityFunction(kind='ucb', kappa=2.576, xi=0.0)  # bayes_opt default
-        try:
-            x_probe = next(self.bo._queue)
-        except StopIteration:
-            x_probe = self.bo.suggest(util)  # this is time consuming
-            x_probe = [x_probe[f'x{i}'] for i in range(len(x_probe))]
-        return np.clip(self._transform.backward(np.array(x_probe, copy=False)), -100, 100)  # type: ignore
+    def _acquisition(self, points: np.ndarray) -> np.ndarray:
+        """Lower confidence bound (minimization), accounting for the pending points
+        """
+        pending = np.array(list(self._pending.values())) if self._pending else None
+        mean, std = self.surrogate.predict(points, pending=pending)
+        return mean - self._parameters.utility_kappa * std  # type: ignore
 
-    def _internal_tell(self, x: base.ArrayLike, value: float) -> None:
-        y = self._transform.forward(np.array(x, copy=False))
-        self._fake_function.register(y, -value)  # minimizing
-        self.bo.probe(y, lazy=False)
+    def _internal_ask_candidate(self) -> base.Candidate:
+        model = self.surrogate
+        if self._queue:
+            y = self._queue.popleft()
+        elif not model.num_points:
+            y = np.random.uniform(0, 1, size=self.dimension)
+        else:
+            centers = model.points[np.argsort(model.values)[:5]]
+            # variance computations cost O(num_samples * rank²), cap it to O(1e8) operations per round
+            num_samples = int(np.clip(1e8 / model.rank**2, 100, 1000))
+            y = surrogates.minimize_batch_function(self._acquisition, self.dimension, centers=centers, num_samples=num_samples)
+        candidate = self.create_candidate.from_data(np.clip(self._transform.backward(y), -100, 100))
+        self._pending[candidate.uuid] = y
+        return candidate
 
-    def provide_recommendation(self) -> base.Candidate:
-        v = self._transform.backward(np.array([self.bo.max['params'][f'x{i}'] for i in range(self.dimension)]))
-        return np.clip(v, -100, 100)  # type: ignore
+    def _internal_tell_candidate(self, candidate: base.Candidate, value: float) -> None:
+        y = self._pending.pop(candidate.uuid, None)
+        if y is None:  # not asked
+            y = self._transform.forward(candidate.data)
+        self.surrogate.add(y, value)
 
 
 class ParametrizedBO(base.ParametrizedFamily):
-    """Bayesian optimization
+    """Bayesian optimization, based on a Gaussian process with incremental updates (see surrogates.GaussianProcess)
+    and a lower confidence bound acquisition function optimized on batches of points. Pending points are
+    accounted for through the "kriging believer" heuristic, so that parallel asks are spread.
 
     initialization: str
         Initialization algorithms (None, "Hammersley", "random" or "LHS")
     middle_point: bool
         whether to sample the 0 point first
+    utility_kappa: float
+        weight of the standard deviation in the lower confidence bound (exploration)
+    surrogate: str
+        name of the surrogate model in surrogates.models: "GaussianProcess" (exact), or "SparseGaussianProcess"
+        and "RandomFourierFeatures" which scale linearly with the number of evaluations
     """
 
-    no_parallelization = True
     _optimizer_class = _BO
 
-    def __init__(self, *, initialization: Optional[str] = None, middle_point: bool = False) -> None:
+    def __init__(self, *, initialization: Optional[str] = None, middle_point: bool = False, utility_kappa: float = 2.576,
+                 surrogate: str = "GaussianProcess") -> None:
         assert initialization is None or initialization in ["random", "Hammersley", "LHS"], f'Unknown init {initialization}'
+        assert surrogate in surrogates.models, f'Unknown surrogate {surrogate}'
         self.initialization = initialization
         self.middle_point = middle_point
+        self.utility_kappa = utility_kappa
+        self.surrogate = surrogate
         super().__init__()
 
 
@@ -1054,3 +1320,87 @@ RBO = ParametrizedBO(initialization="random").with_name("RBO", register=True)
 QRBO = ParametrizedBO(initialization="Hammersley").with_name("QRBO", register=True)
 MidQRBO = ParametrizedBO(initialization="Hammersley", middle_point=True).with_name("MidQRBO", register=True)
 LBO = ParametrizedBO(initialization="LHS").with_name("LBO", register=True)
+SparseBO = ParametrizedBO(initialization="Hammersley", surrogate="SparseGaussianProcess").with_name("SparseBO", register=True)
+RFFBO = ParametrizedBO(initialization="Hammersley", surrogate="RandomFourierFeatures").with_name("RFFBO", register=True)
+
+
+class _SurrogateScreened(base.Optimizer):
+    """Optimizer asking several candidates to an underlying optimizer, and only providing
+    the most promising one according to a surrogate model. See SurrogateScreened for the parameters.
+    """
+
+    def __init__(self, instrumentation: Union[int, Instrumentation], budget: Optional[int] = None, num_workers: int = 1) -> None:
+        super().__init__(instrumentation, budget=budget, num_workers=num_workers)
+        self._parameters = SurrogateScreened()
+        self._transform = transforms.CumulativeDensity()
+        self._optim: Optional[base.Optimizer] = None
+        self._surrogate: Optional[surrogates.SurrogateModel] = None
+
+    @property
+    def optim(self) -> base.Optimizer:
+        """Underlying optimizer (initialized at the first call since the parameters are provided after instantiation)
+        """
+        if self._optim is None:
+            optimizer = self._parameters.optimizer
+            family = registry[optimizer] if isinstance(optimizer, str) else optimizer
+            budget = None if self.budget is None else self.budget * self._parameters.oversample
+            self._optim = family(self.instrumentation, budget=budget, num_workers=self.num_workers)
+        return self._optim
+
+    @property
+    def surrogate(self) -> surrogates.SurrogateModel:
+        if self._surrogate is None:
+            self._surrogate = surrogates.models[self._parameters.surrogate](self.dimension)
+        return self._surrogate
+
+    def _internal_ask_candidate(self) -> base.Candidate:
+        if self.surrogate.num_points < self._parameters.warmup:
+            return self.optim.ask()
+        candidates = [self.optim.ask() for _ in range(self._parameters.oversample)]
+        data = np.array([c.data for c in candidates])
+        predictions, _ = self.surrogate.predict(self._transform.forward(data))
+        best = int(np.argmin(predictions))
+        for k, candidate in enumerate(candidates):
+            if k != best:  # only the best candidate is evaluated, the others are provided with their predicted value
+                self.optim.tell(candidate, float(predictions[k]))
+        return candidates[best]
+
+    def _internal_tell_candidate(self, candidate: base.Candidate, value: float) -> None:
+        self.surrogate.add(self._transform.forward(candidate.data), value)
+        self.optim.tell(candidate, value)
+
+
+class SurrogateScreened(base.ParametrizedFamily):
+    """Wrapper around an optimizer, for expensive objective functions: at each ask, the underlying optimizer
+    is asked for several candidates, which are ranked through a surrogate model fitted on all the evaluations
+    so far. Only the best candidate according to the surrogate is provided for evaluation, and the others are
+    told to the underlying optimizer with their predicted value.
+
+    Parameters
+    ----------
+    optimizer: str or OptimizerFamily
+        the underlying optimizer (or its name in the registry)
+    oversample: int
+        number of candidates asked to the underlying optimizer for each ask
+    surrogate: str
+        name of the surrogate model in surrogates.models
+    warmup: int
+        number of evaluations before starting the screening (the underlying optimizer is used directly until then)
+    """
+
+    _optimizer_class = _SurrogateScreened
+
+    def __init__(self, optimizer: Union[str, base.OptimizerFamily] = "CMA", *, oversample: int = 4,
+                 surrogate: str = "GaussianProcess", warmup: int = 10) -> None:
+        assert not isinstance(optimizer, str) or optimizer in registry, f"Unknown optimizer {optimizer}"
+        assert oversample >= 1
+        assert surrogate in surrogates.models, f'Unknown surrogate {surrogate}'
+        self.optimizer = optimizer
+        self.oversample = oversample
+        self.surrogate = surrogate
+        self.warmup = warmup
+        super().__init__()
+
+
+ScreenedCMA = SurrogateScreened("CMA").with_name("ScreenedCMA", register=True)
+ScreenedTwoPointsDE = SurrogateScreened("TwoPointsDE").with_name("ScreenedTwoPointsDE", register=True)
@@ -0,0 +1,463 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+"""Surrogate models of objective functions in [0,1]^d, and tools for optimizing acquisition functions based on them.
+"""
+from typing import Optional, Tuple, Callable, Type
+import numpy as np
+from scipy import linalg
+from scipy import stats
+from scipy import special
+from ..common.decorators import Registry
+
+
+def _distances(x1: np.ndarray, x2: np.ndarray) -> np.ndarray:
+    """Matrix of the euclidean distances between the rows of x1 and the rows of x2
+    """
+    sqdist = np.sum(x1**2, axis=1)[:, None] + np.sum(x2**2, axis=1)[None, :] - 2 * x1.dot(x2.T)
+    return np.sqrt(np.maximum(sqdist, 0))  # type: ignore
+
+
+def matern52(x1: np.ndarray, x2: np.ndarray, length_scale: float) -> np.ndarray:
+    """Matern 5/2 kernel matrix (with unit amplitude) between the rows of x1 and the rows of x2
+    """
+    return _matern52_from_distances(_distances(x1, x2), length_scale)
+
+
+def _matern52_from_distances(distances: np.ndarray, length_scale: float) -> np.ndarray:
+    d = np.sqrt(5) * distances / length_scale
+    return (1 + d + d**2 / 3) * np.exp(-d)  # type: ignore
+
+
+def _fit_length_scale(points: np.ndarray, normalized: np.ndarray, noise: float,
+                      length_scales: np.ndarray) -> Tuple[Optional[float], Optional[np.ndarray]]:
+    """Finds the length scale maximizing the marginal likelihood of an exact Gaussian process
+    over a grid of length scales
+
+    Returns
+    -------
+    float or None
+        the best length scale (None if the kernel matrix could not be factorized)
+    np.ndarray or None
+        the lower Cholesky factor of the kernel matrix for this length scale
+    """
+    distances = _distances(points, points)
+    best: Tuple[float, Optional[float], Optional[np.ndarray]] = (-float("inf"), None, None)
+    for length_scale in length_scales:
+        kernel = _matern52_from_distances(distances, length_scale) + noise * np.eye(points.shape[0])
+        try:
+            chol = linalg.cholesky(kernel, lower=True, check_finite=False)
+        except linalg.LinAlgError:
+            continue
+        alpha = linalg.cho_solve((chol, True), normalized, check_finite=False)
+        loglikelihood = -.5 * normalized.dot(alpha) - np.sum(np.log(np.diag(chol)))
+        if loglikelihood > best[0]:
+            best = (loglikelihood, length_scale, chol)
+    return best[1], best[2]
+
+
+class SurrogateModel:
+    """Base class for the surrogate models, storing the observations.
+    Subclasses must implement add and predict.
+
+    Parameters
+    ----------
+    dimension: int
+        dimension of the inputs
+    noise: float
+        variance of the observation noise (for normalized outputs), which also ensures numerical stability
+    refit_ratio: float
+        growth ratio of the number of points between two refits of the hyperparameters (the length scale)
+    rank_warping: bool
+        whether to fit the model on the normal scores of the ranks of the outputs instead of the outputs themselves.
+        This makes the model robust to outliers (such as huge values on the borders of the domain),
+        but the predictions are then in the warped space, which only preserves the ordering of the outputs.
+    """
+
+    def __init__(self, dimension: int, noise: float = 1e-6, refit_ratio: float = 1.25, rank_warping: bool = False) -> None:
+        assert refit_ratio > 1
+        self.dimension = dimension
+        self.noise = noise
+        self.refit_ratio = refit_ratio
+        self.rank_warping = rank_warping
+        self.length_scale = np.sqrt(dimension) / 4
+        self._length_scales = np.sqrt(dimension) * np.geomspace(.01, 2., 16)  # grid for the refits
+        self._next_refit = 3
+        self._num_points = 0
+        self._x = np.zeros((16, dimension))
+        self._y = np.zeros(16)
+        self._y_mean = 0.
+        self._y_std = 1.
+
+    @property
+    def num_points(self) -> int:
+        return self._num_points
+
+    @property
+    def points(self) -> np.ndarray:
+        """Observed inputs (view)
+        """
+        return self._x[:self._num_points]
+
+    @property
+    def values(self) -> np.ndarray:
+        """Observed outputs (view)
+        """
+        return self._y[:self._num_points]
+
+    @property
+    def rank(self) -> int:
+        """Rank of the model (number of basis functions), which drives the cost of the predictions
+        """
+        return self._num_points
+
+    def _store(self, x: np.ndarray, value: float) -> None:
+        n = self._num_points
+        if n == self._x.shape[0]:
+            self._grow()
+        self._x[n] = x
+        self._y[n] = value
+        self._num_points += 1
+
+    def _grow(self) -> None:
+        n = self._num_points
+        x, y = self._x, self._y
+        self._x = np.zeros((2 * x.shape[0], self.dimension))
+        self._y = np.zeros(2 * x.shape[0])
+        self._x[:n], self._y[:n] = x[:n], y[:n]
+
+    def _should_refit(self) -> bool:
+        if self._num_points < self._next_refit:
+            return False
+        self._next_refit = int(np.ceil(self.refit_ratio * self._num_points))
+        return True
+
+    def _normalized_values(self) -> np.ndarray:
+        values = self.values
+        if self.rank_warping:
+            ranks = stats.rankdata(values)
+            values = special.ndtri((ranks - .5) / values.size)
+        self._y_mean = float(np.mean(values))
+        std = float(np.std(values))
+        self._y_std = std if std > 0 else 1.
+        return (values - self._y_mean) / self._y_std  # type: ignore
+
+    def add(self, x: np.ndarray, value: float) -> None:
+        """Adds an observation to the model
+
+        Parameters
+        ----------
+        x: np.ndarray
+            the observed input, of shape (dimension,)
+        value: float
+            the observed output
+        """
+        raise NotImplementedError
+
+    def predict(self, x: np.ndarray, pending: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Computes the posterior mean and standard deviation of the model at a batch of points
+
+        Parameters
+        ----------
+        x: np.ndarray
+            the points, of shape (num_points, dimension)
+        pending: np.ndarray
+            points which are being evaluated, of shape (num_pending, dimension). Following the "kriging believer"
+            heuristic, they are considered as observed with a value equal to the predicted mean, which leaves the
+            mean unchanged but reduces the standard deviation around them. This helps spreading batches of points.
+
+        Returns
+        -------
+        np.ndarray
+            the posterior mean at each point
+        np.ndarray
+            the posterior standard deviation at each point
+        """
+        raise NotImplementedError
+
+
+models = Registry[Type[SurrogateModel]]()
+
+
+@models.register
+class GaussianProcess(SurrogateModel):
+    """Exact Gaussian process regression with a Matern 5/2 kernel, fitted incrementally:
+    adding a point extends the Cholesky factor of the kernel matrix in O(n²) instead of
+    refactorizing it in O(n³). The isotropic length scale is refitted by maximizing the
+    marginal likelihood over a grid, each time the number of points has grown by refit_ratio,
+    so that the amortized cost of a refit is also O(n²) per point.
+    Outputs are normalized (mean 0, standard deviation 1) before fitting.
+    See SurrogateModel for the parameters.
+    """
+
+    def __init__(self, dimension: int, noise: float = 1e-6, refit_ratio: float = 1.25, rank_warping: bool = False) -> None:
+        super().__init__(dimension, noise=noise, refit_ratio=refit_ratio, rank_warping=rank_warping)
+        self._chol = np.zeros((16, 16))  # lower Cholesky factor of the kernel matrix (top-left block)
+        self._alpha: Optional[np.ndarray] = None  # normalized outputs multiplied by the inverse kernel matrix
+
+    def _grow(self) -> None:
+        n = self._num_points
+        chol = self._chol
+        super()._grow()
+        self._chol = np.zeros((self._x.shape[0], self._x.shape[0]))
+        self._chol[:n, :n] = chol[:n, :n]
+
+    def add(self, x: np.ndarray, value: float) -> None:
+        n = self._num_points
+        self._store(x, value)
+        kernel = matern52(self._x[n: n + 1], self._x[:n], self.length_scale)[0]
+        row = linalg.solve_triangular(self._chol[:n, :n], kernel, lower=True, check_finite=False) if n else kernel
+        self._chol[n, :n] = row
+        # the Schur complement cannot be lower than the noise in exact arithmetic
+        self._chol[n, n] = np.sqrt(max(1 + self.noise - row.dot(row), self.noise))
+        self._alpha = None
+        if self._should_refit():
+            length_scale, chol = _fit_length_scale(self.points, self._normalized_values(), self.noise, self._length_scales)
+            if length_scale is not None:
+                self.length_scale = length_scale
+                self._chol[:n + 1, :n + 1] = chol
+
+    def _get_alpha(self) -> np.ndarray:
+        if self._alpha is None:
+            normalized = self._normalized_values()
+            self._alpha = linalg.cho_solve((self._chol[:self._num_points, :self._num_points], True), normalized, check_finite=False)
+        return self._alpha
+
+    def predict(self, x: np.ndarray, pending: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        x = np.atleast_2d(x)
+        n = self._num_points
+        if not n:
+            return np.zeros(x.shape[0]), np.ones(x.shape[0])
+        chol = self._chol[:n, :n]
+        alpha = self._get_alpha()  # updates the normalization as well
+        cross = matern52(x, self.points, self.length_scale)
+        mean = self._y_mean + self._y_std * cross.dot(alpha)
+        projection = linalg.solve_triangular(chol, cross.T, lower=True, check_finite=False)
+        variance = 1 - np.sum(projection**2, axis=0)
+        if pending is not None and pending.size:
+            pending = np.atleast_2d(pending)
+            pending_projection = linalg.solve_triangular(chol, matern52(pending, self.points, self.length_scale).T,
+                                                         lower=True, check_finite=False)
+            schur = (matern52(pending, pending, self.length_scale) + self.noise * np.eye(pending.shape[0]) -
+                     pending_projection.T.dot(pending_projection))
+            pending_chol = linalg.cholesky(schur + self.noise * np.eye(pending.shape[0]), lower=True, check_finite=False)
+            covariance = matern52(x, pending, self.length_scale) - projection.T.dot(pending_projection)
+            variance -= np.sum(linalg.solve_triangular(pending_chol, covariance.T, lower=True, check_finite=False)**2, axis=0)
+        return mean, self._y_std * np.sqrt(np.maximum(variance, 0))  # type: ignore
+
+
+class _FeatureModel(SurrogateModel):
+    """Base class for Bayesian linear regressions over a fixed number m of features (approximating a Gaussian
+    process with a Matern 5/2 kernel). Adding a point updates the m x m Gram matrix of the features in O(m²),
+    and fitting from scratch costs O(n.m²), so that the model scales to large numbers of points.
+    The features of the observed points are cached (in float32, hence 4.n.m bytes).
+    At each refit (each time the number of points has grown by refit_ratio), the length scale is fitted
+    with an exact Gaussian process on a subset of at most m points, then the features are recomputed.
+
+    Parameters
+    ----------
+    dimension: int
+        dimension of the inputs
+    num_features: int
+        number of features m
+    noise: float
+        variance of the observation noise (for normalized outputs). It must account for the approximation error.
+    refit_ratio: float
+        growth ratio of the number of points between two refits of the length scale and the features
+    rank_warping: bool
+        whether to fit the model on the normal scores of the ranks of the outputs (see SurrogateModel)
+    """
+
+    def __init__(self, dimension: int, num_features: int = 256, noise: float = 1e-3,
+                 refit_ratio: float = 1.25, rank_warping: bool = False) -> None:
+        super().__init__(dimension, noise=noise, refit_ratio=refit_ratio, rank_warping=rank_warping)
+        self.num_features = num_features
+        self._gram = np.zeros((0, 0))  # Gram matrix of the features of the observed points
+        self._cache = np.zeros((16, 0), dtype=np.float32)  # features of the observed points
+        self._chol: Optional[np.ndarray] = None  # lower Cholesky factor of gram + noise * I
+        self._weights: Optional[np.ndarray] = None  # posterior mean of the weights of the features
+        self._ready = False  # features are initialized at the first refit
+
+    @property
+    def rank(self) -> int:
+        return min(self._num_points, self.num_features)
+
+    def _features(self, x: np.ndarray) -> np.ndarray:
+        """Features of a batch of points, of shape (num_points, num_features)
+        """
+        raise NotImplementedError
+
+    def _residual_variance(self, features: np.ndarray) -> np.ndarray:  # pylint: disable=no-self-use
+        """Prior variance at each point which is not accounted for by its features
+        """
+        return np.zeros(features.shape[0])
+
+    def _update_features(self, subset: np.ndarray) -> None:
+        """Recomputes the features, given the indices of a subset of the points
+        (the number of features is capped by the size of the subset, so that the fit is well-conditioned
+        while there are fewer points than num_features)
+        """
+        raise NotImplementedError
+
+    def _grow(self) -> None:
+        n = self._num_points
+        cache = self._cache
+        super()._grow()
+        self._cache = np.zeros((self._x.shape[0], cache.shape[1]), dtype=np.float32)
+        self._cache[:n] = cache[:n]
+
+    def _refit(self) -> None:
+        n = self._num_points
+        size = min(n, self.num_features)
+        # subset: the best quarter of the points, and random other points
+        order = np.argsort(self.values)
+        num_best = size // 4
+        subset = np.concatenate([order[:num_best], np.random.choice(order[num_best:], size - num_best, replace=False)])
+        normalized = self._normalized_values()
+        length_scale, _ = _fit_length_scale(self._x[subset], normalized[subset], self.noise, self._length_scales)
+        if length_scale is not None:
+            self.length_scale = length_scale
+        self._update_features(subset)
+        self._gram = np.zeros((0, 0))
+        chunk_size = 4096
+        for start in range(0, n, chunk_size):
+            features = self._features(self._x[start: min(n, start + chunk_size)])
+            if not start:
+                self._cache = np.zeros((self._x.shape[0], features.shape[1]), dtype=np.float32)
+                self._gram = np.zeros((features.shape[1], features.shape[1]))
+            self._cache[start: start + features.shape[0]] = features
+            self._gram += features.T.dot(features)
+        self._ready = True
+
+    def add(self, x: np.ndarray, value: float) -> None:
+        self._store(x, value)
+        self._chol, self._weights = None, None
+        if self._should_refit():
+            self._refit()
+        elif self._ready:
+            features = self._features(self._x[self._num_points - 1: self._num_points])[0]
+            self._cache[self._num_points - 1] = features
+            self._gram += np.outer(features, features)
+
+    def _get_weights(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._chol is None or self._weights is None:
+            self._chol = linalg.cholesky(self._gram + self.noise * np.eye(self._gram.shape[0]), lower=True, check_finite=False)
+            normalized = self._normalized_values()
+            projected = normalized.dot(self._cache[:self._num_points])
+            self._weights = linalg.cho_solve((self._chol, True), projected, check_finite=False)
+        return self._chol, self._weights
+
+    def predict(self, x: np.ndarray, pending: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        x = np.atleast_2d(x)
+        if not self._ready:
+            return np.zeros(x.shape[0]), np.ones(x.shape[0])
+        chol, weights = self._get_weights()
+        features = self._features(x)
+        mean = self._y_mean + self._y_std * features.dot(weights)
+        if pending is not None and pending.size:  # kriging believer: pending features are added to the Gram matrix
+            pending_features = self._features(np.atleast_2d(pending))
+            chol = linalg.cholesky(self._gram + pending_features.T.dot(pending_features) + self.noise * np.eye(chol.shape[0]),
+                                   lower=True, check_finite=False)
+        projection = linalg.solve_triangular(chol, features.T, lower=True, check_finite=False)
+        variance = self.noise * np.sum(projection**2, axis=0) + self._residual_variance(features)
+        return mean, self._y_std * np.sqrt(np.maximum(variance, 0))  # type: ignore
+
+
+@models.register
+class RandomFourierFeatures(_FeatureModel):
+    """Bayesian linear regression over random Fourier features, which approximate a Gaussian process with
+    a Matern 5/2 kernel (frequencies are drawn from its spectral density, a Student-t distribution with 5 degrees
+    of freedom). Fitting costs O(n.m²) and predicting O(m²) per point, with m the number of features.
+    See _FeatureModel for the parameters.
+    """
+
+    def __init__(self, dimension: int, num_features: int = 256, noise: float = 1e-3,
+                 refit_ratio: float = 1.25, rank_warping: bool = False) -> None:
+        super().__init__(dimension, num_features=num_features, noise=noise, refit_ratio=refit_ratio, rank_warping=rank_warping)
+        self._frequencies = np.zeros((num_features, dimension))
+        self._phases = np.zeros(num_features)
+
+    def _update_features(self, subset: np.ndarray) -> None:
+        dof = 5
+        num = subset.size
+        scaling = np.sqrt(dof / np.random.chisquare(dof, size=(num, 1)))
+        self._frequencies = np.random.normal(0, 1, size=(num, self.dimension)) * scaling / self.length_scale
+        self._phases = np.random.uniform(0, 2 * np.pi, size=num)
+
+    def _features(self, x: np.ndarray) -> np.ndarray:
+        return np.sqrt(2. / self._phases.size) * np.cos(x.dot(self._frequencies.T) + self._phases)  # type: ignore
+
+
+@models.register
+class SparseGaussianProcess(_FeatureModel):
+    """Sparse Gaussian process with a Matern 5/2 kernel, using m inducing points (deterministic training conditional
+    approximation). The inducing points are selected at each refit among the observed points (the best quarter,
+    and random other points). Fitting costs O(n.m²) and predicting O(m²) per point.
+    See _FeatureModel for the parameters.
+    """
+
+    def __init__(self, dimension: int, num_features: int = 256, noise: float = 1e-3,
+                 refit_ratio: float = 1.25, rank_warping: bool = False) -> None:
+        super().__init__(dimension, num_features=num_features, noise=noise, refit_ratio=refit_ratio, rank_warping=rank_warping)
+        self._inducing = np.zeros((0, dimension))
+        self._inducing_chol = np.zeros((0, 0))
+
+    def _update_features(self, subset: np.ndarray) -> None:
+        self._inducing = np.array(self._x[subset], copy=True)
+        kernel = matern52(self._inducing, self._inducing, self.length_scale)
+        jitter = 1e-6 * np.mean(np.diag(kernel))  # relative to the scale of the kernel
+        self._inducing_chol = linalg.cholesky(kernel + jitter * np.eye(subset.size), lower=True, check_finite=False)
+
+    def _features(self, x: np.ndarray) -> np.ndarray:
+        # Nyström features: their inner products approximate the kernel
+        cross = matern52(self._inducing, x, self.length_scale)
+        return linalg.solve_triangular(self._inducing_chol, cross, lower=True, check_finite=False).T  # type: ignore
+
+    def _residual_variance(self, features: np.ndarray) -> np.ndarray:
+        return np.maximum(0, 1 - np.sum(features**2, axis=1))  # type: ignore
+
+
+def minimize_batch_function(func: Callable[[np.ndarray], np.ndarray], dimension: int, centers: Optional[np.ndarray] = None,
+                            num_samples: int = 1000, num_rounds: int = 3, scale: float = .1) -> np.ndarray:
+    """Minimizes a vectorized function (such as an acquisition function) over [0,1]^d, by evaluating it on batches of
+    points: uniform random points and perturbations of the provided centers (such as the best points so far), then
+    perturbations of the best candidates with shrinking scales.
+
+    Parameters
+    ----------
+    func: callable
+        function taking an array of points of shape (num_points, dimension) and returning an array of num_points values
+    dimension: int
+        dimension of the space
+    centers: np.ndarray
+        optional points around which to search, of shape (num_centers, dimension)
+    num_samples: int
+        number of points evaluated at each round
+    num_rounds: int
+        number of local refinement rounds
+    scale: float
+        standard deviation of the initial perturbations (divided by 4 at each round)
+
+    Returns
+    -------
+    np.ndarray
+        the best point found, of shape (dimension,)
+    """
+    points = np.random.uniform(0, 1, size=(num_samples, dimension))
+    if centers is not None and centers.size:
+        num_local = num_samples // 2
+        selected = centers[np.random.randint(centers.shape[0], size=num_local)]
+        points[:num_local] = selected + scale * np.random.normal(0, 1, size=selected.shape)
+    points = np.clip(points, 0, 1)
+    values = func(points)
+    for k in range(1, num_rounds + 1):
+        # stable sort: the values are all tied while the model is not fitted, and the order of ties of the
+        # default sort differs between numpy versions
+        best = points[np.argsort(values, kind="mergesort")[:max(1, num_samples // 20)]]
+        selected = best[np.random.randint(best.shape[0], size=num_samples - best.shape[0])]
+        perturbed = selected + scale / 4**k * np.random.normal(0, 1, size=selected.shape)
+        points = np.clip(np.concatenate([best, perturbed], axis=0), 0, 1)
+        values = func(points)
+    return points[np.argmin(values)]  # type: ignore
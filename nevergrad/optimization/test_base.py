@@ -4,13 +4,17 @@
 # LICENSE file in the root directory of this source tree.
 
 import warnings
+from unittest.mock import patch
 from typing import List, Tuple, Any, Optional, Union
+import pytest
 import numpy as np
 from ..common import testing
+from .. import instrumentation as inst
 from ..instrumentation import Instrumentation
 from . import optimizerlib
 from . import test_optimizerlib
 from . import base
+from . import utils
 
 
 class CounterFunction:
@@ -103,6 +107,60 @@ def test_optimize() -> None:
     np.testing.assert_equal(func.count, 100)
 
 
+def test_optimize_with_cache() -> None:
+    instrumentation = Instrumentation(inst.var.OrderedDiscrete([0, 1, 2, 3]))
+    optimizer = optimizerlib.OnePlusOne(instrumentation=instrumentation, budget=50)
+    func = CounterFunction()
+    cache = utils.EvaluationCache()
+    optimizer.optimize(lambda x: func([x]), cache=cache)
+    assert func.count == len(cache) <= 4
+    np.testing.assert_equal(cache.hits + cache.misses, 50)
+    np.testing.assert_equal(optimizer.num_ask, 50)
+    np.testing.assert_equal(optimizer.num_tell, 50)
+
+
+def test_candidate_zero_copy() -> None:
+    instrumentation = Instrumentation(inst.var.Array(2, 3), inst.var.Gaussian(0, 1))
+    optimizer = optimizerlib.OnePlusOne(instrumentation=instrumentation, budget=4)
+    data = np.random.normal(0, 1, size=7)
+    candidate = optimizer.create_candidate.from_data(data)
+    assert not np.shares_memory(candidate.data, data), "Writeable data must be copied"
+    assert not candidate.data.flags.writeable
+    assert np.shares_memory(candidate.args[0], candidate.data), "Array arguments should be views on the candidate data"
+    assert not candidate.args[0].flags.writeable
+    assert optimizer.create_candidate.from_data(candidate.data).data is candidate.data
+    optimizer.tell(candidate, 12)
+    assert optimizer.current_bests["pessimistic"].x is candidate.data, "Bests should share the candidate data"
+
+
+def test_candidate_lazy_arguments() -> None:
+    instrumentation = Instrumentation(inst.var.SoftmaxCategorical(list(range(10))), inst.var.Gaussian(0, 1))
+    assert instrumentation.stochastic
+    optimizer = optimizerlib.OnePlusOne(instrumentation=instrumentation, budget=4)
+    data = np.random.normal(0, 1, size=11)
+    outputs = []
+    for delayed in [False, True]:
+        np.random.seed(12)
+        with patch.object(Instrumentation, "data_to_arguments", autospec=True,
+                          side_effect=Instrumentation.data_to_arguments) as mocked:
+            candidate = optimizer.create_candidate.from_data(data)
+            assert not mocked.called, "Arguments should not be computed at creation"
+            if delayed:
+                np.random.normal(0, 1, size=100)  # arguments must not depend on later random draws
+            outputs.append((candidate.args, candidate.kwargs))
+            assert candidate.args is candidate.args
+            np.testing.assert_equal(mocked.call_count, 1)
+    testing.printed_assert_equal(outputs[0], outputs[1])
+
+
+def test_candidate_wrong_dimension() -> None:
+    optimizer = optimizerlib.OnePlusOne(instrumentation=3, budget=4)
+    with pytest.raises(AssertionError, match="Expected 3 values but got 2"):
+        optimizer.create_candidate.from_data([1, 2])  # raised at creation, not at first access to args
+    with pytest.raises(AssertionError, match="Expected 3 values but got 2"):
+        base.Candidate(None, None, [1, 2], converter=lambda: ((), {}), dimension=3)
+
+
 class StupidFamily(base.OptimizerFamily):
 
     def __call__(self, instrumentation: Union[int, Instrumentation], budget: Optional[int] = None, num_workers: int = 1) -> base.Optimizer:
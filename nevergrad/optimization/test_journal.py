@@ -0,0 +1,48 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import tempfile
+from pathlib import Path
+import numpy as np
+from . import optimizerlib
+from .journal import Journal
+
+
+def test_journal_optimization() -> None:
+    optimizer = optimizerlib.OnePlusOne(instrumentation=2, budget=30, num_workers=3)
+    with tempfile.TemporaryDirectory() as folder:
+        filepath = Path(folder) / "test.journal"
+        with Journal(filepath, dimension=2, buffer_size=7) as journal:
+            optimizer.register_callback("tell", journal)
+            optimizer.optimize(lambda x: float(np.sum(x**2)))
+        records = Journal.read(filepath)
+        np.testing.assert_equal(len(records), 30)
+        np.testing.assert_equal(sorted(set(records["worker_id"])), [0, 1, 2])
+        np.testing.assert_array_equal(records["value"], np.sum(records["data"]**2, axis=1))
+        archive = Journal.to_archive(filepath)
+        np.testing.assert_equal(archive.bytesdict.keys(), optimizer.archive.bytesdict.keys())
+        np.testing.assert_equal([v.count for v in archive.values()], [v.count for v in optimizer.archive.values()])
+        df = Journal.to_dataframe(filepath)
+        np.testing.assert_equal(list(df.columns), ["x0", "x1", "value", "timestamp", "worker_id", "uuid"])
+        np.testing.assert_equal(df.uuid[0], records["uuid"][0].decode())
+        del records
+
+
+def test_journal_truncated_record() -> None:
+    with tempfile.TemporaryDirectory() as folder:
+        filepath = Path(folder) / "test.journal"
+        with Journal(filepath, dimension=3) as journal:
+            for k in range(4):
+                journal.append([k, k, k], float(k), uuid="abc", worker_id=k)
+        with filepath.open("ab") as f:
+            f.write(b"\x00" * 12)  # simulates a crash while writing
+        np.testing.assert_equal(len(Journal.read(filepath)), 4)
+        with Journal(filepath, dimension=3) as journal:
+            journal.append([4, 4, 4], 4.)
+        records = Journal.read(filepath)
+        np.testing.assert_array_equal(records["value"], [0, 1, 2, 3, 4])
+        np.testing.assert_array_equal(records["worker_id"], [0, 1, 2, 3, -1])
+        del records
+        np.testing.assert_raises(ValueError, Journal, filepath, dimension=2)
@@ -6,6 +6,7 @@
 from typing import Callable, Any
 import numpy as np
 from ..common import testing
+from ..instrumentation import variables
 from . import utils
 from . import mutations
 
@@ -17,6 +18,19 @@ def test_discrete_mutation() -> None:
     np.testing.assert_almost_equal(output, [-.33, -.1, .02], decimal=2)
 
 
+def test_structured_discrete_mutation() -> None:
+    np.random.seed(12)
+    integer = variables.Integer(0, 10)
+    choice = variables.Choice([1, 2, 3])
+    data = np.concatenate([integer.process_arg(4), [.1, .2], choice.process_arg(2)])
+    for _ in range(10):
+        output = mutations.structured_discrete_mutation(data, [integer, variables._Constant(12), variables.Array(2), choice])
+        changed = [integer.process(output[:1]) != 4, np.any(output[1: 3] != data[1: 3]), choice.process(output[3:]) != 2]
+        assert any(changed)
+        if not changed[0]:
+            np.testing.assert_array_equal(output[0], data[0])
+
+
 def test_crossover() -> None:
     data = [0.1, -.1, 1, -0.1]
     np.random.seed(15)
@@ -0,0 +1,53 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import pytest
+import numpy as np
+from . import neighbors
+
+
+@pytest.mark.parametrize("dimension", [2, 5])  # type: ignore
+def test_kdtree_index(dimension: int) -> None:
+    np.random.seed(12)
+    index = neighbors.KDTreeIndex(dimension, buffer_size=8)
+    points = np.random.normal(size=(300, dimension))
+    for k, x in enumerate(points):
+        index.add(bytes([k % 256, k // 256]), x)
+    for k in range(0, 300, 3):
+        index.remove(bytes([k % 256, k // 256]))
+    assert len(index) == 200
+    alive = np.array([k for k in range(300) if k % 3])
+    for x in np.random.normal(size=(10, dimension)):
+        distances = np.sqrt(np.sum((points[alive] - x)**2, axis=1))
+        order = np.argsort(distances)
+        output_distances, keys = index.nearest(x, k=5)
+        np.testing.assert_array_almost_equal(output_distances, distances[order[:5]])
+        np.testing.assert_equal([key[0] + 256 * key[1] for key in keys], alive[order[:5]])
+        radius = float(np.median(distances))
+        output_distances, keys = index.within(x, radius)
+        np.testing.assert_equal(len(keys), np.sum(distances <= radius))
+        assert np.all(np.diff(output_distances) >= 0)
+
+
+def test_random_projection_index() -> None:
+    np.random.seed(12)
+    index = neighbors.RandomProjectionIndex(50)
+    points = np.random.normal(size=(200, 50))
+    for k, x in enumerate(points):
+        index.add(bytes([k]), x)
+    # near duplicates are found
+    for k in range(0, 200, 20):
+        distances, keys = index.nearest(points[k] + .01, k=1)
+        np.testing.assert_equal(keys, [bytes([k])])
+        distances, keys = index.within(points[k], .1)
+        np.testing.assert_equal(keys, [bytes([k])])
+    index.remove(bytes([0]))
+    _, keys = index.nearest(points[0], k=3)
+    assert len(keys) == 3 and bytes([0]) not in keys
+
+
+@pytest.mark.parametrize("kind,expected", [("auto", neighbors.KDTreeIndex), ("lsh", neighbors.RandomProjectionIndex)])  # type: ignore
+def test_make_index(kind: str, expected: type) -> None:
+    assert isinstance(neighbors.make_index(3, kind), expected)
@@ -6,14 +6,12 @@
 import random
 import warnings
 from pathlib import Path
-from functools import partial
 from unittest import SkipTest
 from unittest.mock import patch
 from typing import Type, Union, Generator, List
 import pytest
 import numpy as np
 import pandas as pd
-from bayes_opt.util import acq_max
 from .. import instrumentation as inst
 from ..common.typetools import ArrayLike
 from ..common import testing
@@ -76,8 +74,8 @@ def check_optimizer(optimizer_cls: Union[base.OptimizerFamily, Type[base.Optimiz
         assert optimizer.num_tell_not_asked == 1
 
 
-SLOW = ["NoisyDE", "NoisyBandit", "SPSA", "NoisyOnePlusOne", "OptimisticNoisyOnePlusOne", "ASCMADEthird", "ASCMA2PDEthird", "MultiScaleCMA",
-        "PCEDA", "MPCEDA", "EDA", "MEDA", "MicroCMA"]
+SLOW = ["NoisyDE", "NoisyBandit", "SPSA", "NoisyOnePlusOne", "OptimisticNoisyOnePlusOne", "UCBNoisyOnePlusOne",
+        "ASCMADEthird", "ASCMA2PDEthird", "MultiScaleCMA", "PCEDA", "MPCEDA", "EDA", "MEDA", "MicroCMA"]
 UNSEEDABLE: List[str] = []
 
 
@@ -87,10 +85,7 @@ def test_optimizers(name: str) -> None:
     if isinstance(optimizer_cls, base.OptimizerFamily):
         assert hasattr(optimizerlib, name)  # make sure registration matches name in optimizerlib
     verify = not optimizer_cls.one_shot and name not in SLOW and not any(x in name for x in ["BO", "Discrete"])
-    # the following context manager speeds up BO tests
-    patched = partial(acq_max, n_warmup=10000, n_iter=2)
-    with patch('bayes_opt.bayesian_optimization.acq_max', patched):
-        check_optimizer(optimizer_cls, budget=300 if "BO" not in name else 2, verify_value=verify)
+    check_optimizer(optimizer_cls, budget=300 if "BO" not in name else 40, verify_value=verify)
 
 
 class RecommendationKeeper:
@@ -135,12 +130,7 @@ def test_optimizers_recommendation(name: str, recomkeeper: RecommendationKeeper)
     fitness = Fitness([.5, -.8, 0, 4] + (5 * np.cos(np.arange(dimension - 4))).tolist())
     optim = optimizer_cls(instrumentation=dimension, budget=budget, num_workers=1)
     np.testing.assert_equal(optim.name, name)
-    # the following context manager speeds up BO tests
-    # BEWARE: BO tests are deterministic but can get different results from a computer to another.
-    # Reducing the precision could help in this regard.
-    patched = partial(acq_max, n_warmup=10000, n_iter=2)
-    with patch('bayes_opt.bayesian_optimization.acq_max', patched):
-        candidate = optim.optimize(fitness)
+    candidate = optim.optimize(fitness)
     if name not in recomkeeper.recommendations.index:
         recomkeeper.recommendations.loc[name, :dimension] = tuple(candidate.data)
         raise ValueError(f'Recorded the value for optimizer "{name}", please rerun this test locally.')
@@ -181,6 +171,9 @@ def test_optimizer_families_repr() -> None:
     optimso = optimizerlib.ScipyOptimizer(method="COBYLA")
     np.testing.assert_equal(repr(optimso), "ScipyOptimizer(method='COBYLA')")
     assert optimso.no_parallelization
+    #
+    optimbp = optimizerlib.ParametrizedBanditPortfolio(policy="thompson", optimizers=["CMA", "DE"])
+    np.testing.assert_equal(repr(optimbp), "ParametrizedBanditPortfolio(optimizers=('CMA', 'DE'), policy='thompson')")
 
 
 @pytest.mark.parametrize("name", ["PSO", "DE"])  # type: ignore
@@ -229,3 +222,106 @@ def test_optimization_doc_instrumentation_example() -> None:
     testing.assert_set_equal(recom.kwargs, ['y'])
     value = _square(*recom.args, **recom.kwargs)
     assert value < .2  # should be large enough by an order of magnitude
+
+
+@pytest.mark.parametrize("policy", ["ucb", "thompson"])  # type: ignore
+def test_bandit_portfolio_allocation(policy: str) -> None:
+    np.random.seed(12)
+    family = optimizerlib.ParametrizedBanditPortfolio(optimizers=("Zero", "OnePlusOne"), policy=policy)
+    optim = family(instrumentation=2, budget=200, num_workers=2)
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=base.InefficientSettingsWarning)
+        optim.optimize(Fitness([.5, -.8]))
+    asks = optim._asks  # type: ignore
+    assert sum(asks) == 200
+    assert asks[1] > 3 * asks[0], f"Zero optimizer was not discarded: {asks}"
+    assert sum(o.num_tell for o in optim.optims) == 200  # type: ignore
+
+
+def test_bandit_portfolio_without_budget() -> None:
+    optim = optimizerlib.BanditPortfolio(instrumentation=2, budget=None)
+    assert not optim.optims  # type: ignore  # only created on first ask, from the parameters
+    for _ in range(10):
+        candidate = optim.ask()
+        optim.tell(candidate, float(np.sum(candidate.data**2)))
+    np.testing.assert_equal(len(optim.optims), 3)  # type: ignore
+
+
+def test_bandit_portfolio_elimination() -> None:
+    family = optimizerlib.ParametrizedBanditPortfolio(optimizers=("Zero", "OnePlusOne", "RandomSearch"), elimination=True)
+    optim = family(instrumentation=2, budget=1000)
+    optim._initialize_optims()  # type: ignore
+    optim._asks = np.array([400., 400., 5.])  # type: ignore
+    optim._tells = np.array([400., 400., 5.])  # type: ignore
+    optim._rewards = np.array([0., 80., 0.])  # type: ignore
+    optim._eliminate()  # type: ignore
+    np.testing.assert_array_equal(optim._active, [False, True, True])  # type: ignore  # not enough evaluations for the last one
+    assert optim._select_optim() != 0  # type: ignore  # Zero is not selected anymore
+
+
+def test_portfolio_tell_not_asked() -> None:
+    optim = optimizerlib.ASCMADEthird(instrumentation=2, budget=30)
+    asked = optim.ask()
+    optim.tell(optim.create_candidate.from_data([.5, -.8]), 0.)  # broadcast to all sub-optimizers
+    optim.tell(asked, 12.)
+    assert not optim.who_asked
+    assert optim.num_tell_not_asked == 1
+    assert [o.num_tell for o in optim.optims] == [2, 1]  # type: ignore  # first ask is provided by CMA
+
+
+@pytest.mark.parametrize("name", ["Portfolio", "ASCMADEthird", "BanditPortfolio"])  # type: ignore
+def test_portfolio_member_threads(name: str) -> None:
+    optim = optimizerlib.registry[name](instrumentation=2, budget=60, num_workers=2)
+    assert optim.enable_member_threads() is optim  # type: ignore
+    optim.optimize(Fitness([.5, -.8]))
+    assert not optim._executors and not optim._tell_jobs  # type: ignore  # closed at the end of optimize
+    assert all(job.done() for job in optim._prefetched.values())  # type: ignore
+    assert sum(o.num_tell for o in optim.optims) == 60  # type: ignore
+    assert not optim.who_asked  # type: ignore
+    # errors of the last tells are raised when closing
+    candidate = optim.ask()
+    with patch.object(optim.optims[optim.who_asked[candidate.uuid]], "tell", side_effect=ValueError):  # type: ignore
+        optim.tell(candidate, 12.)
+        np.testing.assert_raises(ValueError, optim.close_member_threads)  # type: ignore
+    assert not optim._executors  # type: ignore
+
+
+@pytest.mark.parametrize("rule", ["racing", "ucb"])  # type: ignore
+@pytest.mark.parametrize("name", ["NoisyOnePlusOne", "NoisyBandit", "NoisyDE"])  # type: ignore
+def test_reevaluation_scheduler_opt_in(name: str, rule: str) -> None:
+    np.random.seed(12)
+    assert registry[name](instrumentation=2, budget=50)._scheduler is None  # deactivated by default
+    optim: base.Optimizer
+    if name == "NoisyBandit":
+        optim = optimizerlib.NoisyBandit(instrumentation=2, budget=300, reevaluation=rule)
+    elif name == "NoisyDE":
+        optim = optimizerlib.DifferentialEvolution(recommendation="noisy", reevaluation=rule)(instrumentation=2, budget=300)
+    else:
+        optim = optimizerlib.ParametrizedOnePlusOne(noise_handling="random", reevaluation=rule)(instrumentation=2, budget=300)
+    optim.optimize(lambda x: float(np.sum((x - .5)**2) + np.random.normal(0, .1)))
+    assert optim._scheduler is not None
+    assert optim.num_tell == 300
+    assert any(value.count > 1 for value in optim.archive.values())
+
+
+def test_surrogate_screened() -> None:
+    np.random.seed(12)
+    family = optimizerlib.SurrogateScreened(optimizerlib.OnePlusOne, oversample=3, warmup=10)
+    np.testing.assert_equal(repr(family), "SurrogateScreened(optimizer=OnePlusOne, oversample=3)")
+    optim = family(instrumentation=2, budget=30)
+    recom = optim.optimize(Fitness([.5, -.8]))
+    assert optim.optim.num_ask == optim.optim.num_tell == 10 + 20 * 3  # type: ignore
+    assert optim.surrogate.num_points == 30  # type: ignore
+    # the recommendation is based on actual evaluations only
+    assert recom.data.tobytes() in optim.archive.bytesdict
+
+
+def test_discrete_one_plus_one_native_domain() -> None:
+    np.random.seed(12)
+    instrumentation = inst.Instrumentation(inst.var.Integer(0, 20), inst.var.Choice(["a", "b", "c"]))
+    optim = optimizerlib.DiscreteOnePlusOne(instrumentation=instrumentation, budget=100)
+    recom = optim.optimize(lambda x, y: abs(x - 13) + int(y != "b"))
+    np.testing.assert_equal(recom.args, (13, "b"))
+    # variables without a specific mutation keep the usual discrete mutation
+    instrumentation = inst.Instrumentation(inst.var.SoftmaxCategorical(["a", "b"]), inst.var.Gaussian(0, 1), 12)
+    assert not optimizerlib.DiscreteOnePlusOne(instrumentation=instrumentation, budget=10)._structured  # type: ignore
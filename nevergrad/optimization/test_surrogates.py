@@ -0,0 +1,80 @@
+# Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import pytest
+import numpy as np
+from . import surrogates
+
+
+def test_gaussian_process_incremental_cholesky() -> None:
+    np.random.seed(12)
+    gp = surrogates.GaussianProcess(dimension=3)
+    points = np.random.uniform(0, 1, size=(40, 3))
+    for x in points:
+        gp.add(x, float(np.sum(x**2)))
+    kernel = surrogates.matern52(points, points, gp.length_scale) + gp.noise * np.eye(40)
+    chol = gp._chol[:40, :40]
+    np.testing.assert_array_almost_equal(chol.dot(chol.T), kernel)
+    mean, std = gp.predict(points)
+    np.testing.assert_array_almost_equal(mean, np.sum(points**2, axis=1), decimal=3)
+    np.testing.assert_array_less(std, .01)
+
+
+def test_gaussian_process_pending() -> None:
+    np.random.seed(12)
+    gp = surrogates.GaussianProcess(dimension=2)
+    for x in np.random.uniform(0, 1, size=(10, 2)):
+        gp.add(x, float(np.sum(x)))
+    query = np.array([[.5, .5], [.9, .1]])
+    mean, std = gp.predict(query)
+    pending_mean, pending_std = gp.predict(query, pending=query[:1])
+    np.testing.assert_array_almost_equal(mean, pending_mean)  # kriging believer
+    assert pending_std[0] < .1 * std[0]
+    assert pending_std[1] <= std[1]
+
+
+def test_gaussian_process_rank_warping() -> None:
+    gp = surrogates.GaussianProcess(dimension=1, rank_warping=True)
+    for x, value in [(.1, 1.), (.5, 2.), (.9, 1e12)]:
+        gp.add(np.array([x]), value)
+    mean, _ = gp.predict(np.array([[.1], [.5], [.9]]))
+    np.testing.assert_array_almost_equal(mean, [-.9674, 0, .9674], decimal=4)
+
+
+def test_minimize_batch_function() -> None:
+    np.random.seed(12)
+    optimum = np.array([.2, .7, .4])
+    output = surrogates.minimize_batch_function(lambda x: np.sum((x - optimum)**2, axis=1), 3, centers=np.array([[.5, .5, .5]]))
+    np.testing.assert_array_almost_equal(output, optimum, decimal=3)
+
+
+@pytest.mark.parametrize("name", [name for name in surrogates.models])  # type: ignore
+def test_surrogate_models(name: str) -> None:
+    np.random.seed(12)
+    model = surrogates.models[name](dimension=2)
+    mean, std = model.predict(np.array([[.5, .5]]))  # prior
+    np.testing.assert_array_equal(mean, [0])
+    np.testing.assert_array_equal(std, [1])
+    points = np.random.uniform(0, 1, size=(300, 2))
+    for x in points:
+        model.add(x, float(np.sum((x - .5)**2)))
+    assert model.num_points == 300
+    assert 0 < model.rank <= 300
+    query = np.random.uniform(0, 1, size=(50, 2))
+    mean, std = model.predict(query)
+    assert mean.shape == std.shape == (50,)
+    np.testing.assert_array_less(np.abs(mean - np.sum((query - .5)**2, axis=1)), .02)
+    np.testing.assert_array_less(std, .1)
+    _, pending_std = model.predict(query, pending=query[:5])
+    np.testing.assert_array_less(pending_std, std + 1e-10)
+
+
+def test_sparse_gaussian_process_rank() -> None:
+    np.random.seed(12)
+    model = surrogates.SparseGaussianProcess(dimension=2, num_features=20)
+    for x in np.random.uniform(0, 1, size=(100, 2)):
+        model.add(x, float(np.sum(x)))
+    assert model.rank == 20
+    assert model._gram.shape == (20, 20)
@@ -3,12 +3,20 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import sys
+import tempfile
+import warnings
+from pathlib import Path
+from typing import List
 import pytest
 import numpy as np
 from ..common import testing
 from .test_base import CounterFunction
 from .optimizerlib import Zero
+from . import optimizerlib
+from .journal import Journal
 from . import utils
+from . import base
 
 
 def test_value_and_point() -> None:
@@ -31,6 +39,28 @@ def test_value_and_point() -> None:
     np.testing.assert_raises(AssertionError, utils.Point, (0, 0), 3)
 
 
+@pytest.mark.parametrize("name", ["optimistic", "pessimistic", "average"])  # type: ignore
+def test_get_estimations(name: str) -> None:
+    np.random.seed(12)
+    values = []
+    for k in range(1, 5):
+        value = utils.Value(np.random.normal())
+        for _ in range(k - 1):
+            value.add_evaluation(np.random.normal())
+        values.append(value)
+    np.testing.assert_array_almost_equal(utils.get_estimations(values, name), [v.get_estimation(name) for v in values])
+
+
+def test_value_welford() -> None:
+    value = utils.Value(1e9 + 4)
+    for y in [1e9 + 7, 1e9 + 13, 1e9 + 16]:
+        value.add_evaluation(y)
+    np.testing.assert_equal(value.mean, 1e9 + 10)
+    np.testing.assert_equal(value._m2, 90)
+    value.add_evaluation(float("inf"))
+    np.testing.assert_equal(value.mean, float("inf"))
+
+
 def test_sequential_executor() -> None:
     func = CounterFunction()
     executor = utils.SequentialExecutor()
@@ -45,6 +75,34 @@ def test_sequential_executor() -> None:
     np.testing.assert_equal(func.count, 2)
 
 
+def test_evaluation_cache() -> None:
+    cache = utils.EvaluationCache(max_size=2)
+    keys = [cache.get_key(base.Candidate((k,), {"y": "a"}, [k])) for k in range(3)]
+    assert cache.get(keys[0]) is None
+    for k, key in enumerate(keys[:2]):
+        cache[key] = k
+    np.testing.assert_equal(cache.get(keys[0]), 0)  # refreshes key 0
+    cache[keys[2]] = 2
+    assert cache.get(keys[1]) is None  # evicted
+    np.testing.assert_equal([cache.get(keys[0]), cache.get(keys[2])], [0, 2])
+    np.testing.assert_equal([cache.hits, cache.misses], [3, 2])
+    # unpicklable arguments fall back to the data
+    candidates = [base.Candidate((lambda x: x,), {}, [.1 + 1e-15 * k]) for k in range(2)]
+    assert cache.get_key(candidates[0]) == cache.get_key(candidates[1])
+
+
+def test_evaluation_cache_persistence() -> None:
+    key = utils.EvaluationCache().get_key(base.Candidate((12,), {}, [0.]))
+    with tempfile.TemporaryDirectory() as folder:
+        filepath = Path(folder) / "cache.sqlite"
+        cache = utils.EvaluationCache(filepath=filepath)
+        cache[key] = 3.
+        cache.close()
+        cache = utils.EvaluationCache(filepath=filepath)
+        np.testing.assert_equal(cache.get(key), 3.)
+        cache.close()
+
+
 def test_get_nash() -> None:
     zeroptim = Zero(instrumentation=1, budget=4, num_workers=1)
     for k in range(4):
@@ -76,6 +134,42 @@ def test_archive() -> None:
     str(archive)
 
 
+def test_archive_sampling() -> None:
+    np.random.seed(12)
+    archive = utils.Archive[utils.Value]()
+    for k in range(6):
+        archive[(float(k),)] = utils.Value(float(k))
+    keys = list(archive.bytesdict)
+    np.random.seed(12)
+    expected = [keys[np.random.choice(len(keys))] for _ in range(5)]
+    np.random.seed(12)
+    np.testing.assert_equal([archive.sample_key() for _ in range(5)], expected)  # same as former implementation
+    del archive[(1.,)]
+    archive.set_weight((0.,), 0)
+    archive.set_weight((2.,), 3)
+    archive[(6.,)] = utils.Value(6.)
+    assert archive._keys[1] == archive._tobytes((5.,))  # swap-removed
+    samples = [archive.sample(weighted=True)[0] for _ in range(2000)]
+    counts = {x: samples.count(x) for x in set(samples)}
+    assert set(counts) == {2, 3, 4, 5, 6}
+    np.testing.assert_almost_equal(counts[2] / 2000., 3. / 7, decimal=1)
+    # direct modifications of the bytesdict are handled
+    archive.bytesdict = {archive._tobytes((12.,)): utils.Value(12.)}
+    np.testing.assert_equal(archive.sample(weighted=True), [12.])
+
+
+def test_fenwick_tree() -> None:
+    tree = utils._FenwickTree([1., 0., 2., 3., 4.])
+    np.testing.assert_equal(tree.total, 10)
+    np.testing.assert_equal([tree.find(x) for x in [0, .99, 1, 2.9, 3, 5.9, 6, 9.9]], [0, 0, 2, 2, 3, 3, 4, 4])
+    for k in range(5, 12):
+        tree[k] = 1.
+    tree[0] = 0.
+    np.testing.assert_equal(tree.total, 16)
+    np.testing.assert_equal(tree.pop(), 1)
+    np.testing.assert_equal([tree.total, tree.find(0), tree.find(14.5)], [15, 2, 10])
+
+
 def test_archive_errors() -> None:
     archive = utils.Archive[float]()
     archive[[12, 0.]] = 12.
@@ -131,6 +225,33 @@ def test_population_replace() -> None:
         pop[uuid]  # pylint: disable= pointless-statement
 
 
+def test_archive_index() -> None:
+    archive = utils.Archive[utils.Value]()
+    for k in range(100):
+        archive[np.array([float(k), 0.])] = utils.Value(float(k))
+    archive.enable_index()
+    archive[np.array([50.2, 1.])] = utils.Value(-1.)
+    del archive[np.array([51., 0.])]
+    output = archive.nearest([50.6, 0], k=3)
+    np.testing.assert_array_equal([v.mean for _, v in output], [50, -1, 52])
+    np.testing.assert_array_equal(output[0][0], [50, 0])
+    np.testing.assert_array_equal([v.mean for _, v in archive.within([1.5, 0], 1)], [1, 2])
+
+
+def test_archive_nbytes() -> None:
+    archive = utils.Archive[utils.Value]()
+    empty = archive.nbytes
+    for k in range(100):
+        archive[np.array([float(k), 0.])] = utils.Value(float(k))
+    nbytes = archive.nbytes
+    assert nbytes > empty + 100 * (sys.getsizeof(next(iter(archive.bytesdict))) + sys.getsizeof(utils.Value(0.)))
+    archive.set_weight(np.array([1., 0.]), 2.)  # the tree of weights is counted
+    with_weights = archive.nbytes
+    assert with_weights > nbytes + 100 * sys.getsizeof(0.)
+    archive.enable_index()  # the points of the index are counted
+    assert archive.nbytes > with_weights + archive.index._points.nbytes  # type: ignore
+
+
 def test_pruning() -> None:
     archive = utils.Archive[utils.Value]()
     for k in range(3):
@@ -147,6 +268,124 @@ def test_pruning() -> None:
         testing.assert_set_equal([x[0] for x in archive.keys_as_array()], [0, 3], err_msg=f"Repetition #{k+1}")
 
 
+def test_pruning_incremental() -> None:
+    np.random.seed(12)
+    pruning = utils.Pruning(min_len=3, max_len=20)
+    archive = utils.Archive[utils.Value]()
+    values = np.random.rand(200)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        for k, value in enumerate(values):
+            archive[(float(k),)] = utils.Value(value)
+            archive = pruning.add(archive, (float(k),))
+            assert len(archive) < 20
+            expected = set(np.argsort(values[:k + 1])[:3])
+            assert expected.issubset({x[0] for x in archive.keys_as_array()})
+    assert caught is not None
+    np.testing.assert_equal(len(caught), 1)  # only warned once
+
+
+def test_pruning_noisy_optimization() -> None:
+    np.random.seed(12)
+    optimizer = optimizerlib.NoisyOnePlusOne(instrumentation=1, budget=1000)
+    optimizer.pruning = utils.Pruning(min_len=5, max_len=30)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        optimizer.optimize(lambda x: float(np.round(x[0]**2 + np.random.normal(0, .1), 1)))
+    assert len(optimizer.archive) < 30
+    for name, point in optimizer.current_bests.items():
+        assert point.x in optimizer.archive
+        np.testing.assert_equal(point.get_estimation(name), min(v.get_estimation(name) for v in optimizer.archive.values()))
+
+
+def test_custom_pruning_callable() -> None:
+    optimizer = optimizerlib.OnePlusOne(instrumentation=1, budget=20)
+    sizes: List[int] = []
+
+    def pruning(archive: utils.Archive[utils.Value]) -> utils.Archive[utils.Value]:  # former protocol still works
+        sizes.append(len(archive))
+        return archive
+
+    optimizer.pruning = pruning
+    optimizer.optimize(lambda x: float(x[0]**2))
+    np.testing.assert_equal(len(sizes), 20)
+
+
+def test_pruning_journal() -> None:
+    archive = utils.Archive[utils.Value]()
+    with tempfile.TemporaryDirectory() as folder:
+        filepath = Path(folder) / "pruned.journal"
+        with Journal(filepath, dimension=1) as journal:
+            pruning = utils.Pruning(min_len=1, max_len=3, journal=journal)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                for k in range(6):
+                    archive[(float(k),)] = utils.Value(float(k))
+                    archive = pruning.add(archive, (float(k),))
+        records = Journal.read(filepath)
+        np.testing.assert_array_equal(records["value"], [1, 2, 3, 4])
+        np.testing.assert_array_equal(records["data"].ravel(), [1, 2, 3, 4])
+        del records
+    testing.assert_set_equal([x[0] for x in archive.keys_as_array()], [0, 5])
+
+
+@pytest.mark.parametrize("dtype,decimal", [("float64", 12), ("float32", 6), ("float16", 2), ("int8", 1)])  # type: ignore
+def test_archive_dtype(dtype: str, decimal: int) -> None:
+    archive = utils.Archive[utils.Value](dtype=dtype, scale=[.1, .05])
+    x = np.array([1.2345678, -2.3456789])
+    archive[x] = utils.Value(12)
+    assert x in archive
+    output = next(archive.keys_as_array())
+    np.testing.assert_array_almost_equal(output, x, decimal=decimal)
+    assert output in archive
+    np.testing.assert_equal(len(next(iter(archive.bytesdict))), 2 * {"float64": 8, "float32": 4, "float16": 2, "int8": 1}[dtype])
+
+
+def test_pruning_max_bytes() -> None:
+    archives = {dtype: utils.Archive[utils.Value](dtype=dtype) for dtype in ["float64", "int8"]}
+    for dtype, archive in archives.items():
+        pruning = utils.Pruning(min_len=1, max_len=100000, max_bytes=20000)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            for k in range(500):
+                x = np.random.uniform(-3, 3, size=100)
+                archive[x] = utils.Value(float(k))
+                archive = pruning.add(archive, x)
+        assert archive.nbytes <= 20000
+    assert len(archives["int8"]) > 2 * len(archives["float64"])
+    assert min(v.mean for v in archives["int8"].values()) == 0
+
+
+def test_optimizer_archive_storage() -> None:
+    optimizer = optimizerlib.OnePlusOne(instrumentation=100, budget=200)
+    assert optimizer.set_archive_storage(dtype="int8", max_bytes=20000) is optimizer
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        optimizer.optimize(lambda x: float(np.sum(x**2)))
+    np.testing.assert_equal(optimizer.archive.dtype, "int8")
+    assert optimizer.archive.nbytes <= 20000
+    np.testing.assert_raises(RuntimeError, optimizer.set_archive_storage, dtype="float32")
+
+
+@pytest.mark.parametrize("rule,expected", [("racing", 3.), ("ucb", 2.)])  # type: ignore
+def test_reevaluation_scheduler(rule: str, expected: float) -> None:
+    archive = utils.Archive[utils.Value]()
+    scheduler = utils.ReevaluationScheduler(rule=rule)
+    evaluations = {0.: [0., .4, .2, .2], 1.: [10.], 2.: [.1, -.1], 3.: [.5], 4.: [.4, .4, .4, .3]}
+    for x, values in evaluations.items():
+        archive[(x,)] = utils.Value(values[0])
+        for value in values[1:]:
+            archive[(x,)].add_evaluation(value)
+        scheduler.update(archive._tobytes((x,)), archive[(x,)])
+    best = utils.Point((0.,), archive[(0.,)])
+    np.testing.assert_almost_equal(scheduler.sigma, .1239, decimal=4)
+    output = scheduler.choose(archive, best)
+    np.testing.assert_array_equal(output, [expected])  # 1. is too bad to be reevaluated
+    # removed points are ignored
+    del archive[(expected,)]
+    assert scheduler.choose(archive, best) != [expected]
+
+
 @pytest.mark.parametrize("dimension,expected_max", [(100, 1342177), (10000, 13421), (1000000, 1080)])  # type: ignore
 def test_pruning_sensible_default(dimension: int, expected_max: int) -> None:
     pruning = utils.Pruning.sensible_default(num_workers=12, dimension=dimension)
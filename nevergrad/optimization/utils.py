@@ -3,14 +3,22 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import pickle
+import sqlite3
+import sys
+import math
+import heapq
 import warnings
 import operator
+from pathlib import Path
 from uuid import uuid4
-from collections import OrderedDict, defaultdict
+from collections import OrderedDict, defaultdict, deque
 from typing import (Tuple, Any, Callable, List, Optional, Dict, ValuesView, Iterator,
                     TypeVar, Generic, Union, Deque, Iterable)
 import numpy as np
 from ..common.typetools import ArrayLike
+from ..common import tools
+from . import neighbors
 
 
 class Value:
@@ -27,22 +35,38 @@ class Value:
     ---------
     y: float
         the first evaluation of the value
+
+    Note
+    ----
+    The statistics are updated with Welford's algorithm for numerical stability.
+    Use get_estimations to compute the estimations of many values at once.
     """
 
+    __slots__ = ("count", "mean", "_m2")
+
     def __init__(self, y: float) -> None:
         self.count = 1
         self.mean = y
-        self.square = y * y
-        # TODO May be safer to use a default variance which depends on y for scale invariance?
-        self.variance = 1.e6
+        self._m2 = 0.  # sum of squared differences to the mean
+
+    @property
+    def square(self) -> float:
+        return self._m2 / self.count + self.mean * self.mean
+
+    @property
+    def variance(self) -> float:
+        if self.count == 1:
+            # TODO May be safer to use a default variance which depends on y for scale invariance?
+            return 1.e6
+        return math.sqrt(self.count / (self.count - 1.)) * self._m2 / self.count
 
     @property
     def optimistic_confidence_bound(self) -> float:
-        return float(self.mean - .1 * np.sqrt((self.variance) / (1 + self.count)))
+        return float(self.mean - .1 * math.sqrt(self.variance / (1 + self.count)))
 
     @property
     def pessimistic_confidence_bound(self) -> float:
-        return float(self.mean + .1 * np.sqrt((self.variance) / (1 + self.count)))
+        return float(self.mean + .1 * math.sqrt(self.variance / (1 + self.count)))
 
     def get_estimation(self, name: str) -> float:
         # Note: pruning below relies on the fact than only 3 modes exist. If a new mode is added, update pruning
@@ -63,17 +87,44 @@ class Value:
         y: float
             the new evaluation
         """
-        self.mean = (self.count * self.mean + y) / float(self.count + 1)
-        self.square = (self.count * self.square + y * y) / float(self.count + 1)
-        self.square = max(self.square, self.mean**2)
         self.count += 1
-        factor: float = np.sqrt(float(self.count) / float(self.count - 1.))
-        self.variance = factor * (self.square - self.mean**2)
+        if math.isfinite(y) and math.isfinite(self.mean):
+            delta = y - self.mean
+            self.mean += delta / self.count
+            self._m2 += delta * (y - self.mean)
+        else:  # Welford's update would yield nan for the mean
+            self.mean = ((self.count - 1) * self.mean + y) / self.count
+            self._m2 = float("nan")
 
     def __repr__(self) -> str:
         return "Value<mean: {}, count: {}>".format(self.mean, self.count)
 
 
+def get_estimations(values: Iterable[Value], name: str) -> np.ndarray:
+    """Computes the estimations of a sequence of values at once
+    (equivalent to np.array([v.get_estimation(name) for v in values]))
+
+    Parameters
+    ----------
+    values: iterable of Value
+        the values for which to compute the estimations
+    name: str
+        name of the estimation ("optimistic", "pessimistic" or "average")
+    """
+    values = list(values)
+    means = np.fromiter((v.mean for v in values), dtype=float, count=len(values))
+    if name == "average":
+        return means
+    if name not in ("optimistic", "pessimistic"):
+        raise NotImplementedError
+    counts = np.fromiter((v.count for v in values), dtype=float, count=len(values))
+    m2s = np.fromiter((v._m2 for v in values), dtype=float, count=len(values))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variances = np.where(counts == 1, 1.e6, np.sqrt(counts / (counts - 1)) * m2s / counts)
+    sign = -1 if name == "optimistic" else 1
+    return means + sign * .1 * np.sqrt(variances / (1 + counts))  # type: ignore
+
+
 class Point(Value):
     """Coordinates and estimation of a point in space.
     This class provides easy access to:
@@ -93,13 +144,14 @@ class Point(Value):
         the value estimation instance
     """
 
+    __slots__ = ("x",)
+
     def __init__(self, x: ArrayLike, value: Value) -> None:
         assert isinstance(value, Value)
         super().__init__(value.mean)
-        self.__dict__.update(value.__dict__)
+        self.count, self._m2 = value.count, value._m2
         assert not isinstance(x, (str, bytes))
-        self.x = np.array(x, copy=True)  # copy to avoid interfering with algorithms
-        self.x.flags.writeable = False  # make sure it is not modified!
+        self.x = tools.readonly(x)  # copy if writeable, to avoid interfering with algorithms
 
     def __repr__(self) -> str:
         return "Point<x: {}, mean: {}, count: {}>".format(self.x, self.mean, self.count)
@@ -117,7 +169,7 @@ def _get_nash(optimizer: Any) -> List[Tuple[Tuple[float, ...], int]]:
     if threshold <= np.power(sum_num_trial, .25):
         return [(optimizer.provide_recommendation(), 1)]
     # make deterministic at the price of sort complexity
-    return sorted(((np.frombuffer(k), p.count) for k, p in optimizer.archive.bytesdict.items() if p.count >= threshold),
+    return sorted(((optimizer.archive.key_to_array(k), p.count) for k, p in optimizer.archive.bytesdict.items() if p.count >= threshold),
                   key=operator.itemgetter(1))
 
 
@@ -161,6 +213,104 @@ class SequentialExecutor:
         return DelayedJob(fn, *args, **kwargs)
 
 
+class FinishedJob:
+    """Future-like object holding an already available result
+    """
+
+    def __init__(self, result: Any) -> None:
+        self._result = result
+
+    def done(self) -> bool:
+        return True
+
+    def result(self) -> Any:
+        return self._result
+
+
+class EvaluationCache:
+    """Memoization of the objective function values, for deterministic functions.
+    See the cache parameter of Optimizer.optimize.
+
+    Parameters
+    ----------
+    max_size: int
+        maximum number of values kept in memory (least recently used ones are evicted first).
+    filepath: str or Path, optional
+        path to a SQLite database file in which all values are persisted (and which is used
+        as fallback when a value was evicted from memory). This allows sharing values between runs.
+    decimals: int
+        number of decimals of the data used for the key when the arguments cannot be pickled.
+
+    Note
+    ----
+    Keys are the pickled args and kwargs of the candidates, so that different data yielding the
+    same arguments (eg: through discrete instrumentations) share the same value.
+    """
+
+    def __init__(self, max_size: int = 100000, filepath: Optional[Union[str, Path]] = None, decimals: int = 12) -> None:
+        assert max_size > 0
+        self.max_size = max_size
+        self.decimals = decimals
+        self.hits = 0
+        self.misses = 0
+        self._values: "OrderedDict[bytes, float]" = OrderedDict()
+        self._connection: Optional[sqlite3.Connection] = None
+        if filepath is not None:
+            self._connection = sqlite3.connect(str(filepath), check_same_thread=False)
+            self._connection.execute("CREATE TABLE IF NOT EXISTS cache (key BLOB PRIMARY KEY, value REAL)")
+            self._connection.commit()
+
+    def get_key(self, candidate: Any) -> bytes:
+        """Key of a candidate (with args, kwargs and data attributes)
+        """
+        try:
+            return b"a" + pickle.dumps((candidate.args, sorted(candidate.kwargs.items())), protocol=4)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            data = np.round(np.asarray(candidate.data, dtype=float), self.decimals) + 0.  # avoid -0.
+            return b"d" + data.tobytes()
+
+    def get(self, key: bytes) -> Optional[float]:
+        """Value for the key if available, None otherwise
+        """
+        value = self._values.get(key)
+        if value is not None:
+            self._values.move_to_end(key)
+        elif self._connection is not None:
+            row = self._connection.execute("SELECT value FROM cache WHERE key=?", (key,)).fetchone()
+            if row is not None:
+                value = row[0]
+                self._store(key, value)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def _store(self, key: bytes, value: float) -> None:
+        self._values[key] = value
+        self._values.move_to_end(key)
+        while len(self._values) > self.max_size:
+            self._values.popitem(last=False)
+
+    def __setitem__(self, key: bytes, value: float) -> None:
+        value = float(value)
+        self._store(key, value)
+        if self._connection is not None:
+            self._connection.execute("INSERT OR REPLACE INTO cache VALUES (?, ?)", (key, value))
+            self._connection.commit()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __repr__(self) -> str:
+        return f"EvaluationCache(max_size={self.max_size}, len={len(self)}, hits={self.hits}, misses={self.misses})"
+
+
 def _tobytes(x: ArrayLike) -> bytes:
     x = np.array(x, copy=False)  # for compatibility
     assert x.ndim == 1, f"Input shape: {x.shape}"
@@ -170,33 +320,255 @@ def _tobytes(x: ArrayLike) -> bytes:
 
 _ERROR_STR = ("Generating numpy arrays from the bytes keys is inefficient, "
               "work on archive.bytesdict.<keys,items>() directly and convert with "
-              "np.frombuffer if you can. You can also use archive.<keys,items>_as_arrays() "
+              "archive.key_to_array if you can. You can also use archive.<keys,items>_as_arrays() "
               "but it is less efficient.")
 
 
 Y = TypeVar("Y")
 
 
+class _FenwickTree:
+    """Binary indexed tree of non-negative weights, for O(log(n)) updates and weighted sampling
+    """
+
+    def __init__(self, weights: Iterable[float]) -> None:
+        self._weights = [float(w) for w in weights]
+        self._size = 1
+        while self._size < len(self._weights):
+            self._size *= 2
+        self._tree = [0.] * (self._size + 1)
+        for k in range(1, self._size + 1):  # O(n) construction
+            if k <= len(self._weights):
+                self._tree[k] += self._weights[k - 1]
+            parent = k + (k & -k)
+            if parent <= self._size:
+                self._tree[parent] += self._tree[k]
+
+    @property
+    def total(self) -> float:
+        return self._tree[self._size]
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the weights and tree lists, including their float objects
+        """
+        num_floats = len(self._weights) + len(self._tree)
+        return sys.getsizeof(self._weights) + sys.getsizeof(self._tree) + num_floats * sys.getsizeof(0.)
+
+    def __getitem__(self, index: int) -> float:
+        return self._weights[index]
+
+    def __setitem__(self, index: int, weight: float) -> None:
+        if index == len(self._weights):
+            if index == self._size:
+                self.__init__(self._weights + [weight])  # type: ignore
+                return
+            self._weights.append(0.)
+        delta = float(weight) - self._weights[index]
+        self._weights[index] = float(weight)
+        k = index + 1
+        while k <= self._size:
+            self._tree[k] += delta
+            k += k & -k
+
+    def pop(self) -> float:
+        weight = self._weights[-1]
+        self[len(self._weights) - 1] = 0.
+        self._weights.pop()
+        return weight
+
+    def find(self, target: float) -> int:
+        """Index k such that the cumulated weights up to k (excluded) are <= target < cumulated weights up to k (included)
+        """
+        index = 0
+        step = self._size
+        while step:
+            if index + step <= self._size and self._tree[index + step] <= target:
+                index += step
+                target -= self._tree[index]
+            step //= 2
+        return min(index, len(self._weights) - 1)
+
+
 class Archive(Generic[Y]):
     """A dict-like object with numpy arrays as keys.
     The underlying `bytesdict` dict stores the arrays as bytes since arrays are not hashable.
-    Keys can be converted back with np.frombuffer(key)
+    Keys can be converted back with archive.key_to_array(key) (or np.frombuffer(key) for the default float64 dtype)
+
+    Parameters
+    ----------
+    dtype: str
+        storage type of the keys, among "float64" (exact), "float32", "float16" and "int8" (quantized
+        with a per-dimension scale). Arrays which are equal after conversion share the same key.
+    scale: float or array-like
+        quantization step of each dimension for the "int8" dtype (coordinates are clipped
+        to +/-127 times the scale).
+
+    Note
+    ----
+    - A spatial index can be activated with archive.enable_index() for proximity
+      queries (see methods nearest and within).
+    - A dense list of the keys is maintained for uniform or weighted random sampling
+      (see methods sample and set_weight).
     """
 
-    def __init__(self) -> None:
+    def __init__(self, dtype: str = "float64", scale: Union[float, ArrayLike] = 1. / 32) -> None:
+        if dtype not in ("float64", "float32", "float16", "int8"):
+            raise ValueError(f"Unsupported archive dtype {dtype}")
+        self.dtype = dtype
+        self.scale = np.array(scale, dtype=float)
         self.bytesdict: Dict[bytes, Y] = {}
+        self._entry_nbytes: Optional[int] = None
+        self.index: Optional[neighbors.NeighborIndex] = None
+        self._keys: List[bytes] = []  # dense list of the keys, for sampling
+        self._positions: Dict[bytes, int] = {}
+        self._weights: Optional[_FenwickTree] = None  # only created when a weight is set
+        self._tobytes: Callable[[ArrayLike], bytes] = _tobytes if dtype == "float64" else self._convert
+
+    def _convert(self, x: ArrayLike) -> bytes:
+        x = np.array(x, copy=False, dtype=float)
+        assert x.ndim == 1, f"Input shape: {x.shape}"
+        if self.dtype == "int8":
+            return np.clip(np.round(x / self.scale), -127, 127).astype(np.int8).tobytes()  # type: ignore
+        return x.astype(self.dtype).tobytes()  # type: ignore
+
+    def key_to_array(self, key: bytes) -> np.ndarray:
+        """Converts a key of the bytesdict back to a float64 array
+        """
+        if self.dtype == "float64":
+            return np.frombuffer(key)
+        array = np.frombuffer(key, dtype=self.dtype).astype(float)
+        return array * self.scale if self.dtype == "int8" else array  # type: ignore
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the archive, counting:
+        - the bytesdict with its keys and values (the size of the first entry is used as reference for all entries),
+        - the dense list of keys and the dict of their positions, used for sampling (keys are shared with the bytesdict),
+        - the tree of sampling weights, if any weight was set,
+        - the points, mask and key bookkeeping of the spatial index, if enabled (see NeighborIndex.nbytes).
+        The structures specific to each type of spatial index (KD-trees, hash tables) are not counted.
+        """
+        if self._entry_nbytes is None and self.bytesdict:
+            key, value = next(iter(self.bytesdict.items()))
+            self._entry_nbytes = sys.getsizeof(key) + sys.getsizeof(value)
+            if hasattr(value, "__dict__"):  # no __slots__
+                self._entry_nbytes += sys.getsizeof(value.__dict__)
+        nbytes = sys.getsizeof(self.bytesdict) + len(self.bytesdict) * (self._entry_nbytes or 0)
+        nbytes += sys.getsizeof(self._keys) + sys.getsizeof(self._positions) + len(self._positions) * sys.getsizeof(len(self._keys))
+        if self._weights is not None:
+            nbytes += self._weights.nbytes
+        if self.index is not None:
+            nbytes += self.index.nbytes
+        return nbytes
 
     def __setitem__(self, x: ArrayLike, value: Y) -> None:
-        self.bytesdict[_tobytes(x)] = value
+        key = self._tobytes(x)
+        if key not in self.bytesdict:
+            if self.index is not None:
+                self.index.add(key, self.key_to_array(key))
+            if len(self._keys) == len(self.bytesdict):  # otherwise the bytesdict was modified directly
+                self._positions[key] = len(self._keys)
+                self._keys.append(key)
+                if self._weights is not None:
+                    self._weights[len(self._keys) - 1] = 1.
+        self.bytesdict[key] = value
 
     def __getitem__(self, x: ArrayLike) -> Y:
-        return self.bytesdict[_tobytes(x)]
+        return self.bytesdict[self._tobytes(x)]
+
+    def __delitem__(self, x: ArrayLike) -> None:
+        self.pop_key(self._tobytes(x))
+
+    def pop_key(self, key: bytes) -> Y:
+        """Removes a key of the bytesdict and returns its value
+        """
+        if self.index is not None:
+            self.index.remove(key)
+        value = self.bytesdict.pop(key)
+        if len(self._keys) == len(self.bytesdict) + 1:  # swap-remove from the dense list
+            position = self._positions.pop(key)
+            last = self._keys.pop()
+            weight = None if self._weights is None else self._weights.pop()
+            if last != key:
+                self._keys[position] = last
+                self._positions[last] = position
+                if self._weights is not None:
+                    self._weights[position] = weight  # type: ignore
+        return value
+
+    def _sync_keys(self) -> None:
+        if len(self._keys) != len(self.bytesdict):  # bytesdict was modified directly
+            self._keys = list(self.bytesdict)
+            self._positions = {key: k for k, key in enumerate(self._keys)}
+            self._weights = None
+
+    def set_weight(self, x: ArrayLike, weight: float) -> None:
+        """Sets the sampling weight of a point of the archive for weighted sampling
+        (all weights default to 1)
+        """
+        assert weight >= 0, "Weights must be non-negative"
+        self._sync_keys()
+        if self._weights is None:
+            self._weights = _FenwickTree([1.] * len(self._keys))
+        self._weights[self._positions[self._tobytes(x)]] = weight
+
+    def sample_key(self, weighted: bool = False) -> bytes:
+        """Samples a key of the bytesdict uniformly in O(1), or according to the
+        weights (see set_weight) in O(log(n)) if weighted is True
+        """
+        self._sync_keys()
+        if not self._keys:
+            raise RuntimeError("Cannot sample from an empty archive")
+        if weighted and self._weights is not None:
+            return self._keys[self._weights.find(np.random.uniform(0, self._weights.total))]
+        return self._keys[np.random.choice(len(self._keys))]
+
+    def sample(self, weighted: bool = False) -> np.ndarray:
+        """Samples a point of the archive (see sample_key)
+        """
+        return self.key_to_array(self.sample_key(weighted=weighted))
+
+    def enable_index(self, kind: str = "auto") -> None:
+        """Activates a spatial index on the keys of the archive, which is updated when
+        adding and removing points (but not if the bytesdict is modified directly).
+
+        Parameter
+        ---------
+        kind: str
+            "kdtree" (exact, for low dimension), "lsh" (approximate, for high dimension)
+            or "auto" (kdtree up to dimension 20)
+        """
+        if not self.bytesdict:
+            raise RuntimeError("The index can only be enabled once the archive is not empty (to infer the dimension)")
+        arrays = [self.key_to_array(key) for key in self.bytesdict]
+        self.index = neighbors.make_index(arrays[0].size, kind=kind)
+        for key, x in zip(self.bytesdict, arrays):
+            self.index.add(key, x)
+
+    def nearest(self, x: ArrayLike, k: int = 1) -> List[Tuple[np.ndarray, Y]]:
+        """Returns the k nearest points (coordinates and values) to x in the archive,
+        sorted by increasing distance (requires the index to be enabled)
+        """
+        if self.index is None:
+            raise RuntimeError("Index must be enabled first (see enable_index)")
+        _, keys = self.index.nearest(x, k)
+        return [(self.key_to_array(key), self.bytesdict[key]) for key in keys]
+
+    def within(self, x: ArrayLike, radius: float) -> List[Tuple[np.ndarray, Y]]:
+        """Returns the points (coordinates and values) of the archive at a distance lower than the radius
+        to x, sorted by increasing distance (requires the index to be enabled)
+        """
+        if self.index is None:
+            raise RuntimeError("Index must be enabled first (see enable_index)")
+        _, keys = self.index.within(x, radius)
+        return [(self.key_to_array(key), self.bytesdict[key]) for key in keys]
 
     def __contains__(self, x: ArrayLike) -> bool:
-        return _tobytes(x) in self.bytesdict
+        return self._tobytes(x) in self.bytesdict
 
     def get(self, x: ArrayLike, default: Optional[Y] = None) -> Optional[Y]:
-        return self.bytesdict.get(_tobytes(x), default)
+        return self.bytesdict.get(self._tobytes(x), default)
 
     def __len__(self) -> int:
         return len(self.bytesdict)
@@ -215,18 +587,18 @@ class Archive(Generic[Y]):
         to np.ndarray. This is to simplify interactions, but should not
         be used in an algorithm since the conversion can be inefficient.
         Prefer using self.bytesdict.items() directly, and convert the bytes
-        to np.ndarray using np.frombuffer(b)
+        to np.ndarray using self.key_to_array(b)
         """
-        return ((np.frombuffer(b), v) for b, v in self.bytesdict.items())
+        return ((self.key_to_array(b), v) for b, v in self.bytesdict.items())
 
     def keys_as_array(self) -> Iterator[np.ndarray]:
         """Functions that iterates on keys but transforms them
         to np.ndarray. This is to simplify interactions, but should not
         be used in an algorithm since the conversion can be inefficient.
         Prefer using self.bytesdict.keys() directly, and convert the bytes
-        to np.ndarray using np.frombuffer(b)
+        to np.ndarray using self.key_to_array(b)
         """
-        return (np.frombuffer(b) for b in self.bytesdict)
+        return (self.key_to_array(b) for b in self.bytesdict)
 
     def __repr__(self) -> str:
         return f"Archive with bytesdict: {self.bytesdict!r}"
@@ -248,29 +620,129 @@ class Pruning:
         minimum length of the pruned archive.
     max_len: int
         length at which pruning is activated (maximum allowed length for the archive).
+    journal: Journal, optional
+        journal (see optimization.journal) in which the evicted points are saved (with their mean value)
+        instead of being dropped.
+    max_bytes: int, optional
+        memory limit of the archive (see Archive.nbytes), points are evicted to stay under this limit.
+        Combined with a lower precision Archive dtype, this allows setting a hard memory budget per optimizer.
 
     Note
     ----
-    For each of the 3 criteria (optimistic, pessimistic and average), the min_len best (lowest)
-    points will be kept, which can lead to at most 3 * min_len points.
+    - For each of the 3 criteria (optimistic, pessimistic and average), the min_len best (lowest)
+      points are never evicted, so the archive can be pruned down to at most 3 * min_len points.
+    - Calling the pruning on an archive rebuilds the heaps of the best points from the full archive.
+      When the updated point is known (as in Optimizer.tell), use the add method instead: the best points are
+      then tracked incrementally through bounded heaps, so that the archive is kept under max_len with
+      O(log(min_len)) operations per call (the heaps are still rebuilt if the archive was modified externally).
     """
 
-    def __init__(self, min_len: int, max_len: int):
+    _names = ("optimistic", "pessimistic", "average")
+
+    def __init__(self, min_len: int, max_len: int, journal: Optional[Any] = None, max_bytes: Optional[int] = None) -> None:
         self.min_len = min_len
         self.max_len = max_len
+        self.max_bytes = max_bytes
+        self.journal = journal
+        self._warned = False
+        self._archive_id: Optional[int] = None
+        self._version = 0
+        self._versions: Dict[bytes, int] = {}  # version of the latest update of each key
+        self._heaps: Dict[str, List[Tuple[float, int, bytes]]] = {}  # max-heaps (negated estimations) of the best points
+        self._num_valid: Dict[str, int] = {}  # number of up-to-date entries in each heap
+        self._membership: Dict[bytes, List[str]] = {}  # criteria for which a key is among the best
+        self._candidates: Deque[bytes] = deque()  # keys which may be evicted (lazily checked)
+        self._reset()
+
+    def _reset(self) -> None:
+        self._versions, self._membership, self._candidates = {}, {}, deque()
+        self._heaps = {name: [] for name in self._names}
+        self._num_valid = {name: 0 for name in self._names}
 
     def __call__(self, archive: Archive[Value]) -> Archive[Value]:
-        if len(archive) < self.max_len:
-            return archive
-        warnings.warn("Pruning archive to save memory")
-        quantiles: Dict[str, float] = {}
-        threshold = float(self.min_len) / len(archive)
-        names = ["optimistic", "pessimistic", "average"]
-        for name in names:
-            quantiles[name] = np.quantile([v.get_estimation(name) for v in archive.values()], threshold)
-        new_archive = Archive[Value]()
-        new_archive.bytesdict = {b: v for b, v in archive.bytesdict.items() if any(v.get_estimation(n) <= quantiles[n] for n in names)}
-        return new_archive
+        self._resync(archive)
+        return self._evict(archive)
+
+    def add(self, archive: Archive[Value], x: ArrayLike) -> Archive[Value]:
+        """Prunes the archive after the addition or update of point x (incremental version of the call)
+        """
+        key = archive._tobytes(x)
+        if id(archive) != self._archive_id or len(archive) != len(self._versions) + (key not in self._versions):
+            self._resync(archive)
+        else:
+            self._update(key, archive.bytesdict[key])
+        return self._evict(archive)
+
+    def _evict(self, archive: Archive[Value]) -> Archive[Value]:
+        while (len(archive) >= self.max_len or self._exceeds_bytes(archive)) and self._candidates:
+            key = self._candidates.popleft()
+            value = archive.bytesdict.get(key)
+            if value is None or key in self._membership or self._offer(key, value):
+                continue  # already evicted, or among the best points
+            if not self._warned:
+                warnings.warn("Pruning archive to save memory")
+                self._warned = True
+            archive.pop_key(key)
+            del self._versions[key]
+            if self.journal is not None:
+                self.journal.append(archive.key_to_array(key), value.mean)
+        return archive
+
+    def _exceeds_bytes(self, archive: Archive[Value]) -> bool:
+        return self.max_bytes is not None and archive.nbytes > self.max_bytes
+
+    def _resync(self, archive: Archive[Value]) -> None:
+        self._reset()
+        self._archive_id = id(archive)
+        for key, value in archive.bytesdict.items():
+            self._update(key, value)
+
+    def _update(self, key: bytes, value: Value) -> None:
+        for name in self._membership.pop(key, []):
+            self._num_valid[name] -= 1  # former entries of the key are now outdated
+        self._version += 1
+        self._versions[key] = self._version
+        if not self._offer(key, value):
+            self._candidates.append(key)
+
+    def _is_valid(self, entry: Tuple[float, int, bytes]) -> bool:
+        return self._versions.get(entry[2]) == entry[1]
+
+    def _worst(self, name: str) -> float:
+        heap = self._heaps[name]
+        while not self._is_valid(heap[0]):
+            heapq.heappop(heap)
+        return -heap[0][0]
+
+    def _offer(self, key: bytes, value: Value) -> bool:
+        """Adds the key to the heaps of the criteria for which it is among the min_len best points,
+        and returns whether it was added to any of them
+        """
+        if self.min_len <= 0:
+            return False
+        added = False
+        for name in self._names:
+            estimation = value.get_estimation(name)
+            estimation = np.inf if np.isnan(estimation) else estimation
+            heap = self._heaps[name]
+            if self._num_valid[name] >= self.min_len:
+                if self._worst(name) <= estimation:
+                    continue
+                _, _, worst = heapq.heapreplace(heap, (-estimation, self._versions[key], key))
+                membership = self._membership[worst]
+                membership.remove(name)
+                if not membership:
+                    del self._membership[worst]
+                    self._candidates.append(worst)
+            else:
+                heapq.heappush(heap, (-estimation, self._versions[key], key))
+                self._num_valid[name] += 1
+            self._membership.setdefault(key, []).append(name)
+            added = True
+            if len(heap) > 2 * self.min_len + 16:  # remove outdated entries
+                heap[:] = [e for e in heap if self._is_valid(e)]
+                heapq.heapify(heap)
+        return added
 
     @classmethod
     def sensible_default(cls, num_workers: int, dimension: int) -> 'Pruning':
@@ -292,6 +764,106 @@ class Pruning:
         return cls(min_len, max(max_len, max_len_1gb))
 
 
+class ReevaluationScheduler:
+    """Chooses which point of an archive should be reevaluated in a noisy setting,
+    based on the Value statistics of the points.
+    The points are stored in one heap (by mean value) per number of evaluations,
+    so that the choice only requires looking at the best point of each heap.
+
+    Parameters
+    ----------
+    rule: str
+        - "racing": the point with the least evaluations among those which may still be better than
+          the best point (its lower confidence bound is below the upper confidence bound of the best point).
+        - "ucb": the point with the lowest lower confidence bound (mean - confidence * sigma * sqrt(log(N) / count)).
+    confidence: float
+        width of the confidence intervals, in number of standard deviations of the mean.
+
+    Note
+    ----
+    - The noise standard deviation sigma is estimated from all the points with at least 2 evaluations.
+    - update must be called after each evaluation for the scheduler to track the archive.
+    """
+
+    def __init__(self, rule: str = "racing", confidence: float = 2.) -> None:
+        assert rule in ["racing", "ucb"], f"Unknown rule {rule}"
+        self.rule = rule
+        self.confidence = confidence
+        self._version = 0
+        self._entries: Dict[bytes, Tuple[int, int, float, int]] = {}  # version, count, _m2 and dof of the latest update
+        self._heaps: Dict[int, List[Tuple[float, int, bytes]]] = {}  # one heap of (mean, version, key) per count
+        self._sum_m2 = 0.
+        self._dof = 0
+        self._num_evaluations = 0
+
+    @property
+    def sigma(self) -> Optional[float]:
+        """Pooled estimate of the noise standard deviation (None if no point was reevaluated yet)
+        """
+        return math.sqrt(self._sum_m2 / self._dof) if self._dof else None
+
+    def update(self, key: bytes, value: Value) -> None:
+        """Registers the new statistics of a point (to be called after each evaluation)
+        """
+        previous = self._entries.get(key)
+        if previous is not None:
+            self._sum_m2 -= previous[2]
+            self._dof -= previous[3]
+            self._num_evaluations -= previous[1]
+        finite = math.isfinite(value._m2) and math.isfinite(value.mean)
+        m2, dof = (value._m2, value.count - 1) if finite else (0., 0)
+        self._sum_m2 += m2
+        self._dof += dof
+        self._num_evaluations += value.count
+        self._version += 1
+        self._entries[key] = (self._version, value.count, m2, dof)
+        heap = self._heaps.setdefault(value.count, [])
+        heapq.heappush(heap, (float("inf") if math.isnan(value.mean) else value.mean, self._version, key))
+        if len(heap) > 64 and len(heap) > 2 * len(self._entries):
+            heap[:] = [e for e in heap if self._entries.get(e[2], (-1,))[0] == e[1]]
+            heapq.heapify(heap)
+
+    def _best_of(self, count: int, archive: Archive[Value]) -> Optional[Tuple[float, bytes]]:
+        heap = self._heaps[count]
+        while heap:
+            mean, version, key = heap[0]
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                if key in archive.bytesdict:
+                    return mean, key
+                del self._entries[key]  # pruned from the archive
+            heapq.heappop(heap)
+        del self._heaps[count]
+        return None
+
+    def choose(self, archive: Archive[Value], best: Point) -> Optional[np.ndarray]:
+        """Returns the point to reevaluate, or None if no point needs reevaluation
+
+        Parameters
+        ----------
+        archive: Archive
+            the archive of the optimizer
+        best: Point
+            the current best point (typically the pessimistic best)
+        """
+        sigma = self.sigma
+        if sigma is None:
+            return np.array(best.x, copy=True) if best.x in archive else None
+        bests = [(count, self._best_of(count, archive)) for count in sorted(self._heaps)]
+        candidates = [(count, best_of) for count, best_of in bests if best_of is not None]
+        if not candidates:
+            return None
+        if self.rule == "ucb":
+            factor = self.confidence * sigma * math.sqrt(math.log(max(2, self._num_evaluations)))
+            _, key = min((mean - factor / math.sqrt(count), key) for count, (mean, key) in candidates)
+            return archive.key_to_array(key)
+        threshold = best.mean + self.confidence * sigma / math.sqrt(best.count)
+        for count, (mean, key) in candidates:  # by increasing count
+            if mean - self.confidence * sigma / math.sqrt(count) < threshold:
+                return archive.key_to_array(key)
+        return None
+
+
 class Particle:
 
     def __init__(self) -> None: